@@ -1,13 +1,42 @@
 
+import bisect
 import copy
 import random
+import time
 from random import randint
-from database import getConnection
+from database import (
+    getConnection,
+    get_equipment_mask,
+    ROOM_EQUIPMENT_MASK_SQL,
+    SUBJECT_EQUIPMENT_MASK_SQL,
+)
 
 # Configuration Globale
 DAY_HOURS = 11  # 8h à 19h (18h fin de cours + 1h marge)
 DAYS_NUM = 5    # Lundi à Vendredi
 
+# Équipement qui caractérise une salle de TP (labo)
+LAB_EQUIPMENT = "PC"
+
+def required_equipment_mask(subject, lab_mask):
+    """
+    Masque des équipements qu'une salle doit posséder pour accueillir la matière.
+    Une matière de TP qui ne précise aucun équipement demande une salle informatique
+    (lab_mask, masque de LAB_EQUIPMENT). Retourne None si aucune salle ne peut convenir
+    (TP sans équipement alors que LAB_EQUIPMENT n'existe pas).
+    """
+    required = subject.get('equipment_mask', 0)
+    if required or "TP" not in subject['type']:
+        return required
+    return lab_mask or None
+
+
+def subject_suits_room(subject, room):
+    """Test d'inclusion binaire des équipements requis par la matière (voir required_equipment_mask)."""
+    required = required_equipment_mask(subject, room.lab_mask)
+    return required is not None and room.HasEquipment(required)
+
+
 class CourseClass:
     """
     Représente un cours à planifier (Matière + Groupe + Enseignant).
@@ -40,6 +69,13 @@ class CourseClass:
     def IsLabRequired(self):
         return "TP" in self.subject['type']
 
+    def GetRequiredEquipment(self):
+        # Masque des équipements requis par la matière (bit id - 1 de la table equipments)
+        return self.subject.get('equipment_mask', 0)
+
+    def SuitsRoom(self, room):
+        return subject_suits_room(self.subject, room)
+
     def GetNumberOfSeats(self):
         # Capacité nécessaire = taille du groupe
         return self.group['student_count']
@@ -54,6 +90,21 @@ class CourseClass:
         return f"Course({self.subject['name']}, {self.group['name']}, {self.instructor['name']})"
 
 
+class RoomWrapper:
+    """Vue d'une salle (ligne de la table rooms + masque d'équipements) pour l'algorithme."""
+
+    def __init__(self, data, lab_mask=0):
+        self.data = data
+        self.lab_mask = lab_mask
+
+    def GetNumberOfSeats(self): return self.data['capacity']
+    def GetEquipmentMask(self): return self.data.get('equipment_mask', 0)
+    def HasEquipment(self, mask): return (self.GetEquipmentMask() & mask) == mask
+    def IsLab(self): return bool(self.lab_mask and self.GetEquipmentMask() & self.lab_mask)
+    def GetId(self): return self.data['id']
+    def wrapper_obj(self): return self.data
+
+
 class Configuration:
     """
     Charge les données de la BD et sert de contexte pour l'algorithme génétique.
@@ -64,6 +115,11 @@ class Configuration:
     def __init__(self):
         self.rooms = []
         self.course_classes = []
+        self.lab_mask = 0
+        # Compteur global d'évaluations de fitness (budget de l'algorithme)
+        self.evaluations = 0
+        # Contraintes souples actives (voir services/soft_constraints.py)
+        self.soft_constraints = []
         self.load_data()
 
     @classmethod
@@ -79,9 +135,10 @@ class Configuration:
         conn = getConnection()
         cursor = conn.cursor()
 
-        # 1. Charger les Salles
-        cursor.execute("SELECT * FROM rooms WHERE active=1")
+        # 1. Charger les Salles (avec leur masque d'équipements)
+        cursor.execute(f"SELECT r.*, {ROOM_EQUIPMENT_MASK_SQL} AS equipment_mask FROM rooms r WHERE r.active=1")
         self.rooms = [dict(row) for row in cursor.fetchall()]
+        self.lab_mask = get_equipment_mask(cursor, [LAB_EQUIPMENT]) or 0
 
         # 2. Charger les Relations Matière-Groupe (Les cours à donner)
         # On suppose pour cet algo que chaque entrée dans subject_groups génère une nécessité de cours
@@ -89,9 +146,10 @@ class Configuration:
         # pour savoir combien de créneaux générer.
         # Ici, on génère 2 créneaux par matière-groupe par semaine pour simplifier.
         
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT s.id as s_id, s.name as s_name, s.code, s.type, s.required_equipment,
-                   g.id as g_id, g.name as g_name, g.student_count
+                   {SUBJECT_EQUIPMENT_MASK_SQL} AS equipment_mask,
+                   g.id as g_id, g.name as g_name, g.student_count, g.filiere
             FROM subject_groups sg
             JOIN subjects s ON sg.subject_id = s.id
             JOIN groups g ON sg.group_id = g.id
@@ -102,9 +160,11 @@ class Configuration:
         for a in assignments:
             subject = {
                 'id': a['s_id'], 'name': a['s_name'], 'code': a['code'], 
-                'type': a['type'], 'required_equipment': a['required_equipment']
+                'type': a['type'], 'required_equipment': a['required_equipment'],
+                'equipment_mask': a['equipment_mask']
             }
-            group = {'id': a['g_id'], 'name': a['g_name'], 'student_count': a['student_count']}
+            group = {'id': a['g_id'], 'name': a['g_name'], 'student_count': a['student_count'],
+                     'filiere': a['filiere']}
             
             # Trouver un prof qualifié
             cursor.execute("""
@@ -139,15 +199,15 @@ class Configuration:
 
     def GetRoomById(self, index):
         if 0 <= index < len(self.rooms):
-            class RoomWrapper:
-                def __init__(self, data): self.data = data
-                def GetNumberOfSeats(self): return self.data['capacity']
-                def IsLab(self): return "PC" in (self.data['equipments'] or "")
-                def GetId(self): return self.data['id']
-                def wrapper_obj(self): return self.data
-            return RoomWrapper(self.rooms[index])
+            return RoomWrapper(self.rooms[index], self.lab_mask)
         return None
 
+    def DecodePosition(self, pos):
+        """Position -> (jour, indice salle, heure) selon l'encodage jour * (NbSalles * DAY_HOURS) + salle * DAY_HOURS + heure"""
+        day_size = DAY_HOURS * len(self.rooms)
+        rem = pos % day_size
+        return pos // day_size, rem // DAY_HOURS, rem % DAY_HOURS
+
     def GetCourseClasses(self):
         return self.course_classes
 
@@ -162,6 +222,11 @@ class Schedule:
         self.crossoverProbability = crossoverProbability
         self.mutationProbability = mutationProbability
         self.fitness = 0
+        self.hard_fitness = 0
+        self.soft_penalty = 0.0
+        
+        # État incrémental des contraintes souples (construit à la première évaluation)
+        self.soft = None
         
         # Référence au Singleton Configuration
         self.config = Configuration.get_instance()
@@ -187,6 +252,9 @@ class Schedule:
             c.classes = copy.copy(self.classes) 
             c.criteria = copy.copy(self.criteria)
             c.fitness = self.fitness
+            c.hard_fitness = self.hard_fitness
+            c.soft_penalty = self.soft_penalty
+            c.soft = self.soft.copy() if self.soft is not None else None
         return c
 
     def MakeNewFromPrototype(self):
@@ -242,6 +310,7 @@ class Schedule:
         return new_chromosome
 
     def CalculateFitness(self):
+        self.config.evaluations += 1
         score = 0
         
         nr = self.config.GetNumberOfRooms()
@@ -277,8 +346,8 @@ class Schedule:
             if enough_seats: score += 1
             self.criteria[ci + 1] = enough_seats
             
-            # 3. Labo requis ?
-            lab_ok = (not cc.IsLabRequired()) or (cc.IsLabRequired() and room_obj.IsLab())
+            # 3. Labo / équipements requis ?
+            lab_ok = cc.SuitsRoom(room_obj)
             if lab_ok: score += 1
             self.criteria[ci + 2] = lab_ok
             
@@ -322,7 +391,23 @@ class Schedule:
             
         # Normalisation du score (0 à 1)
         # Max score = 5 * nb_classes
-        self.fitness = score / (self.config.GetNumberOfCourseClasses() * 5)
+        criteria_count = self.config.GetNumberOfCourseClasses() * 5
+        self.hard_fitness = score / criteria_count
+        self.fitness = self.hard_fitness
+
+        # Contraintes souples: l'état est mis à jour incrémentalement par Mutation,
+        # il n'est reconstruit que pour un nouvel individu
+        if self.config.soft_constraints:
+            if self.soft is None:
+                # Import local: le package services importe lui-même Schedule
+                from services.soft_constraints import SoftProfile
+                self.soft = SoftProfile(self.config.soft_constraints, DAY_HOURS, self.config.DecodePosition)
+                self.soft.rebuild(self.classes)
+            self.soft_penalty = self.soft.total
+            # La pénalité ne retire qu'une fraction (< 1) d'un critère dur: un critère dur
+            # respecté de plus l'emporte toujours sur le confort, qui ne départage que les
+            # plannings de même fitness dure (et target_fitness garde son sens)
+            self.fitness = self.hard_fitness - (self.soft_penalty / (1.0 + self.soft_penalty)) / criteria_count
 
 
     def Mutation(self):
@@ -391,6 +476,9 @@ class Schedule:
                         self.slots[new_pos + i].append(cc)
                 self.classes[cc] = new_pos
 
+            if self.soft is not None:
+                self.soft.move(cc, old_pos, new_pos)
+
         self.CalculateFitness()
 
     def Crossover(self, parent2):
@@ -399,32 +487,21 @@ class Schedule:
             
         child = self.copy(True) # Setup only
         
-        # Liste des cours (clés identiques pour les deux parents)
+        # Liste des cours (clés identiques pour les deux parents, même ordre)
         keys = list(self.classes.keys())
-        # Shuffle pour mixer
-        random.shuffle(keys)
         
-        # Split en deux sets
-        cut = len(keys) // 2
-        set1 = keys[:cut]
-        set2 = keys[cut:]
+        # Croisement multi-points: on choisit numberOfCrossoverPoints points de coupure
+        # et on alterne le parent donneur à chaque point
+        nb_points = max(1, min(self.numberOfCrossoverPoints, len(keys) - 1))
+        cut_points = set(random.sample(range(1, len(keys)), nb_points)) if len(keys) > 1 else set()
         
-        # Hériter du Parent 1
-        for cc in set1:
-            pos = self.classes[cc]
-            child.classes[cc] = pos
-            duration = cc.GetDuration()
-            for i in range(duration):
-                if child.slots[pos + i] is None:
-                    child.slots[pos + i] = [cc]
-                else:
-                    child.slots[pos + i].append(cc)
-                    
-        # Hériter du Parent 2
-        for cc in set2:
-            pos = parent2.classes[cc]
+        from_first = random.random() < 0.5
+        for idx, cc in enumerate(keys):
+            if idx in cut_points:
+                from_first = not from_first
             # Si le créneau est déjà très occupé ou conflit, on accepte quand même
             # La mutation et fitness régleront ça
+            pos = self.classes[cc] if from_first else parent2.classes[cc]
             child.classes[cc] = pos
             duration = cc.GetDuration()
             for i in range(duration):
@@ -436,54 +513,286 @@ class Schedule:
         child.CalculateFitness()
         return child
 
+class AdaptiveController:
+    """
+    Pilotage adaptatif de l'algorithme génétique.
+
+    Surveille la progression des fitness (meilleure et moyenne) et décide, à chaque
+    génération, s'il faut renforcer la mutation, réinjecter des individus neufs
+    ou arrêter la recherche (budget temps / évaluations épuisé).
+    """
+    ACTION_NONE = "none"
+    ACTION_BOOST = "boost"       # Augmenter la taille / probabilité de mutation
+    ACTION_RESTART = "restart"   # Diversité effondrée: injecter des individus neufs
+    ACTION_RESET = "reset"       # Progrès retrouvé: revenir aux paramètres de base
+
+    def __init__(self, time_budget=None, max_evaluations=None, stagnation_window=8,
+                 min_improvement=1e-3, diversity_threshold=0.1):
+        self.time_budget = time_budget            # Secondes (None = illimité)
+        self.max_evaluations = max_evaluations    # Évaluations de fitness (None = illimité)
+        self.stagnation_window = stagnation_window
+        self.min_improvement = min_improvement
+        self.diversity_threshold = diversity_threshold
+
+        self.start_time = None
+        self.start_evaluations = 0
+        self.best_seen = None
+        self.mean_seen = None
+        self.stagnant_generations = 0
+        self.boosted = False
+
+    def start(self, evaluations=0):
+        self.start_time = time.monotonic()
+        self.start_evaluations = evaluations
+        self.best_seen = None
+        self.mean_seen = None
+        self.stagnant_generations = 0
+        self.boosted = False
+
+    def elapsed(self):
+        if self.start_time is None:
+            return 0.0
+        return time.monotonic() - self.start_time
+
+    def budget_exhausted(self, evaluations):
+        """Retourne True si le budget temps ou évaluations est consommé."""
+        if self.time_budget is not None and self.elapsed() >= self.time_budget:
+            return True
+        if self.max_evaluations is not None and evaluations - self.start_evaluations >= self.max_evaluations:
+            return True
+        return False
+
+    def observe(self, best_fitness, mean_fitness, diversity):
+        """
+        Enregistre l'état d'une génération et retourne l'action à appliquer.
+
+        Args:
+            best_fitness (float): Meilleure fitness de la population
+            mean_fitness (float): Fitness moyenne
+            diversity (float): Diversité de la population (0 = clones, 1 = tous différents)
+
+        Returns:
+            str: Une des constantes ACTION_*
+        """
+        improved = (
+            self.best_seen is None
+            or best_fitness > self.best_seen + self.min_improvement
+            or mean_fitness > self.mean_seen + self.min_improvement
+        )
+
+        if improved:
+            self.best_seen = best_fitness if self.best_seen is None else max(self.best_seen, best_fitness)
+            self.mean_seen = mean_fitness if self.mean_seen is None else max(self.mean_seen, mean_fitness)
+            self.stagnant_generations = 0
+            if self.boosted:
+                self.boosted = False
+                return self.ACTION_RESET
+            return self.ACTION_NONE
+
+        self.stagnant_generations += 1
+        if diversity < self.diversity_threshold:
+            return self.ACTION_RESTART
+        if self.stagnant_generations >= self.stagnation_window:
+            # Un renforcement par fenêtre de stagnation
+            self.stagnant_generations = 0
+            self.boosted = True
+            return self.ACTION_BOOST
+        return self.ACTION_NONE
+
+
+class Population:
+    """
+    Population d'emplois du temps maintenue triée par fitness décroissante.
+
+    - L'ordre est mis à jour à chaque insertion (recherche dichotomique), ce qui
+      évite de retrier toute la population à chaque génération.
+    - Les doublons (chromosomes identiques) sont rejetés en O(1) grâce à un
+      ensemble de signatures (tuple des positions des cours).
+    """
+
+    def __init__(self, individuals=None):
+        self._keys = []          # (-fitness, numéro d'insertion) triés croissants
+        self._items = []         # Schedule, dans le même ordre que _keys
+        self._signatures = set()
+        self._counter = 0
+        self._fitness_sum = 0.0
+        for individual in individuals or []:
+            self.add(individual)
+
+    @staticmethod
+    def signature(schedule):
+        return tuple(schedule.classes.values())
+
+    def add(self, schedule):
+        """Insère un individu. Retourne False (sans l'insérer) s'il s'agit d'un doublon."""
+        sig = self.signature(schedule)
+        if sig in self._signatures:
+            return False
+        self._signatures.add(sig)
+        self._counter += 1
+        key = (-schedule.fitness, self._counter)
+        idx = bisect.bisect(self._keys, key)
+        self._keys.insert(idx, key)
+        self._items.insert(idx, schedule)
+        self._fitness_sum += schedule.fitness
+        return True
+
+    def truncate(self, size):
+        """Ne conserve que les `size` meilleurs individus."""
+        for schedule in self._items[size:]:
+            self._signatures.discard(self.signature(schedule))
+            self._fitness_sum -= schedule.fitness
+        del self._keys[size:]
+        del self._items[size:]
+
+    def best(self):
+        return self._items[0] if self._items else None
+
+    def mean_fitness(self):
+        return self._fitness_sum / len(self._items) if self._items else 0.0
+
+    def tournament(self, size):
+        """Sélection par tournoi: la population étant triée, le gagnant est le plus petit rang tiré."""
+        n = len(self._items)
+        return self._items[min(random.sample(range(n), min(size, n)))]
+
+    def mean_hamming_distance(self, samples=30):
+        """
+        Distance de Hamming moyenne entre paires d'individus tirées au hasard,
+        normalisée par le nombre de cours (0 = clones, 1 = aucun cours au même endroit).
+        """
+        n = len(self._items)
+        if n < 2:
+            return 0.0
+        length = len(self._items[0].classes) or 1
+        total = 0
+        for _ in range(samples):
+            a, b = random.sample(range(n), 2)
+            sig_a, sig_b = self.signature(self._items[a]), self.signature(self._items[b])
+            total += sum(1 for x, y in zip(sig_a, sig_b) if x != y)
+        return total / (samples * length)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+
 class GeneticAlgorithm:
-    def __init__(self, population_size=10, mutation_size=2, crossover_prob=0.8, mutation_prob=0.2):
+    def __init__(self, population_size=10, mutation_size=2, crossover_prob=0.8, mutation_prob=0.2,
+                 crossover_points=2, tournament_size=3):
         self.config = Configuration.get_instance()
-        self.population = []
         self.generation = 0
+        self.tournament_size = tournament_size
+
+        # Paramètres de base (les paramètres courants peuvent être ajustés par le contrôleur adaptatif)
+        self.base_mutation_size = mutation_size
+        self.base_mutation_prob = mutation_prob
+        self.mutation_size = mutation_size
+        self.mutation_prob = mutation_prob
+        self.restarts = 0
+        self.population_size = population_size
         
-        # Init population
-        prototype = Schedule(2, mutation_size, crossover_prob, mutation_prob)
-        for _ in range(population_size):
-            self.population.append(prototype.MakeNewFromPrototype())
-
-    def evolve(self, max_generations=1, target_fitness=1.0):
-        best_schedule = None
+        # Init population (triée, sans doublons)
+        self.prototype = Schedule(crossover_points, mutation_size, crossover_prob, mutation_prob)
+        self.population = Population()
+        self._fill_with_fresh(population_size)
+
+    def _fill_with_fresh(self, size, population=None):
+        """Complète une population avec des individus aléatoires jusqu'à `size` (en évitant les doublons)."""
+        population = population if population is not None else self.population
+        attempts = 0
+        while len(population) < size and attempts < size * 10:
+            attempts += 1
+            population.add(self.prototype.MakeNewFromPrototype())
+
+    def evolve(self, max_generations=1, target_fitness=1.0, time_budget=None, max_evaluations=None,
+               controller=None):
+        """
+        Fait évoluer la population.
+
+        Args:
+            max_generations (int): Nombre maximal de générations
+            target_fitness (float): Arrêt dès que cette fitness est atteinte
+            time_budget (float, optional): Budget en secondes ("le meilleur planning en 30 s")
+            max_evaluations (int, optional): Budget en évaluations de fitness
+            controller (AdaptiveController, optional): Contrôleur adaptatif à utiliser
+
+        Returns:
+            Schedule: Meilleur individu trouvé
+        """
+        if controller is None:
+            controller = AdaptiveController(time_budget=time_budget, max_evaluations=max_evaluations)
+        controller.start(self.config.evaluations)
+
+        # La population est maintenue triée par fitness décroissante
+        best_schedule = self.population.best()
         
         for g in range(max_generations):
+            if best_schedule.fitness >= target_fitness:
+                break
+            if controller.budget_exhausted(self.config.evaluations):
+                break
+
             self.generation += 1
-            
-            # Trier par fitness décroissant
-            self.population.sort(key=lambda x: x.fitness, reverse=True)
-            best = self.population[0]
-            
-            # print(f"Generation {self.generation} | Best Fitness: {best.fitness:.3f}")
-            
-            if best.fitness >= target_fitness:
-                return best
-            
-            best_schedule = best
+            best = self.population.best()
             
             # Sélection et Reproduction (Elitisme: on garde le meilleur)
-            new_population = [best] 
+            new_population = Population([best])
             
-            # On remplit le reste
-            while len(new_population) < len(self.population):
+            # On remplit le reste (les clones sont rejetés par la population)
+            attempts = 0
+            while len(new_population) < self.population_size and attempts < self.population_size * 3:
+                attempts += 1
                 # Tournoi simple
                 p1 = self.tournament_selection()
                 p2 = self.tournament_selection()
                 
                 child = p1.Crossover(p2)
+                child.mutationSize = self.mutation_size
+                child.mutationProbability = self.mutation_prob
                 child.Mutation()
                 
-                new_population.append(child)
+                new_population.add(child)
+
+            # Trop de clones: on complète avec des individus neufs
+            self._fill_with_fresh(self.population_size, new_population)
             
             self.population = new_population
+            if self.population.best().fitness > best_schedule.fitness:
+                best_schedule = self.population.best()
+
+            # print(f"Generation {self.generation} | Best Fitness: {best_schedule.fitness:.3f}")
+
+            action = controller.observe(self.population.best().fitness, self.population.mean_fitness(),
+                                        self.diversity())
+            self._apply_action(action)
             
         return best_schedule
 
+    def diversity(self):
+        """Distance de Hamming moyenne (échantillonnée) entre individus, entre 0 (clones) et 1."""
+        return self.population.mean_hamming_distance()
+
+    def _apply_action(self, action):
+        if action == AdaptiveController.ACTION_BOOST:
+            # Stagnation: mutations plus fortes et plus fréquentes
+            max_size = max(self.base_mutation_size, self.config.GetNumberOfCourseClasses() // 2)
+            self.mutation_size = min(self.mutation_size + 1, max_size)
+            self.mutation_prob = min(self.mutation_prob + 0.1, 1.0)
+        elif action == AdaptiveController.ACTION_RESTART:
+            # Diversité effondrée: on garde l'élite et on remplace la moitié la moins bonne
+            self.restarts += 1
+            self.population.truncate(max(1, self.population_size // 2))
+            self._fill_with_fresh(self.population_size)
+        elif action == AdaptiveController.ACTION_RESET:
+            self.mutation_size = self.base_mutation_size
+            self.mutation_prob = self.base_mutation_prob
+
     def tournament_selection(self):
-        # Prendre 3 au hasard et retourner le meilleur
-        candidates = random.sample(self.population, 3)
-        candidates.sort(key=lambda x: x.fitness, reverse=True)
-        return candidates[0]
+        # Prendre tournament_size individus au hasard et retourner le meilleur (sans tri)
+        return self.population.tournament(self.tournament_size)
@@ -1,14 +1,28 @@
 # --- Importations nécessaires ---
-import openpyxl
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+import os
 
 from database import (
-    insert_schedule_slot,
-    check_conflict,
+    add_schedule_slot,
     getConnection,
     DAYS
 )
+from services.occupancy import OccupancyCache
+from services.room_matcher import RoomMatcher
+from services.analytics import RoomAnalytics, WEEKLY_HOURS
+from services.export import build_filiere_grids, export_path
+from services.export.cache import cached_export
+from services.export.model import ALL_FILIERES
+from services.export.bulk import bulk_export
+from services.export.feeds import generate_feeds, FEEDS_DIR, STATE_FILE
+from services.export.site import build_site, SITE_DIR, MANIFEST_FILE
+from services.diff import diff_versions, PUBLISHED_SOURCE
+from services.versions import (
+    create_version,
+    add_draft_slots,
+    publish_version,
+    rollback,
+    list_versions
+)
 
 
 # Contrôleur pour l'administrateur
@@ -19,13 +33,12 @@ class AdminController:
         self.admin_id = admin_id
 
     def creer_creneau(self, course_id, instructor_id, group_id, room_id, day, start_hour, duration):
-        conflit = check_conflict(instructor_id, group_id, room_id, day, start_hour, duration)
-        if conflit:
+        # Vérification et insertion atomiques (triggers anti-conflits de la table timetable)
+        success, conflit = add_schedule_slot(course_id, instructor_id, group_id, room_id, day, start_hour, duration, self.admin_id)
+        if not success:
             print(f" Conflit détecté : {conflit}")
             return False
-        success = insert_schedule_slot(course_id, instructor_id, group_id, room_id, day, start_hour, duration, self.admin_id)
-        if success:
-            print(" Créneau ajouté avec succès.")
+        print(" Créneau ajouté avec succès.")
         return success
 
     def valider_reservation(self, reservation_id):
@@ -58,6 +71,83 @@ class AdminController:
             print(f" Aucune réservation en attente avec l’ID {reservation_id}.")
         conn.close()
 
+    def valider_reservations_en_lot(self, reservation_ids=None, rejeter_conflits=True):
+        """
+        Valide en une seule transaction toutes les réservations en attente sans conflit
+        (salle, enseignant, groupe) avec l'emploi du temps ou les réservations approuvées.
+
+        Args:
+            reservation_ids (list, optional): Restreindre le lot à ces réservations
+            rejeter_conflits (bool): Rejeter les demandes en conflit (sinon elles restent en attente)
+
+        Returns:
+            dict: {"success", "approved", "rejected", "message"} (voir services.reservations)
+        """
+        from services.reservations import approve_pending
+
+        result = approve_pending(self.admin_id, reservation_ids, reject_conflicts=rejeter_conflits)
+        print(f" {result['message']}")
+        for rejection in result["rejected"]:
+            print(f"  - Réservation {rejection['id']} : {rejection['message']}")
+        return result
+
+    def lister_versions(self):
+        """Affiche et retourne les versions de l'emploi du temps (brouillons, publiée, archives)."""
+        versions = list_versions()
+        if not versions:
+            print(" Aucune version enregistrée.")
+        for v in versions:
+            print(f"- #{v['id']} [{v['status']}] {v['label']} : {v['slots']} créneaux "
+                  f"(créée le {v['created_at']}, publiée le {v['published_at'] or '-'})")
+        return versions
+
+    def publier_version(self, version_id):
+        """Publie un brouillon ou une archive: l'emploi du temps visible est remplacé en une transaction."""
+        result = publish_version(version_id, self.admin_id)
+        print(f" {result['message']}")
+        if result["success"]:
+            self._signaler_changements(result["archived"])
+        return result
+
+    def annuler_publication(self):
+        """Revient à l'emploi du temps publié précédent (un second appel rétablit la publication annulée)."""
+        result = rollback(self.admin_id)
+        print(f" {result['message']}")
+        if result["success"]:
+            self._signaler_changements(result["archived"])
+        return result
+
+    def comparer_versions(self, avant, apres=PUBLISHED_SOURCE):
+        """
+        Affiche les séances ajoutées, supprimées et déplacées entre deux états
+        ("published", id de version ou fichier JSON) et retourne le ChangeSet.
+        """
+        changes = diff_versions(avant, apres)
+        for line in changes.lines():
+            print(f"  {line}")
+        print(f" {changes.summary()}")
+        return changes
+
+    def _signaler_changements(self, version_remplacee):
+        """
+        Après une publication: résumé des changements par rapport à la version remplacée,
+        jeu de changements JSON (exports/Changements_EDT_*.json) pour les notifications, et
+        mise à jour des flux ICS et du site statique déjà générés (seules les grilles
+        touchées sont réécrites).
+        """
+        changes = diff_versions(version_remplacee, PUBLISHED_SOURCE)
+        print(f" {changes.summary()}")
+        if not changes:
+            return changes
+        changes.to_json(export_path("Changements_EDT.json", timestamp=True))
+
+        exports_dir = os.path.join(os.getcwd(), "exports")
+        if os.path.exists(os.path.join(exports_dir, FEEDS_DIR, STATE_FILE)):
+            print(f" {generate_feeds()['message']}")
+        if os.path.exists(os.path.join(exports_dir, SITE_DIR, MANIFEST_FILE)):
+            print(f" {build_site()['message']}")
+        return changes
+
     def afficher_details_reservation(self, reservation_id):
         conn = getConnection()
         cursor = conn.cursor()
@@ -90,42 +180,11 @@ class AdminController:
 
 
     def get_room_occupancy_stats(self):
-        """Calculates global and per-room occupancy rates (assuming 30 slots/week)."""
-        conn = getConnection()
-        cursor = conn.cursor()
-        
-        # Total slots capacity per week (6 days * 5 slots)
-        TOTAL_SLOTS = 30
-        
-        # Get count of occupied slots for each room
-        cursor.execute("""
-            SELECT r.name, COUNT(t.id) as occupied_count, r.capacity
-            FROM rooms r
-            LEFT JOIN timetable t ON r.id = t.room_id
-            GROUP BY r.id
-            ORDER BY occupied_count DESC
-        """)
-        results = cursor.fetchall()
-        
-        stats = []
-        for row in results:
-            count = row['occupied_count']
-            rate = (count / TOTAL_SLOTS) * 100
-            
-            status = "Faible"
-            if rate > 75: status = "Surchargé"
-            elif rate > 40: status = "Normal"
-                
-            stats.append({
-                "room": row['name'],
-                "capacity": row['capacity'],
-                "occupied": count,
-                "rate": round(rate, 1),
-                "status": status
-            })
-            
-        conn.close()
-        return stats
+        """
+        Taux d'utilisation de chaque salle: heures réellement occupées (durées des cours
+        et des réservations approuvées) sur les heures d'ouverture de la semaine.
+        """
+        return RoomAnalytics.get_instance().room_stats()
 
     def get_realtime_room_status(self):
         """Returns the status of all rooms for the current real-time slot."""
@@ -232,109 +291,178 @@ class AdminController:
             print("Aucune réservation en attente.")
 
     def afficher_statistiques(self):
-        conn = getConnection()
-        cursor = conn.cursor()
-
-        nb_creneaux = cursor.execute("SELECT COUNT(*) FROM timetable").fetchone()[0]
-        nb_reservations = cursor.execute("SELECT COUNT(*) FROM reservations WHERE status = 'APPROVED'").fetchone()[0]
-        nb_salles = cursor.execute("SELECT COUNT(*) FROM rooms").fetchone()[0]
+        analytics = RoomAnalytics.get_instance()
+        summary = analytics.summary()
 
         print("\n Statistiques générales :")
-        print(f"- Nombre total de créneaux planifiés : {nb_creneaux}")
-        print(f"- Réservations approuvées : {nb_reservations}")
-        print(f"- Nombre de salles disponibles : {nb_salles}")
+        print(f"- Nombre total de créneaux planifiés : {summary['sessions']}")
+        print(f"- Réservations approuvées : {summary['reservations']}")
+        print(f"- Nombre de salles disponibles : {summary['active_rooms']}")
+        print(f"- Heures de séances par semaine : {summary['hours']} h")
+        print(f"- Taux d'utilisation global : {summary['rate']}% ({WEEKLY_HOURS} h d'ouverture par salle)")
 
         print("\n Taux d’occupation des salles :")
-        cursor.execute("""
-            SELECT r.name, COUNT(t.id) AS nb_creneaux
-            FROM rooms r
-            LEFT JOIN timetable t ON r.id = t.room_id
-            GROUP BY r.id
-            ORDER BY nb_creneaux DESC
-        """)
-        for row in cursor.fetchall():
-            print(f"- {row['name']} : {row['nb_creneaux']} créneaux")
+        for s in analytics.room_stats():
+            fill = f", remplissage {s['seat_fill']}%" if s['seat_fill'] is not None else ""
+            print(f"- {s['room']} : {s['hours']} h/{WEEKLY_HOURS} ({s['rate']}%{fill})")
 
-        conn.close()
+        print("\n Heures de pointe :")
+        for peak in analytics.peak_contention():
+            # ratio vaut None quand aucune salle n'est active
+            ratio = f" ({peak['ratio']:.0%})" if peak['ratio'] is not None else ""
+            print(f"- {DAYS.get(peak['day'], peak['day'])} {peak['hour']}h : {peak['sessions']} séances "
+                  f"pour {peak['rooms']} salles{ratio}")
+
+        print("\n Charge des enseignants :")
+        for name, hours in analytics.instructor_load():
+            print(f"- {name} : {hours} h/semaine")
 
 
     # Anciennes méthodes d'export de statistiques supprimées sur demande.
 
 
     #Method inside the class (4 spaces indentation) ---
-    def generer_planning_complet(self):
+    def generer_planning_complet(self, time_budget=None, max_evaluations=None, mode="genetique",
+                                 profile=None, soft_constraints=None, publier=True):
         """
         Génère l'emploi du temps complet en utilisant l'algorithme génétique.
-        Cette action efface le planning existant pour une régénération propre.
+        Le résultat est écrit dans un brouillon (services.versions): le planning publié
+        n'est remplacé qu'à la publication, en une seule transaction.
+
+        Args:
+            time_budget (float, optional): Durée maximale de recherche en secondes
+            max_evaluations (int, optional): Nombre maximal d'évaluations de fitness
+            mode (str): "genetique" (par défaut) ou "exact" (solveur complet par backtracking,
+                        avec repli sur l'algorithme génétique si le budget est épuisé)
+            profile (str, optional): Profil de paramètres enregistré par services.autotune
+            soft_constraints (list, optional): Contraintes souples pondérées (voir
+                        services.soft_constraints.default_soft_constraints), ignorées par le mode exact
+            publier (bool): Publier le brouillon immédiatement (sinon, voir publier_version)
         """
         print("Démarrage de la génération automatique...")
         
-        # 1. Nettoyer la table timetable (Optionnel: on pourrait vouloir garder les trucs manuels)
-        conn = getConnection()
-        cursor = conn.cursor()
-        cursor = conn.cursor()
-        # cursor.execute("DELETE FROM timetable") # Reset complet pour la démo
-        # conn.commit()
-        conn.close()
-        
-        # 2. Lancer l'algo
-        from Schedule import GeneticAlgorithm, Configuration, DAY_HOURS
+        # 1. Lancer l'algo (le planning publié n'est pas touché: le résultat va dans un brouillon)
+        from Schedule import GeneticAlgorithm, Configuration
         
         # Recharger la config pour être sûr d'avoir les dernières données
         config = Configuration.get_instance()
         config.load_data()
+        config.soft_constraints = list(soft_constraints or [])
         
         if config.GetNumberOfCourseClasses() == 0:
             return "Aucun cours à planifier (Tables vides ?)"
+
+        if mode == "exact":
+            from services.feasibility import FeasibilitySolver, FEASIBLE, INFEASIBLE
+
+            solver = FeasibilitySolver(config, time_limit=time_budget or 10.0)
+            result = solver.solve()
+            if result["status"] == FEASIBLE:
+                count, version_id, publication = self._sauvegarder_affectations(
+                    config, result["assignment"], "Génération exacte", publier)
+                return (f"Génération exacte terminée ! {count}/{len(result['assignment'])} cours planifiés "
+                        f"(solution sans conflit trouvée en {result['nodes']} noeuds)."
+                        + self._message_version(version_id, publication))
+            if result["status"] == INFEASIBLE:
+                return "Aucune solution n'existe. " + self._formater_noyau(result)
+            print("Budget du solveur exact épuisé, repli sur l'algorithme génétique...")
             
-        ga = GeneticAlgorithm(population_size=12, mutation_size=2)
-        # On lance sur 50 générations (peut être ajusté)
-        best_schedule = ga.evolve(max_generations=50, target_fitness=0.95)
-        
-        # 3. Sauvegarder le meilleur résultat
-        conn = getConnection()
-        cursor = conn.cursor()
-        
-        count = 0
-        nr = config.GetNumberOfRooms()
-        day_size = DAY_HOURS * nr
-        
-        for cc, pos in best_schedule.classes.items():
-            # Décodage de la position
-            day = pos // day_size
-            rem = pos % day_size
-            room_idx = rem // DAY_HOURS
-            time = rem % DAY_HOURS
-            
-            # Récupération des IDs réels
-            # Note: day est 0-indexed dans l'algo, mais 1-indexed dans la DB (Lundi=1)
-            db_day = day + 1 
-            
-            # Ajustement de l'heure (L'algo commence à 0 -> 8h00)
-            db_start_hour = 8 + time
-            
-            # Récupération de l'objet Salle réel
-            room_wrapper = config.GetRoomById(room_idx)
-            room_id = room_wrapper.GetId()
-            
+        from services.autotune import DEFAULT_PARAMS, GA_KEYS, load_profile
+
+        params = DEFAULT_PARAMS
+        if profile:
+            params = load_profile(profile)
+            if params is None:
+                return f"Profil de paramètres '{profile}' introuvable."
+
+        ga = GeneticAlgorithm(**{key: params[key] for key in GA_KEYS})
+        # On lance sur max_generations générations (50 par défaut); le contrôleur adaptatif
+        # arrête plus tôt si le budget temps/évaluations est épuisé
+        best_schedule = ga.evolve(max_generations=params["max_generations"], target_fitness=0.95,
+                                  time_budget=time_budget, max_evaluations=max_evaluations)
+        
+        # 2. Sauvegarder le meilleur résultat dans un brouillon (publié si demandé)
+        count, version_id, publication = self._sauvegarder_affectations(
+            config, best_schedule.classes, "Génération automatique", publier)
+        suffix = self._message_version(version_id, publication)
+
+        if config.soft_constraints:
+            return (f"Génération terminée ! {count} cours planifiés avec un score de "
+                    f"{best_schedule.hard_fitness:.2%} (pénalité qualité: {best_schedule.soft_penalty:g})." + suffix)
+        return f"Génération terminée ! {count} cours planifiés avec un score de {best_schedule.fitness:.2%}." + suffix
+
+    def _sauvegarder_affectations(self, config, classes, label, publier=True):
+        """
+        Enregistre les affectations {CourseClass: position} dans un nouveau brouillon,
+        puis le publie (remplacement atomique de la table timetable) si demandé.
+
+        Returns:
+            tuple: (nombre de créneaux enregistrés, id de la version, résultat de la publication ou None)
+        """
+        slots = []
+        for cc, pos in classes.items():
+            # Décodage de la position (jour 1-indexé en base, l'algo commence à 8h00)
+            day, room_idx, time = config.DecodePosition(pos)
+            room_id = config.GetRoomById(room_idx).GetId()
+
             # Données du cours
             subj = cc.GetSubject()
             grp = cc.GetGroups()[0] # On a simplifié à 1 groupe
             instr = cc.GetProfessor()
-            duration = cc.GetDuration()
-            
-            # Insertion directe (on bypass check_conflict car l'algo l'a fait)
-            # Insertion avec vérification de conflit via insert_schedule_slot
-            success = insert_schedule_slot(subj['id'], instr['id'], grp['id'], room_id, db_day, db_start_hour, duration, self.admin_id)
-            if success:
-                count += 1
-            else:
-                print(f"Erreur/Conflit insertion auto: {subj['name']} ({grp['name']})")
-                
-        conn.commit()
-        conn.close()
-        
-        return f"Génération terminée ! {count} cours planifiés avec un score de {best_schedule.fitness:.2%}."
+            slots.append((subj['id'], instr['id'], grp['id'], room_id, day + 1, 8 + time,
+                          cc.GetDuration(), self.admin_id))
+
+        # Insertion avec vérification de conflit (triggers de la table timetable_drafts)
+        version_id = create_version(label, self.admin_id)
+        count, refused = add_draft_slots(version_id, slots)
+        for slot, message in refused:
+            print(f"Erreur/Conflit insertion auto: cours {slot[0]} (groupe {slot[2]}) - {message}")
+
+        publication = publish_version(version_id, self.admin_id) if publier else None
+        if publication and publication["success"]:
+            self._signaler_changements(publication["archived"])
+        return count, version_id, publication
+
+    def _message_version(self, version_id, publication):
+        """Complète le message de génération avec l'état de la version produite."""
+        if publication is None:
+            return f" Brouillon #{version_id} enregistré (non publié)."
+        return " " + publication["message"]
+
+    def _formater_noyau(self, result):
+        """Décrit le noyau de cours incompatibles retourné par le solveur exact."""
+        core = result.get("core") or []
+        label = "Noyau minimal" if result.get("core_minimal") else "Noyau"
+        cours = ", ".join(f"{cc.GetSubject()['name']} ({cc.GetGroups()[0]['name']}, {cc.GetProfessor()['name']})"
+                          for cc in core)
+        return f"{label} de {len(core)} cours incompatibles : {cours}"
+
+    def verifier_faisabilite(self, filiere=None, max_nodes=200000, time_limit=10.0):
+        """
+        Vérifie avec le solveur exact si un emploi du temps sans conflit existe
+        (pour toute l'université ou pour une filière).
+
+        Returns:
+            dict: {"success": bool, "status": str, "message": str, "core": list}
+        """
+        from services.feasibility import check_feasibility, FEASIBLE, INFEASIBLE
+
+        result = check_feasibility(filiere, max_nodes=max_nodes, time_limit=time_limit)
+        cible = f"la filière {filiere}" if filiere else "l'ensemble des filières"
+
+        if result["status"] == FEASIBLE:
+            message = f"Une solution sans conflit existe pour {cible} ({result['nodes']} noeuds explorés)."
+        elif result["status"] == INFEASIBLE:
+            message = f"Aucune solution possible pour {cible}. " + self._formater_noyau(result)
+        else:
+            message = f"Budget épuisé avant de conclure pour {cible} ({result['nodes']} noeuds)."
+
+        return {
+            "success": result["status"] != INFEASIBLE,
+            "status": result["status"],
+            "message": message,
+            "core": [repr(cc) for cc in (result["core"] or [])]
+        }
 
     def affecter_automatiquement(self, subject_id, group_id, day, start_hour, duration):
         conn = getConnection()
@@ -347,491 +475,91 @@ class AdminController:
             conn.close()
             return "Group not found."
 
-        # 2. Get Subject info (required equipment)
-        cursor.execute("SELECT required_equipment FROM subjects WHERE id = ?", (subject_id,))
+        # 2. Get Subject info and qualified instructors
+        cursor.execute("SELECT id FROM subjects WHERE id = ?", (subject_id,))
         subject = cursor.fetchone()
-        
-        # 3. Get all active rooms
-        cursor.execute("SELECT * FROM rooms WHERE active = 1 ORDER BY capacity ASC")
-        all_rooms = cursor.fetchall()
+        cursor.execute("SELECT instructor_id FROM subject_instructors WHERE subject_id = ? ORDER BY id", (subject_id,))
+        qualified = [row['instructor_id'] for row in cursor.fetchall()]
+        conn.close()
 
-        # 4. Search for an available room
-        assigned_room_id = None
-        room_name = None
-        for room in all_rooms:
-            # Check capacity constraint
-            if room['capacity'] < group['student_count']:
-                continue
-                
-            # Check equipment constraint
-            if subject['required_equipment']:
-                if not room['equipments'] or subject['required_equipment'] not in room['equipments']:
-                    continue
+        if not subject:
+            return "Subject not found."
+        if not qualified:
+            return "Error: No qualified instructor found for this subject."
+
+        # 3. Group and instructor availability (occupancy bitmaps)
+        matcher = RoomMatcher.get_instance()
+        if OccupancyCache.get_instance().conflict(0, group_id, 0, day, start_hour, duration):
+            return "Error: The group already has a class during this slot."
+        available = matcher.available_instructors(qualified, day, start_hour, duration)
+        if not available:
+            return "Error: No qualified instructor available for this slot."
+
+        # 4. Best-fit rooms: capacity/equipment filter, availability, ranking in one call
+        ranked = matcher.rank_rooms(group['student_count'], matcher.subject_mask(subject_id),
+                                    day, start_hour, duration)
+        for room in ranked:
+            # The insert re-checks atomically; on a concurrent write, fall back to the next room
+            if self.creer_creneau(subject_id, available[0], group_id,
+                                  room['room_id'], day, start_hour, duration):
+                return f"Success: Room {room['name']} assigned automatically."
 
-            # Check for schedule conflicts (Room availability)
-            conflict = check_conflict(0, group_id, room['id'], day, start_hour, duration)
-            
-            if not conflict:
-                assigned_room_id = room['id']
-                room_name = room['name']
-                break
-
-        if assigned_room_id:
-            # Find an available instructor
-            cursor.execute("SELECT instructor_id FROM subject_instructors WHERE subject_id = ? LIMIT 1", (subject_id,))
-            instr = cursor.fetchone()
-            
-            if instr:
-                success = self.creer_creneau(subject_id, instr['instructor_id'], group_id, 
-                                             assigned_room_id, day, start_hour, duration)
-                conn.close()
-                if success:
-                    return f"Success: Room {room_name} assigned automatically."
-            else:
-                conn.close()
-                return "Error: No qualified instructor found for this subject."
-        
-        conn.close()
         return "Error: No suitable room found for this slot."
 
-    
     # -------------------------------------------------------------------------
     # GESTION DES EXPORTS
     # -------------------------------------------------------------------------
-    def _get_filiere_pdf_elements(self, filiere_name, styles, show_title=True):
-        """Helper to generate PDF elements for a single filiere."""
-        from reportlab.lib import colors
-        from reportlab.platypus import Table, TableStyle, Paragraph, Spacer
-        from reportlab.lib.styles import ParagraphStyle
-        
-        elements = []
-        
-        # Styles
-        style_header = ParagraphStyle('Header', fontSize=12, leading=14, alignment=1)
-        style_title = ParagraphStyle('Title', fontSize=13, leading=16, alignment=1, 
-                                     spaceAfter=10, fontName='Helvetica-Bold')
-        style_nb = ParagraphStyle('NB', fontSize=9, italic=True)
-
-        if show_title:
-             elements.append(Paragraph(
-                "Université Abdelmalek Essaâdi<br/>Faculté des Sciences et Techniques - Tanger", 
-                style_header
-            ))
-             elements.append(Paragraph(f"Emploi du Temps du Semestre 6 (2025/2026)", style_title))
-        
-        elements.append(Paragraph(f"Filière : {filiere_name}", style_title))
-        elements.append(Spacer(1, 15))
-
-        time_slots = ["08h00-09h30", "09h00-10h30", "10h45-12h15", "12h30-14h00", "14h15-15h45", "16h00-17h30"]
-        data = [["JOURS"] + time_slots]
-        days_list = ["LUNDI", "MARDI", "MERCREDI", "JEUDI", "VENDREDI", "SAMEDI"]
-        DAYS_MAPPING = {"LUNDI": 1, "MARDI": 2, "MERCREDI": 3, "JEUDI": 4, "VENDREDI": 5, "SAMEDI": 6}
-        SLOT_TO_HOUR = {"08h00-09h30": 8, "09h00-10h30": 9, "10h45-12h15": 10, "12h30-14h00": 12, "14h15-15h45": 14, "16h00-17h30": 16}
-
-        conn = getConnection()
-        cursor = conn.cursor()
+    def exporter_tous_les_plannings(self, formats=None, archive=False, workers=None, vignettes=None):
+        """
+        Exporte en parallèle les grilles de toutes les filières, enseignants et groupes
+        (dossier daté ou archive zip avec manifest; les grilles inchangées ne sont pas rendues à nouveau).
+        vignettes: largeur en pixels d'une vignette PNG par grille (None = pas de vignettes).
+        """
+        result = bulk_export(formats, archive=archive, workers=workers, thumbnail_width=vignettes)
+        for error in result["errors"]:
+            print(f"  ! {error}")
+        return result["message"]
 
-        for day_name in days_list:
-            row = [day_name]
-            day_idx = DAYS_MAPPING.get(day_name, 0)
-            
-            for slot in time_slots:
-                if day_name == "VENDREDI" and slot == "14h15-15h45":
-                    start_h = 15
-                else:
-                    start_h = SLOT_TO_HOUR.get(slot, int(slot.split('h')[0]))
-                
-                cursor.execute("""
-                    SELECT s.name as subject, r.name as room, g.name as group_name
-                    FROM timetable t
-                    JOIN subjects s ON t.course_id = s.id
-                    JOIN rooms r ON t.room_id = r.id
-                    JOIN groups g ON t.group_id = g.id
-                    WHERE t.day = ? AND t.start_hour = ? AND UPPER(g.filiere) LIKE UPPER('%' || ? || '%')
-                    ORDER BY g.name
-                """, (day_idx, start_h, filiere_name))
-                
-                results = cursor.fetchall()
-                if results:
-                    cell_items = []
-                    for res in results:
-                        cell_items.append(f"{res['subject']} ({res['group_name']})\n{res['room']}")
-                    row.append("\n\n".join(cell_items))
-                else:
-                    row.append("")
-            data.append(row)
-        conn.close()
+    def generer_flux_ics(self):
+        """Met à jour les flux iCalendar de chaque groupe et enseignant (seuls les flux modifiés sont réécrits)."""
+        return generate_feeds()["message"]
 
-        if len(data) > 1:
-            table = Table(data, colWidths=[80] + [110] * len(time_slots))
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('FONTSIZE', (0, 0), (-1, -1), 8),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('BACKGROUND', (0, 1), (0, -1), colors.whitesmoke),
-            ]))
-            elements.append(table)
-
-        elements.append(Spacer(1, 15))
-        nb_text = (
-            "<b>N.B:</b> Les plannings de Travaux Pratiques seront affichés dans les départements concernés.<br/>"
-            "Le Vendredi après-midi, les cours commencent à 15h00."
-        )
-        elements.append(Paragraph(nb_text, style_nb))
-        return elements
+    def publier_site_statique(self, force=False):
+        """Met à jour le site HTML des emplois du temps (seules les pages modifiées sont réécrites)."""
+        return build_site(force=force)["message"]
 
     def exporter_planning_filiere_pdf(self, filiere_name, filename="Planning_FST.pdf"):
         """
         Génère un export PDF structuré selon le format officiel de l'Université Abdelmalek Essaâdi.
         """
         try:
-            from reportlab.lib import colors
-            from reportlab.lib.pagesizes import A4, landscape
-            from reportlab.platypus import SimpleDocTemplate, PageBreak, Spacer, Paragraph
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            import os
-            from datetime import datetime
+            path = cached_export(build_filiere_grids(filiere_name), "pdf", filename)
         except ImportError:
             return "Erreur: reportlab non installé."
-
-        # Setup paths
-        base_dir = os.getcwd()
-        exports_dir = os.path.join(base_dir, "exports")
-        if not os.path.exists(exports_dir):
-            os.makedirs(exports_dir)
-            
-        unique_filename = os.path.join(exports_dir, filename)
-
-        doc = SimpleDocTemplate(unique_filename, pagesize=landscape(A4))
-        elements = []
-        styles = getSampleStyleSheet()
-
-        conn = getConnection()
-        cursor = conn.cursor()
-        
-        # Check if "all" export
-        if filiere_name.lower() in ["all", "tout"]:
-            cursor.execute("SELECT DISTINCT filiere FROM groups WHERE filiere IS NOT NULL ORDER BY filiere")
-            filieres = [row['filiere'] for row in cursor.fetchall()]
-            conn.close()
-
-            for i, f_name in enumerate(filieres):
-                elements.extend(self._get_filiere_pdf_elements(f_name, styles))
-                if i < len(filieres) - 1:
-                    elements.append(PageBreak())
-        else:
-            conn.close()
-            elements.extend(self._get_filiere_pdf_elements(filiere_name, styles))
-
-        # Pied de page (commun)
-        gen_date = datetime.now().strftime("%d/%m/%Y %H:%M")
-        elements.append(Spacer(1, 10))
-        elements.append(Paragraph(f"Document généré le {gen_date}", 
-                                ParagraphStyle('Footer', fontSize=7, alignment=2)))
-
-        doc.build(elements)
-        return f"PDF généré avec succès : {unique_filename}"
+        return f"PDF généré avec succès : {path}"
 
     def exporter_planning_filiere_excel(self, filiere_name, filename="Planning_FST.xlsx"):
         """
-        Génère un export Excel de l'emploi du temps par filière.
+        Génère un export Excel de l'emploi du temps par filière (une feuille par filière en mode "all").
         """
+        grids = build_filiere_grids(filiere_name)
+        if not grids:
+            return "Aucune filière trouvée."
+
+        if filiere_name.lower() in ALL_FILIERES:
+            filename = "Planning_Global_FST.xlsx"
         try:
-            import openpyxl
-            from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-            from datetime import datetime
-            import os
+            path = cached_export(grids, "xlsx", filename)
         except ImportError:
             return "Erreur: openpyxl non installé"
-
-        # Générer un nom de fichier unique avec horodatage
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-
-        from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-        # Styles
-        header_font = Font(bold=True, size=14)
-        title_font = Font(bold=True, size=11)
-        center_align = Alignment(horizontal='center', vertical='center', wrap_text=True)
-        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-        day_fill = PatternFill(start_color="D9E2F3", end_color="D9E2F3", fill_type="solid")
-        thin_border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-
-        if filiere_name.lower() in ["all", "tout"]:
-            # Mode "Tous les départements"
-            base_name = "Planning_Global_FST"
-            unique_filename = f"{base_name}_{timestamp}.xlsx"
-            
-            # Setup paths
-            base_dir = os.getcwd()
-            exports_dir = os.path.join(base_dir, "exports")
-            if not os.path.exists(exports_dir):
-                os.makedirs(exports_dir)
-            
-            unique_filename = os.path.join(exports_dir, unique_filename)
-            
-            wb = openpyxl.Workbook()
-            # Remove default sheet
-            default_ws = wb.active
-            wb.remove(default_ws)
-            
-            conn = getConnection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT DISTINCT filiere FROM groups WHERE filiere IS NOT NULL ORDER BY filiere")
-            filieres = [row['filiere'] for row in cursor.fetchall()]
-            conn.close()
-            
-            if not filieres:
-                 return "Aucune filière trouvée."
-            
-            for f_name in filieres:
-                title = f"{f_name}"[:31].replace('/', '-')
-                ws = wb.create_sheet(title=title)
-                self._fill_excel_sheet(ws, f_name, header_font, title_font, center_align, header_fill, day_fill, thin_border)
-        else:
-            # Mode simple
-            base_name = filename.replace('.xlsx', '')
-            unique_filename = f"{base_name}_{timestamp}.xlsx"
-            
-            # Setup paths
-            base_dir = os.getcwd()
-            exports_dir = os.path.join(base_dir, "exports")
-            if not os.path.exists(exports_dir):
-                os.makedirs(exports_dir)
-            
-            unique_filename = os.path.join(exports_dir, unique_filename)
-
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = f"EDT {filiere_name}"[:31]
-            self._fill_excel_sheet(ws, filiere_name, header_font, title_font, center_align, header_fill, day_fill, thin_border)
-
-        wb.save(unique_filename)
-        return f"Excel généré avec succès : {unique_filename}"
-        
-    def _fill_excel_sheet(self, ws, filiere_name, header_font, title_font, center_align, header_fill, day_fill, thin_border):
-        """Helper to fill a single Excel sheet"""
-        import openpyxl
-        from openpyxl.styles import Font
-        
-        # En-tête
-        ws.merge_cells('A1:F1')
-        ws['A1'] = "Université Abdelmalek Essaâdi - FST Tanger"
-        ws['A1'].font = header_font
-        ws['A1'].alignment = center_align
-
-        ws.merge_cells('A2:F2')
-        ws['A2'] = f"Emploi du Temps - Filière: {filiere_name}"
-        ws['A2'].font = title_font
-        ws['A2'].alignment = center_align
-
-        # Créneaux horaires
-        time_slots = ["08h00-09h30", "09h00-10h30", "10h45-12h15", "12h30-14h00", "14h15-15h45", "16h00-17h30"]
-        days_list = ["LUNDI", "MARDI", "MERCREDI", "JEUDI", "VENDREDI", "SAMEDI"]
-        DAYS_MAPPING = {"LUNDI": 1, "MARDI": 2, "MERCREDI": 3, "JEUDI": 4, "VENDREDI": 5, "SAMEDI": 6}
-        SLOT_TO_HOUR = {"08h00-09h30": 8, "09h00-10h30": 9, "10h45-12h15": 10, "12h30-14h00": 12, "14h15-15h45": 14, "16h00-17h30": 16}
-
-        # En-tête du tableau (ligne 4)
-        ws.cell(row=4, column=1, value="JOURS").font = title_font
-        ws.cell(row=4, column=1).fill = header_fill
-        ws.cell(row=4, column=1).alignment = center_align
-        ws.cell(row=4, column=1).border = thin_border
-
-        for col, slot in enumerate(time_slots, start=2):
-            cell = ws.cell(row=4, column=col, value=slot)
-            cell.font = Font(bold=True, color="FFFFFF")
-            cell.fill = header_fill
-            cell.alignment = center_align
-            cell.border = thin_border
-
-        # Données
-        conn = getConnection()
-        cursor = conn.cursor()
-
-        for row_idx, day_name in enumerate(days_list, start=5):
-            day_cell = ws.cell(row=row_idx, column=1, value=day_name)
-            day_cell.font = title_font
-            day_cell.fill = day_fill
-            day_cell.alignment = center_align
-            day_cell.border = thin_border
-
-            day_idx = DAYS_MAPPING.get(day_name, 0)
-
-            for col_idx, slot in enumerate(time_slots, start=2):
-                if day_name == "VENDREDI" and slot == "14h15-15h45":
-                    start_h = 15
-                else:
-                    start_h = SLOT_TO_HOUR.get(slot, int(slot.split('h')[0]))
-
-                cursor.execute("""
-                    SELECT s.name as subject, r.name as room, g.name as group_name
-                    FROM timetable t
-                    JOIN subjects s ON t.course_id = s.id
-                    JOIN rooms r ON t.room_id = r.id
-                    JOIN groups g ON t.group_id = g.id
-                    WHERE t.day = ? AND t.start_hour = ? AND UPPER(g.filiere) LIKE UPPER('%' || ? || '%')
-                    ORDER BY g.name
-                """, (day_idx, start_h, filiere_name))
-
-                results = cursor.fetchall()
-                cell = ws.cell(row=row_idx, column=col_idx)
-                cell.border = thin_border
-                cell.alignment = center_align
-
-                if results:
-                    cell_text = "\n".join([f"{r['subject']} ({r['group_name']})\n{r['room']}" for r in results])
-                    cell.value = cell_text
-                else:
-                    cell.value = ""
-
-        conn.close()
-
-        # Ajuster les largeurs de colonnes
-        ws.column_dimensions['A'].width = 12
-        for col in range(2, len(time_slots) + 2):
-            ws.column_dimensions[openpyxl.utils.get_column_letter(col)].width = 22
-
-        # Ajuster les hauteurs de lignes
-        for row in range(5, 5 + len(days_list)):
-            ws.row_dimensions[row].height = 60
-
-        # Pied de page
-        footer_row = 5 + len(days_list) + 1
-        from datetime import datetime
-        ws.cell(row=footer_row, column=1, value=f"Généré le {datetime.now().strftime('%d/%m/%Y %H:%M')}")
+        return f"Excel généré avec succès : {path}"
 
     def exporter_planning_filiere_image(self, filiere_name, filename="Planning_FST.png"):
         """
         Génère un export Image (PNG) de l'emploi du temps par filière.
         """
         try:
-            from PIL import Image, ImageDraw, ImageFont
-            from datetime import datetime
-            import os
+            path = cached_export(build_filiere_grids(filiere_name), "png", filename)
         except ImportError:
             return "Erreur: Pillow non installé. Installez-le avec: pip install Pillow"
-
-        # Générer un nom de fichier unique avec horodatage
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        base_name = filename.replace('.png', '')
-        unique_filename = f"{base_name}_{timestamp}.png"
-        
-        # Setup paths
-        base_dir = os.getcwd()
-        exports_dir = os.path.join(base_dir, "exports")
-        if not os.path.exists(exports_dir):
-            os.makedirs(exports_dir)
-        
-        unique_filename = os.path.join(exports_dir, unique_filename)
-
-        # Configuration
-        time_slots = ["08h00-09h30", "09h00-10h30", "10h45-12h15", "12h30-14h00", "14h15-15h45", "16h00-17h30"]
-        days_list = ["LUNDI", "MARDI", "MERCREDI", "JEUDI", "VENDREDI", "SAMEDI"]
-        DAYS_MAPPING = {"LUNDI": 1, "MARDI": 2, "MERCREDI": 3, "JEUDI": 4, "VENDREDI": 5, "SAMEDI": 6}
-        SLOT_TO_HOUR = {"08h00-09h30": 8, "09h00-10h30": 9, "10h45-12h15": 10, "12h30-14h00": 12, "14h15-15h45": 14, "16h00-17h30": 16}
-
-        # Dimensions
-        cell_width = 130 # Réduit légèrement pour faire tenir plus de colonnes
-        cell_height = 80
-        header_height = 100
-        day_col_width = 100
-        
-        img_width = day_col_width + (cell_width * len(time_slots)) + 20
-        img_height = header_height + (cell_height * len(days_list)) + 60
-
-        # Créer l'image
-        img = Image.new('RGB', (img_width, img_height), color='white')
-        draw = ImageDraw.Draw(img)
-
-        # Polices (utiliser les polices par défaut)
-        try:
-            font_title = ImageFont.truetype("arial.ttf", 16)
-            font_header = ImageFont.truetype("arial.ttf", 12)
-            font_cell = ImageFont.truetype("arial.ttf", 9)
-        except:
-            font_title = ImageFont.load_default()
-            font_header = ImageFont.load_default()
-            font_cell = ImageFont.load_default()
-
-        # Couleurs
-        header_color = (68, 114, 196)
-        day_color = (217, 226, 243)
-        grid_color = (0, 0, 0)
-        text_color = (0, 0, 0)
-
-        # Titre
-        draw.text((10, 10), "Université Abdelmalek Essaâdi - FST Tanger", fill=text_color, font=font_title)
-        draw.text((10, 35), f"Emploi du Temps - Filière: {filiere_name}", fill=text_color, font=font_header)
-
-        # Position de départ du tableau
-        start_x = 10
-        start_y = header_height - 20
-
-        # En-tête des créneaux
-        draw.rectangle([start_x, start_y, start_x + day_col_width, start_y + 30], fill=header_color)
-        draw.text((start_x + 10, start_y + 8), "JOURS", fill='white', font=font_header)
-
-        for i, slot in enumerate(time_slots):
-            x = start_x + day_col_width + (i * cell_width)
-            draw.rectangle([x, start_y, x + cell_width, start_y + 30], fill=header_color)
-            draw.text((x + 10, start_y + 8), slot, fill='white', font=font_cell)
-
-        # Données
-        conn = getConnection()
-        cursor = conn.cursor()
-
-        for row_idx, day_name in enumerate(days_list):
-            y = start_y + 30 + (row_idx * cell_height)
-            
-            # Colonne jour
-            draw.rectangle([start_x, y, start_x + day_col_width, y + cell_height], fill=day_color, outline=grid_color)
-            draw.text((start_x + 10, y + 30), day_name, fill=text_color, font=font_header)
-
-            day_idx = DAYS_MAPPING.get(day_name, 0)
-
-            for col_idx, slot in enumerate(time_slots):
-                x = start_x + day_col_width + (col_idx * cell_width)
-                
-                if day_name == "VENDREDI" and slot == "14h15-15h45":
-                    start_h = 15
-                else:
-                    start_h = SLOT_TO_HOUR.get(slot, int(slot.split('h')[0]))
-
-                cursor.execute("""
-                    SELECT s.name as subject, r.name as room, g.name as group_name
-                    FROM timetable t
-                    JOIN subjects s ON t.course_id = s.id
-                    JOIN rooms r ON t.room_id = r.id
-                    JOIN groups g ON t.group_id = g.id
-                    WHERE t.day = ? AND t.start_hour = ? AND UPPER(g.filiere) LIKE UPPER('%' || ? || '%')
-                    ORDER BY g.name
-                """, (day_idx, start_h, filiere_name))
-
-                results = cursor.fetchall()
-                
-                # Dessiner la cellule
-                draw.rectangle([x, y, x + cell_width, y + cell_height], outline=grid_color)
-
-                if results:
-                    text_y = y + 5
-                    for r in results[:2]:  # Limiter à 2 entrées par cellule pour lisibilité
-                        text = f"{r['subject'][:15]}"
-                        draw.text((x + 5, text_y), text, fill=text_color, font=font_cell)
-                        text_y += 12
-                        draw.text((x + 5, text_y), f"({r['group_name']}) {r['room']}", fill=(100, 100, 100), font=font_cell)
-                        text_y += 15
-
-        conn.close()
-
-        # Pied de page
-        draw.text((10, img_height - 25), f"Généré le {datetime.now().strftime('%d/%m/%Y %H:%M')}", fill=(128, 128, 128), font=font_cell)
-
-        img.save(unique_filename)
-        return f"Image générée avec succès : {unique_filename}"
+        return f"Image générée avec succès : {path}"
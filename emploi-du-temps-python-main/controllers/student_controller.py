@@ -4,6 +4,10 @@ Contrôleur pour les fonctionnalités étudiants
 
 from datetime import datetime
 from database import getConnection
+from services.occupancy import OccupancyCache
+from services.free_slots import free_intervals
+from services.export import build_group_grid
+from services.export.cache import cached_export
 
 # Jours de la semaine
 DAYS = {1: "Lundi", 2: "Mardi", 3: "Mercredi", 4: "Jeudi", 5: "Vendredi"}
@@ -111,13 +115,16 @@ class StudentController:
             "emploi_du_temps": organized
         }
     
-    def search_free_room(self, day=None, start_hour=None, duration=2):
+    def search_free_room(self, day=None, start_hour=None, duration=2, days=None,
+                         start_date=None, end_date=None):
         """
         RECHERCHER UNE SALLE LIBRE
         Pour travaux de groupe, révisions, etc.
         
         Si jour et heure spécifiés: cherche les salles libres à ce créneau
         Si seulement jour spécifié: montre toutes les salles avec leurs disponibilités
+        Si days spécifié (ex: [1, 2, 3, 4, 5]): disponibilités par jour sur toute la période
+        Si start_date / end_date spécifiés (datetime.date): disponibilités par date ouvrée
         Si rien spécifié: liste toutes les salles
         """
         conn = getConnection()
@@ -126,25 +133,15 @@ class StudentController:
         if day and start_hour:
             # Recherche précise pour un créneau
             end_hour = start_hour + duration
-            query = """
-            SELECT r.name, r.type, r.capacity FROM rooms r
-            WHERE r.active = 1 
-            AND r.id NOT IN (
-                SELECT room_id FROM timetable 
-                WHERE day = ? 
-                AND (start_hour < ?) AND (? < start_hour + duration)
-                UNION
-                SELECT room_id FROM reservations 
-                WHERE day = ? AND status = 'APPROVED'
-                AND (start_hour < ?) AND (? < start_hour + duration)
-            )
-            ORDER BY r.name
-            """
-            
-            cursor.execute(query, (day, end_hour, start_hour, day, end_hour, start_hour))
-            rooms = cursor.fetchall()
+            cursor.execute("SELECT id, name, type, capacity FROM rooms WHERE active = 1 ORDER BY name")
+            candidates = cursor.fetchall()
             conn.close()
             
+            # Disponibilité par bitmap (cours + réservations approuvées)
+            free_ids = set(OccupancyCache.get_instance().free_rooms(
+                [room['id'] for room in candidates], day, start_hour, duration))
+            rooms = [room for room in candidates if room['id'] in free_ids]
+            
             # MODIFICATION: Retourner des noms au lieu d'IDs
             rooms_list = []
             for room in rooms:
@@ -157,51 +154,47 @@ class StudentController:
             
             return {"success": True, "rooms": rooms_list}
         
-        elif day:
-            # Voir les disponibilités sur toute la journée
+        elif day or days or start_date:
+            # Disponibilités sur toute la journée (ou sur plusieurs jours, ou une période):
+            # une seule requête + un balayage pour toutes les salles
             cursor.execute("SELECT * FROM rooms WHERE active = 1 ORDER BY name")
             all_rooms = cursor.fetchall()
+            conn.close()
+            
+            room_ids = [room['id'] for room in all_rooms]
+            if start_date:
+                free = free_intervals(room_ids=room_ids, start_date=start_date, end_date=end_date)
+                dates = sorted({date for _, date in free})
+                return {"success": True, "rooms": [{
+                    'nom': room['name'],
+                    'type': room['type'],
+                    'capacité': room['capacity'],
+                    'creneaux_libres_par_date': {
+                        f"{DAYS[date.isoweekday()]} {date:%d/%m/%Y}":
+                            [f"{start}h-{end}h" for start, end in free[(room['id'], date)]]
+                        for date in dates
+                    }
+                } for room in all_rooms]}
+            
+            requested_days = list(days) if days else [day]
+            free = free_intervals(requested_days, room_ids)
             
             rooms_with_schedule = []
             for room in all_rooms:
-                # Récupérer les créneaux occupés
-                cursor.execute("""
-                    SELECT start_hour, duration 
-                    FROM timetable 
-                    WHERE room_id = ? AND day = ?
-                    UNION
-                    SELECT start_hour, duration 
-                    FROM reservations 
-                    WHERE room_id = ? AND day = ? AND status = 'APPROVED'
-                    ORDER BY start_hour
-                """, (room['id'], day, room['id'], day))
-                
-                occupied = cursor.fetchall()
-                
-                # Calculer les créneaux libres (8h-18h)
-                free_slots = []
-                current = 8  # Début de journée
-                
-                for slot in occupied:
-                    slot_start = slot['start_hour']
-                    slot_end = slot_start + slot['duration']
-                    
-                    if current < slot_start:
-                        free_slots.append(f"{current}h-{slot_start}h")
-                    
-                    current = max(current, slot_end)
-                
-                if current < 18:
-                    free_slots.append(f"{current}h-18h")
-                
-                rooms_with_schedule.append({
+                room_info = {
                     'nom': room['name'],
                     'type': room['type'],
-                    'capacité': room['capacity'],
-                    'creneaux_libres': free_slots
-                })
+                    'capacité': room['capacity']
+                }
+                if days:
+                    room_info['creneaux_libres_par_jour'] = {
+                        DAYS.get(d, str(d)): [f"{start}h-{end}h" for start, end in free[(room['id'], d)]]
+                        for d in sorted(set(requested_days))
+                    }
+                else:
+                    room_info['creneaux_libres'] = [f"{start}h-{end}h" for start, end in free[(room['id'], day)]]
+                rooms_with_schedule.append(room_info)
             
-            conn.close()
             return {"success": True, "rooms": rooms_with_schedule}
         
         else:
@@ -277,285 +270,24 @@ class StudentController:
     
     def export_my_timetable_pdf(self, filename="Mon_Emploi_du_Temps.pdf"):
         """Export student timetable to PDF"""
-        try:
-            from reportlab.lib import colors
-            from reportlab.lib.pagesizes import A4, landscape
-            from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            import os
-        except ImportError:
-            return "Erreur: reportlab non installé."
-
-        # Setup paths
-        base_dir = os.getcwd()
-        exports_dir = os.path.join(base_dir, "exports")
-        if not os.path.exists(exports_dir):
-            os.makedirs(exports_dir)
-        unique_filename = os.path.join(exports_dir, filename)
-
-        doc = SimpleDocTemplate(unique_filename, pagesize=landscape(A4))
-        elements = []
-        styles = getSampleStyleSheet()
-
-        # Styles
-        style_header = ParagraphStyle('Header', fontSize=12, leading=14, alignment=1)
-        style_title = ParagraphStyle('Title', fontSize=16, leading=20, alignment=1, spaceAfter=20, fontName='Helvetica-Bold')
-
-        # Header
-        elements.append(Paragraph("<b>UNIVERSITÉ ABDELMALEK ESSAADI - FST TANGER</b>", style_header))
-        elements.append(Spacer(1, 20))
-        
-        # Get Group Name
-        conn = getConnection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM groups WHERE id = ?", (self.group_id,))
-        res = cursor.fetchone()
-        group_name = res['name'] if res else "Groupe Inconnu"
-        
-        elements.append(Paragraph(f"Mon Emploi du Temps - Étudiant ({group_name})", style_title))
-
-        # Data Matrix
-        time_slots = ["08h00-09h30", "09h00-10h30", "10h45-12h15", "12h30-14h00", "14h15-15h45", "16h00-17h30"]
-        data = [["JOURS"] + time_slots]
-        days_list = ["LUNDI", "MARDI", "MERCREDI", "JEUDI", "VENDREDI", "SAMEDI"]
-        DAYS_MAPPING = {"LUNDI": 1, "MARDI": 2, "MERCREDI": 3, "JEUDI": 4, "VENDREDI": 5, "SAMEDI": 6}
-        SLOT_TO_HOUR = {"08h00-09h30": 8, "09h00-10h30": 9, "10h45-12h15": 10, "12h30-14h00": 12, "14h15-15h45": 14, "16h00-17h30": 16}
-
-        for day_name in days_list:
-            row = [day_name]
-            day_idx = DAYS_MAPPING.get(day_name)
-            
-            for slot in time_slots:
-                if day_name == "VENDREDI" and slot == "14h15-15h45":
-                    start_h = 15
-                else:
-                    start_h = SLOT_TO_HOUR.get(slot, int(slot.split('h')[0]))
-                
-                cursor.execute("""
-                    SELECT s.name as subject, r.name as room, i.name as instructor
-                    FROM timetable t
-                    JOIN subjects s ON t.course_id = s.id
-                    JOIN rooms r ON t.room_id = r.id
-                    JOIN instructors i ON t.instructor_id = i.id
-                    WHERE t.group_id = ? AND t.day = ? AND t.start_hour = ?
-                """, (self.group_id, day_idx, start_h))
-                
-                results = cursor.fetchall()
-                if results:
-                    cell_text = "\n".join([f"{r['subject']}\n{r['room']}\n({r['instructor']})" for r in results])
-                    row.append(cell_text)
-                else:
-                    row.append("")
-            data.append(row)
-        
-        conn.close()
-
-        # Table Style
-        table = Table(data, colWidths=[80] + [110] * len(time_slots))
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('BACKGROUND', (0, 1), (0, -1), colors.whitesmoke),
-        ]))
-        elements.append(table)
-        
-        doc.build(elements)
-        return f"PDF exporté vers: {unique_filename}"
+        return self._export(filename, "pdf", "PDF exporté vers", "Erreur: reportlab non installé.")
 
     def export_my_timetable_excel(self, filename="Mon_Emploi_du_Temps.xlsx"):
         """Export student timetable to Excel"""
-        try:
-            import openpyxl
-            from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-            import os
-        except ImportError:
-            return "Erreur: openpyxl non installé"
-            
-        # Setup paths
-        base_dir = os.getcwd()
-        exports_dir = os.path.join(base_dir, "exports")
-        if not os.path.exists(exports_dir):
-            os.makedirs(exports_dir)
-        unique_filename = os.path.join(exports_dir, filename)
-        
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Mon Emploi du Temps"
-        
-        # Styles
-        header_font = Font(bold=True, size=12)
-        center_align = Alignment(horizontal='center', vertical='center', wrap_text=True)
-        thin_border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
-        fill_header = PatternFill(start_color="DDDDDD", end_color="DDDDDD", fill_type="solid")
-        
-        # Headers
-        time_slots = ["08h00-09h30", "09h00-10h30", "10h45-12h15", "12h30-14h00", "14h15-15h45", "16h00-17h30"]
-        ws.append(["JOURS"] + time_slots)
-        
-        for cell in ws[1]:
-            cell.font = header_font
-            cell.fill = fill_header
-            cell.alignment = center_align
-            cell.border = thin_border
-            
-        # Data
-        days_list = ["LUNDI", "MARDI", "MERCREDI", "JEUDI", "VENDREDI", "SAMEDI"]
-        DAYS_MAPPING = {"LUNDI": 1, "MARDI": 2, "MERCREDI": 3, "JEUDI": 4, "VENDREDI": 5, "SAMEDI": 6}
-        SLOT_TO_HOUR = {"08h00-09h30": 8, "09h00-10h30": 9, "10h45-12h15": 10, "12h30-14h00": 12, "14h15-15h45": 14, "16h00-17h30": 16}
-        
-        conn = getConnection()
-        cursor = conn.cursor()
-        
-        for day_name in days_list:
-            row_data = [day_name]
-            day_idx = DAYS_MAPPING.get(day_name)
-            
-            for slot in time_slots:
-                if day_name == "VENDREDI" and slot == "14h15-15h45":
-                    start_h = 15
-                else:
-                    start_h = SLOT_TO_HOUR.get(slot, int(slot.split('h')[0]))
-                
-                cursor.execute("""
-                    SELECT s.name as subject, r.name as room, i.name as instructor
-                    FROM timetable t
-                    JOIN subjects s ON t.course_id = s.id
-                    JOIN rooms r ON t.room_id = r.id
-                    JOIN instructors i ON t.instructor_id = i.id
-                    WHERE t.group_id = ? AND t.day = ? AND t.start_hour = ?
-                """, (self.group_id, day_idx, start_h))
-                
-                results = cursor.fetchall()
-                if results:
-                    text = "\n".join([f"{r['subject']}\n{r['room']}\n{r['instructor']}" for r in results])
-                    row_data.append(text)
-                else:
-                    row_data.append("")
-            
-            ws.append(row_data)
-        
-        conn.close()
-        
-        # Formatting rows
-        for row in ws.iter_rows(min_row=2, max_row=len(days_list)+1):
-            for cell in row:
-                cell.alignment = center_align
-                cell.border = thin_border
-        
-        # Dimensions
-        ws.column_dimensions['A'].width = 15
-        for col in range(2, 7):
-             ws.column_dimensions[openpyxl.utils.get_column_letter(col)].width = 25
-             
-        wb.save(unique_filename)
-        return f"Excel exporté vers: {unique_filename}"
+        return self._export(filename, "xlsx", "Excel exporté vers", "Erreur: openpyxl non installé")
 
     def export_my_timetable_image(self, filename="Mon_Emploi_du_Temps.png"):
         """Export student timetable to Image (PNG)"""
+        return self._export(filename, "png", "Image exportée vers", "Erreur: Pillow non installé")
+
+    def export_my_timetable_ics(self, filename="Mon_Emploi_du_Temps.ics"):
+        """Export student timetable to iCalendar (weekly recurring events for the semester)"""
+        return self._export(filename, "ics", "Calendrier exporté vers")
+
+    def _export(self, filename, fmt, success, missing_library=None):
+        """Rend la grille du groupe dans un format et renvoie le message affiché."""
         try:
-            from PIL import Image, ImageDraw, ImageFont
-            import os
+            path = cached_export([build_group_grid(self.group_id)], fmt, filename)
         except ImportError:
-            return "Erreur: Pillow non installé"
-            
-        # Setup paths
-        base_dir = os.getcwd()
-        exports_dir = os.path.join(base_dir, "exports")
-        if not os.path.exists(exports_dir):
-            os.makedirs(exports_dir)
-        unique_filename = os.path.join(exports_dir, filename)
-        
-        # Config
-        time_slots = ["08h00-09h30", "09h00-10h30", "10h45-12h15", "12h30-14h00", "14h15-15h45", "16h00-17h30"]
-        days_list = ["LUNDI", "MARDI", "MERCREDI", "JEUDI", "VENDREDI", "SAMEDI"]
-        DAYS_MAPPING = {"LUNDI": 1, "MARDI": 2, "MERCREDI": 3, "JEUDI": 4, "VENDREDI": 5, "SAMEDI": 6}
-        SLOT_TO_HOUR = {"08h00-09h30": 8, "09h00-10h30": 9, "10h45-12h15": 10, "12h30-14h00": 12, "14h15-15h45": 14, "16h00-17h30": 16}
-        
-        cell_width = 140 # Slightly reduced
-        cell_height = 90
-        header_height = 80
-        col_header_height = 40
-        day_col_width = 100
-        
-        img_width = day_col_width + (len(time_slots) * cell_width) + 20
-        img_height = header_height + col_header_height + (len(days_list) * cell_height) + 20
-        
-        img = Image.new('RGB', (img_width, img_height), color='white')
-        draw = ImageDraw.Draw(img)
-        
-        # Fonts
-        try:
-            font_title = ImageFont.truetype("arial.ttf", 20)
-            font_header = ImageFont.truetype("arial.ttf", 12)
-            font_cell = ImageFont.truetype("arial.ttf", 10)
-        except:
-            font_title = ImageFont.load_default()
-            font_header = ImageFont.load_default()
-            font_cell = ImageFont.load_default()
-            
-        # Title
-        draw.text((20, 20), "Mon Emploi du Temps - FST Tanger", fill='black', font=font_title)
-        
-        start_x = 10
-        start_y = header_height
-        
-        # Header Row
-        draw.rectangle([start_x, start_y, start_x + day_col_width, start_y + col_header_height], fill='#4472C4', outline='black')
-        draw.text((start_x + 10, start_y + 10), "JOURS", fill='white', font=font_header)
-        
-        for i, slot in enumerate(time_slots):
-            x = start_x + day_col_width + (i * cell_width)
-            draw.rectangle([x, start_y, x + cell_width, start_y + col_header_height], fill='#4472C4', outline='black')
-            draw.text((x + 10, start_y + 10), slot, fill='white', font=font_header)
-            
-        # Data Rows
-        conn = getConnection()
-        cursor = conn.cursor()
-        
-        for row_idx, day_name in enumerate(days_list):
-            y = start_y + col_header_height + (row_idx * cell_height)
-            
-            # Day Column
-            draw.rectangle([start_x, y, start_x + day_col_width, y + cell_height], fill='#D9E2F3', outline='black')
-            draw.text((start_x + 10, y + 35), day_name, fill='black', font=font_header)
-            
-            day_idx = DAYS_MAPPING.get(day_name)
-            
-            for col_idx, slot in enumerate(time_slots):
-                x = start_x + day_col_width + (col_idx * cell_width)
-                
-                if day_name == "VENDREDI" and slot == "14h15-15h45":
-                    start_h = 15
-                else:
-                    start_h = SLOT_TO_HOUR.get(slot, int(slot.split('h')[0]))
-                    
-                cursor.execute("""
-                    SELECT s.name as subject, r.name as room, i.name as instructor
-                    FROM timetable t
-                    JOIN subjects s ON t.course_id = s.id
-                    JOIN rooms r ON t.room_id = r.id
-                    JOIN instructors i ON t.instructor_id = i.id
-                    WHERE t.group_id = ? AND t.day = ? AND t.start_hour = ?
-                """, (self.group_id, day_idx, start_h))
-                
-                results = cursor.fetchall()
-                draw.rectangle([x, y, x + cell_width, y + cell_height], outline='black')
-                
-                if results:
-                    text_lines = []
-                    for r in results:
-                        text_lines.append(f"{r['subject']}")
-                        text_lines.append(f"{r['room']} - {r['instructor']}")
-                    
-                    text_y = y + 10
-                    for line in text_lines:
-                        draw.text((x + 5, text_y), line, fill='black', font=font_cell)
-                        text_y += 15
-        
-        conn.close()
-        img.save(unique_filename)
-        return f"Image exportée vers: {unique_filename}"
\ No newline at end of file
+            return missing_library
+        return f"{success}: {path}"
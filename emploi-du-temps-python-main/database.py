@@ -8,6 +8,20 @@ DB_NAME = 'university_schedule.db'
 # Constante pour les jours de la semaine (pour l'affichage)
 DAYS = {1: "Lundi", 2: "Mardi", 3: "Mercredi", 4: "Jeudi", 5: "Vendredi"}
 
+# Messages levés par les triggers anti-conflits de la table timetable (RAISE(ABORT, ...)).
+# Format "CONFLIT:<type>" pour pouvoir être décodé par decode_conflict_error().
+CONFLICT_PREFIX = "CONFLIT:"
+CONFLICT_ROOM = "Salle"
+CONFLICT_INSTRUCTOR = "Enseignant"
+CONFLICT_GROUP = "Groupe"
+CONFLICT_UNAVAILABLE = "Indisponibilite"
+
+# Masque hebdomadaire des indisponibilités (colonne instructors.unavailable_mask):
+# bit (jour - 1) * UNAVAILABILITY_HOURS_PER_DAY + (heure - UNAVAILABILITY_FIRST_HOUR),
+# soit 5 jours x 12 heures (8h-20h) = 60 bits, dans un entier SQLite de 64 bits
+UNAVAILABILITY_FIRST_HOUR = 8
+UNAVAILABILITY_HOURS_PER_DAY = 12
+
 # --- 1. FONCTIONS DE BASE ET SETUP ---
 
 def setup():
@@ -38,6 +52,7 @@ def setup():
             name TEXT NOT NULL, 
             speciality TEXT,
             unavailable_slots TEXT, 
+            unavailable_mask INTEGER NOT NULL DEFAULT 0,
             active BOOLEAN NOT NULL DEFAULT 1 CHECK (active IN (0, 1)),
             created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
             updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
@@ -185,6 +200,108 @@ def setup():
         );
     """)
 
+    # ------------------ VERSIONS DE L'EMPLOI DU TEMPS ------------------
+    # La table timetable contient toujours la version publiée (lue par tous les écrans);
+    # les brouillons et les versions archivées vivent dans timetable_drafts
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS timetable_versions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            label TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'DRAFT' CHECK (status IN ('DRAFT', 'PUBLISHED', 'ARCHIVED', 'RESTORING')),
+            created_by INTEGER,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            published_at DATETIME,
+            replaces INTEGER,
+            FOREIGN KEY(created_by) REFERENCES users(id),
+            FOREIGN KEY(replaces) REFERENCES timetable_versions(id) ON DELETE SET NULL
+        );
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS timetable_drafts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            version_id INTEGER NOT NULL,
+            course_id INTEGER NOT NULL,
+            instructor_id INTEGER NOT NULL,
+            group_id INTEGER NOT NULL,
+            room_id INTEGER NOT NULL,
+            day INTEGER NOT NULL,
+            start_hour INTEGER NOT NULL,
+            duration INTEGER NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            created_by INTEGER,
+            FOREIGN KEY(version_id) REFERENCES timetable_versions(id) ON DELETE CASCADE,
+            FOREIGN KEY(course_id) REFERENCES subjects(id),
+            FOREIGN KEY(instructor_id) REFERENCES instructors(id),
+            FOREIGN KEY(group_id) REFERENCES groups(id),
+            FOREIGN KEY(room_id) REFERENCES rooms(id),
+            FOREIGN KEY(created_by) REFERENCES users(id)
+        );
+    """)
+
+    # ------------------ GRILLE HEBDOMADAIRE MATÉRIALISÉE (EXPORTS) ------------------
+    # Copie dénormalisée de timetable avec les libellés déjà joints, maintenue par
+    # triggers (voir create_grid_triggers): une grille complète = une lecture d'index
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS timetable_grid (
+            timetable_id INTEGER PRIMARY KEY,
+            filiere TEXT,
+            filiere_key TEXT,
+            group_id INTEGER NOT NULL,
+            group_name TEXT,
+            instructor_id INTEGER NOT NULL,
+            instructor_name TEXT,
+            course_id INTEGER NOT NULL,
+            subject_name TEXT,
+            room_id INTEGER NOT NULL,
+            room_name TEXT,
+            day INTEGER NOT NULL,
+            start_hour INTEGER NOT NULL,
+            duration INTEGER NOT NULL
+        );
+    """)
+
+    # ------------------ ÉQUIPEMENTS (NORMALISÉS) ------------------
+    # Chaque équipement correspond au bit (id - 1) des masques utilisés par les moteurs de recherche
+    # (entiers SQLite sur 64 bits: au plus 63 équipements distincts)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS equipments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE COLLATE NOCASE
+        );
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS room_equipments (
+            room_id INTEGER NOT NULL,
+            equipment_id INTEGER NOT NULL,
+            PRIMARY KEY(room_id, equipment_id),
+            FOREIGN KEY(room_id) REFERENCES rooms(id),
+            FOREIGN KEY(equipment_id) REFERENCES equipments(id)
+        );
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS subject_equipments (
+            subject_id INTEGER NOT NULL,
+            equipment_id INTEGER NOT NULL,
+            PRIMARY KEY(subject_id, equipment_id),
+            FOREIGN KEY(subject_id) REFERENCES subjects(id),
+            FOREIGN KEY(equipment_id) REFERENCES equipments(id)
+        );
+    """)
+
+    # ------------------ PROFILS DE PARAMÈTRES DE L'ALGORITHME GÉNÉTIQUE ------------------
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ga_profiles (
+            name TEXT PRIMARY KEY,
+            params TEXT NOT NULL,
+            score REAL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+
     # ------------------ TRIGGERS POUR updated_at ------------------
     cursor.execute("""
         CREATE TRIGGER IF NOT EXISTS update_users_timestamp 
@@ -258,6 +375,26 @@ def setup():
         END;
     """)
 
+    # ------------------ INDEX ET TRIGGERS ANTI-CONFLITS ------------------
+    create_conflict_triggers(cursor)
+
+    # ------------------ GRILLE MATÉRIALISÉE (TRIGGERS + RATTRAPAGE) ------------------
+    create_grid_triggers(cursor)
+    cursor.execute("SELECT (SELECT COUNT(*) FROM timetable) != (SELECT COUNT(*) FROM timetable_grid)")
+    if cursor.fetchone()[0]:
+        rebuild_timetable_grid(cursor)
+        conn.commit()
+
+    # ------------------ MIGRATION DES INDISPONIBILITÉS (MASQUE) ------------------
+    cursor.execute("PRAGMA table_info(instructors)")
+    if "unavailable_mask" not in [col[1] for col in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE instructors ADD COLUMN unavailable_mask INTEGER NOT NULL DEFAULT 0")
+        rebuild_unavailable_masks(cursor)
+        conn.commit()
+
+    # ------------------ MIGRATION DES ÉQUIPEMENTS (CSV -> TABLES) ------------------
+    sync_equipments(cursor)
+    conn.commit()
 
     # ------------------ ADMIN PAR DÉFAUT ------------------
     cursor.execute("SELECT count(*) FROM users WHERE role='admin'")
@@ -273,6 +410,298 @@ def setup():
     conn.close()
     print("Base de données initialisée avec succès (avec timestamps).")
 
+def _conflict_checks(exclude_self, table="timetable"):
+    """Corps SQL commun aux triggers INSERT/UPDATE: une vérification par type de conflit."""
+    # En UPDATE, la ligne modifiée ne doit pas entrer en conflit avec elle-même
+    other = " AND id != NEW.id" if exclude_self else ""
+    if table != "timetable":
+        # Tables versionnées: les conflits ne concernent que la même version
+        other += " AND version_id = NEW.version_id"
+    overlap = "start_hour < NEW.start_hour + NEW.duration AND NEW.start_hour < start_hour + duration"
+    checks = []
+    for conflict_type, column in ((CONFLICT_ROOM, "room_id"),
+                                  (CONFLICT_INSTRUCTOR, "instructor_id"),
+                                  (CONFLICT_GROUP, "group_id")):
+        checks.append(f"""
+            SELECT RAISE(ABORT, '{CONFLICT_PREFIX}{conflict_type}')
+            WHERE EXISTS (SELECT 1 FROM {table}
+                          WHERE day = NEW.day AND {column} = NEW.{column}
+                          AND {overlap}{other});""")
+    checks.append(f"""
+            SELECT RAISE(ABORT, '{CONFLICT_PREFIX}{CONFLICT_UNAVAILABLE}')
+            WHERE EXISTS (SELECT 1 FROM teacher_unavailability
+                          WHERE instructor_id = NEW.instructor_id AND day = NEW.day
+                          AND {overlap});""")
+    return "".join(checks)
+
+def create_conflict_triggers(cursor):
+    """
+    Crée les index et les triggers qui refusent tout créneau en conflit (salle,
+    enseignant, groupe, indisponibilité). La vérification et l'écriture se font
+    dans la même instruction INSERT/UPDATE, donc de façon atomique même si
+    plusieurs sessions écrivent dans la base.
+    """
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_timetable_room ON timetable(day, room_id, start_hour)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_timetable_instructor ON timetable(day, instructor_id, start_hour)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_timetable_group ON timetable(day, group_id, start_hour)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_unavailability_instructor ON teacher_unavailability(instructor_id, day, start_hour)")
+
+    # Recréés à chaque setup() pour que les bases existantes reçoivent la dernière définition.
+    # Pendant la restauration d'une version archivée (statut RESTORING, le temps d'une
+    # transaction), la copie fidèle de l'ancien état n'est pas revérifiée.
+    for name in ("timetable_conflict_insert", "timetable_conflict_update",
+                 "timetable_drafts_conflict_insert", "timetable_drafts_conflict_update"):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+    restoring = "NOT EXISTS (SELECT 1 FROM timetable_versions WHERE status = 'RESTORING')"
+
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS timetable_conflict_insert
+        BEFORE INSERT ON timetable
+        FOR EACH ROW
+        WHEN {restoring}
+        BEGIN{_conflict_checks(exclude_self=False)}
+        END;
+    """)
+
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS timetable_conflict_update
+        BEFORE UPDATE OF day, start_hour, duration, room_id, instructor_id, group_id ON timetable
+        FOR EACH ROW
+        WHEN {restoring}
+        BEGIN{_conflict_checks(exclude_self=True)}
+        END;
+    """)
+
+    # Brouillons: mêmes règles à l'intérieur d'une version en cours d'édition
+    # (les versions archivées sont des copies fidèles et ne sont pas vérifiées)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_drafts_room ON timetable_drafts(version_id, day, room_id, start_hour)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_drafts_instructor ON timetable_drafts(version_id, day, instructor_id, start_hour)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_drafts_group ON timetable_drafts(version_id, day, group_id, start_hour)")
+
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS timetable_drafts_conflict_insert
+        BEFORE INSERT ON timetable_drafts
+        FOR EACH ROW
+        WHEN (SELECT status FROM timetable_versions WHERE id = NEW.version_id) = 'DRAFT'
+        BEGIN{_conflict_checks(exclude_self=False, table="timetable_drafts")}
+        END;
+    """)
+
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS timetable_drafts_conflict_update
+        BEFORE UPDATE OF day, start_hour, duration, room_id, instructor_id, group_id ON timetable_drafts
+        FOR EACH ROW
+        WHEN (SELECT status FROM timetable_versions WHERE id = NEW.version_id) = 'DRAFT'
+        BEGIN{_conflict_checks(exclude_self=True, table="timetable_drafts")}
+        END;
+    """)
+
+# Colonnes de la grille matérialisée (une ligne par créneau publié)
+GRID_COLUMNS = ("timetable_id, filiere, filiere_key, group_id, group_name, instructor_id, instructor_name, "
+                "course_id, subject_name, room_id, room_name, day, start_hour, duration")
+
+# Ligne de grille d'un créneau NEW (corps des triggers)
+_GRID_NEW_ROW_SQL = """
+            SELECT NEW.id, g.filiere, UPPER(g.filiere), NEW.group_id, g.name, NEW.instructor_id, i.name,
+                   NEW.course_id, s.name, NEW.room_id, r.name, NEW.day, NEW.start_hour, NEW.duration
+            FROM (SELECT 1)
+            LEFT JOIN groups g ON g.id = NEW.group_id
+            LEFT JOIN instructors i ON i.id = NEW.instructor_id
+            LEFT JOIN subjects s ON s.id = NEW.course_id
+            LEFT JOIN rooms r ON r.id = NEW.room_id"""
+
+def create_grid_triggers(cursor):
+    """
+    Index et triggers maintenant timetable_grid: chaque écriture dans timetable
+    (ajout, modification, suppression, publication d'une version) et chaque
+    renommage d'une matière, salle, enseignant ou groupe est répercuté dans la
+    même transaction.
+    """
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_grid_filiere ON timetable_grid(filiere_key, day, start_hour, group_name)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_grid_group ON timetable_grid(group_id, day, start_hour)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_grid_instructor ON timetable_grid(instructor_id, day, start_hour)")
+
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS timetable_grid_insert
+        AFTER INSERT ON timetable
+        FOR EACH ROW
+        BEGIN
+            INSERT OR REPLACE INTO timetable_grid ({GRID_COLUMNS}){_GRID_NEW_ROW_SQL};
+        END;
+    """)
+
+    # Limité aux colonnes affichées: la mise à jour de updated_at ne touche pas la grille
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS timetable_grid_update
+        AFTER UPDATE OF course_id, instructor_id, group_id, room_id, day, start_hour, duration ON timetable
+        FOR EACH ROW
+        BEGIN
+            DELETE FROM timetable_grid WHERE timetable_id = OLD.id;
+            INSERT OR REPLACE INTO timetable_grid ({GRID_COLUMNS}){_GRID_NEW_ROW_SQL};
+        END;
+    """)
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS timetable_grid_delete
+        AFTER DELETE ON timetable
+        FOR EACH ROW
+        BEGIN
+            DELETE FROM timetable_grid WHERE timetable_id = OLD.id;
+        END;
+    """)
+
+    # Libellés pré-joints: suivre les renommages
+    for table, key, assignments in (
+        ("subjects", "course_id", "subject_name = NEW.name"),
+        ("rooms", "room_id", "room_name = NEW.name"),
+        ("instructors", "instructor_id", "instructor_name = NEW.name"),
+        ("groups", "group_id", "group_name = NEW.name, filiere = NEW.filiere, filiere_key = UPPER(NEW.filiere)"),
+    ):
+        columns = "name, filiere" if table == "groups" else "name"
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_grid_labels
+            AFTER UPDATE OF {columns} ON {table}
+            FOR EACH ROW
+            BEGIN
+                UPDATE timetable_grid SET {assignments} WHERE {key} = NEW.id;
+            END;
+        """)
+
+def rebuild_timetable_grid(cursor):
+    """Reconstruit entièrement timetable_grid à partir de timetable (migration, réparation)."""
+    cursor.execute("DELETE FROM timetable_grid")
+    cursor.execute(f"""
+        INSERT INTO timetable_grid ({GRID_COLUMNS})
+        SELECT t.id, g.filiere, UPPER(g.filiere), t.group_id, g.name, t.instructor_id, i.name,
+               t.course_id, s.name, t.room_id, r.name, t.day, t.start_hour, t.duration
+        FROM timetable t
+        LEFT JOIN groups g ON g.id = t.group_id
+        LEFT JOIN instructors i ON i.id = t.instructor_id
+        LEFT JOIN subjects s ON s.id = t.course_id
+        LEFT JOIN rooms r ON r.id = t.room_id
+    """)
+
+def decode_conflict_error(error):
+    """
+    Décode une erreur levée par les triggers anti-conflits.
+
+    Returns:
+        str or None: CONFLICT_ROOM, CONFLICT_INSTRUCTOR, CONFLICT_GROUP, CONFLICT_UNAVAILABLE,
+                     ou None s'il ne s'agit pas d'un conflit d'emploi du temps
+    """
+    message = str(error)
+    if message.startswith(CONFLICT_PREFIX):
+        return message[len(CONFLICT_PREFIX):]
+    return None
+
+def conflict_message(conflict_type, instructor_id, group_id, room_id):
+    """Message lisible (même formulation que check_conflict) pour un type de conflit décodé."""
+    if conflict_type == CONFLICT_UNAVAILABLE:
+        return "L'enseignant est marqué comme indisponible sur cette plage horaire."
+    entity_id = {CONFLICT_ROOM: room_id, CONFLICT_INSTRUCTOR: instructor_id,
+                 CONFLICT_GROUP: group_id}.get(conflict_type)
+    return f"Conflit d'horaire existant pour l'entité : {conflict_type} (ID: {entity_id})."
+
+def unavailability_mask(day, start_hour, duration):
+    """Bits de la plage [start_hour, start_hour + duration) du jour `day` (1 = Lundi) dans unavailable_mask."""
+    if not 1 <= day <= len(DAYS):
+        return 0
+    start = max(start_hour, UNAVAILABILITY_FIRST_HOUR) - UNAVAILABILITY_FIRST_HOUR
+    end = min(start_hour + duration - UNAVAILABILITY_FIRST_HOUR, UNAVAILABILITY_HOURS_PER_DAY)
+    if end <= start:
+        return 0
+    return ((1 << (end - start)) - 1) << ((day - 1) * UNAVAILABILITY_HOURS_PER_DAY + start)
+
+def add_unavailability(cursor, instructor_id, day, start_hour, duration, reason=""):
+    """
+    Enregistre une indisponibilité et met à jour le masque de l'enseignant par un OU binaire,
+    dans la transaction du curseur (le commit est laissé à l'appelant).
+    """
+    cursor.execute("""
+        INSERT INTO teacher_unavailability (instructor_id, day, start_hour, duration, reason)
+        VALUES (?, ?, ?, ?, ?)
+    """, (instructor_id, day, start_hour, duration, reason))
+    slot = f"{DAYS.get(day, f'Jour{day}')}_{start_hour:02d}-{start_hour + duration:02d}"
+    cursor.execute("""
+        UPDATE instructors
+        SET unavailable_mask = unavailable_mask | ?,
+            unavailable_slots = CASE WHEN COALESCE(unavailable_slots, '') = '' THEN ?
+                                     ELSE unavailable_slots || ',' || ? END
+        WHERE id = ?
+    """, (unavailability_mask(day, start_hour, duration), slot, slot, instructor_id))
+
+def rebuild_unavailable_masks(cursor):
+    """Recalcule tous les masques depuis teacher_unavailability (migration / réparation)."""
+    masks = {}
+    cursor.execute("SELECT instructor_id, day, start_hour, duration FROM teacher_unavailability")
+    for row in cursor.fetchall():
+        masks[row[0]] = masks.get(row[0], 0) | unavailability_mask(row[1], row[2], row[3])
+    cursor.execute("UPDATE instructors SET unavailable_mask = 0")
+    cursor.executemany("UPDATE instructors SET unavailable_mask = ? WHERE id = ?",
+                       [(mask, iid) for iid, mask in masks.items()])
+
+def parse_equipment_list(value):
+    """Équipements au format CSV ("PC, Projecteur") -> liste de noms sans doublons ni espaces."""
+    names = []
+    for item in (value or "").split(","):
+        name = item.strip()
+        if name and name.upper() not in (n.upper() for n in names):
+            names.append(name)
+    return names
+
+def equipment_ids(cursor, value):
+    """Identifiants des équipements d'une liste CSV (créés s'ils n'existent pas encore)."""
+    ids = []
+    for name in parse_equipment_list(value):
+        # Pas d'INSERT OR IGNORE: il consommerait des identifiants, donc des bits de masque
+        cursor.execute("SELECT id FROM equipments WHERE name = ?", (name,))
+        row = cursor.fetchone()
+        if row is None:
+            cursor.execute("INSERT INTO equipments (name) VALUES (?)", (name,))
+            ids.append(cursor.lastrowid)
+        else:
+            ids.append(row[0])
+    return ids
+
+def set_room_equipments(cursor, room_id, equipments):
+    """Remplace les équipements normalisés d'une salle à partir de sa colonne CSV."""
+    cursor.execute("DELETE FROM room_equipments WHERE room_id = ?", (room_id,))
+    cursor.executemany("INSERT OR IGNORE INTO room_equipments (room_id, equipment_id) VALUES (?, ?)",
+                       [(room_id, eq_id) for eq_id in equipment_ids(cursor, equipments)])
+
+def set_subject_equipments(cursor, subject_id, required_equipment):
+    """Remplace les équipements requis normalisés d'une matière à partir de sa colonne CSV."""
+    cursor.execute("DELETE FROM subject_equipments WHERE subject_id = ?", (subject_id,))
+    cursor.executemany("INSERT OR IGNORE INTO subject_equipments (subject_id, equipment_id) VALUES (?, ?)",
+                       [(subject_id, eq_id) for eq_id in equipment_ids(cursor, required_equipment)])
+
+def sync_equipments(cursor):
+    """Reconstruit toutes les tables de liaison depuis les colonnes CSV (idempotent)."""
+    for row in cursor.execute("SELECT id, equipments FROM rooms").fetchall():
+        set_room_equipments(cursor, row[0], row[1])
+    for row in cursor.execute("SELECT id, required_equipment FROM subjects").fetchall():
+        set_subject_equipments(cursor, row[0], row[1])
+
+def get_equipment_mask(cursor, names):
+    """
+    Masque binaire d'une liste d'équipements (bit id - 1).
+    Retourne None si un équipement est inconnu: aucune salle ne peut le fournir.
+    """
+    mask = 0
+    for name in names:
+        cursor.execute("SELECT id FROM equipments WHERE name = ?", (name,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        mask |= 1 << (row[0] - 1)
+    return mask
+
+# Expressions SQL des masques d'équipements (à utiliser avec les alias r / s)
+ROOM_EQUIPMENT_MASK_SQL = """COALESCE((SELECT SUM(1 << (re.equipment_id - 1)) FROM room_equipments re
+                                       WHERE re.room_id = r.id), 0)"""
+SUBJECT_EQUIPMENT_MASK_SQL = """COALESCE((SELECT SUM(1 << (se.equipment_id - 1)) FROM subject_equipments se
+                                          WHERE se.subject_id = s.id), 0)"""
+
 def getConnection():
     conn = sqlite3.connect(DB_NAME)
     conn.row_factory = sqlite3.Row 
@@ -383,6 +812,7 @@ def insert_room(name, room_type, capacity, equipments="", active=1):
             VALUES (?, ?, ?, ?, ?)
         """, (name, room_type, capacity, equipments, active))
         room_id = cursor.lastrowid
+        set_room_equipments(cursor, room_id, equipments)
         conn.commit()
         print(f"Salle insérée: {name} (Capacité: {capacity})")
         return room_id
@@ -424,6 +854,7 @@ def insert_subject(name, code, hours_total, subject_type, required_equipment="")
             VALUES (?, ?, ?, ?, ?)
         """, (name, code, hours_total, subject_type, required_equipment))
         subject_id = cursor.lastrowid
+        set_subject_equipments(cursor, subject_id, required_equipment)
         conn.commit()
         print(f"Matière insérée: {name} ({code})")
         return subject_id
@@ -612,77 +1043,26 @@ def populate_student_groups():
 # --- FONCTION CRITIQUE : VÉRIFICATION DE CONFLIT D'HORAIRE ---
 
 def check_conflict(instructor_id, group_id, room_id, day, start_hour, duration):
-    conn = getConnection()
-    cursor = conn.cursor()
-    end_hour = start_hour + duration
-    
-    # 1. Vérification des conflits dans la table 'timetable'
-    # Conflit si un enregistrement existant chevauche la nouvelle plage [start_hour, end_hour]
-    # (Existing_Start < New_End) AND (New_Start < Existing_End)
-    
-    query = """
-    SELECT 
-        'Enseignant' AS type, instructor_id AS entity_id 
-    FROM timetable 
-    WHERE day = ? AND instructor_id = ? 
-    AND (start_hour < ?) AND (? < start_hour + duration)
-    UNION ALL
-    SELECT 
-        'Groupe', group_id
-    FROM timetable 
-    WHERE day = ? AND group_id = ?
-    AND (start_hour < ?) AND (? < start_hour + duration)
-    UNION ALL
-    SELECT 
-        'Salle', room_id
-    FROM timetable 
-    WHERE day = ? AND room_id = ?
-    AND (start_hour < ?) AND (? < start_hour + duration);
-    """
-    
-    params = [
-        day, instructor_id, end_hour, start_hour,
-        day, group_id, end_hour, start_hour,
-        day, room_id, end_hour, start_hour
-    ]
-    
-    cursor.execute(query, params)
-    conflict = cursor.fetchone()
-    
-    if conflict:
-        conn.close()
-        return f"Conflit d'horaire existant pour l'entité : {conflict['type']} (ID: {conflict['entity_id']})."
-
-    # 2. Vérification des indisponibilités de l'enseignant (teacher_unavailability)
-    unavail_query = """
-    SELECT 
-        id
-    FROM teacher_unavailability 
-    WHERE instructor_id = ? AND day = ? 
-    AND (start_hour < ?) AND (? < start_hour + duration);
-    """
-    unavail_params = [instructor_id, day, end_hour, start_hour]
-    
-    cursor.execute(unavail_query, unavail_params)
-    unavailability = cursor.fetchone()
-    
-    conn.close()
-    
-    if unavailability:
-        return "L'enseignant est marqué comme indisponible sur cette plage horaire."
-        
+    # Réponse par ET binaire sur le cache d'occupation (rechargé automatiquement
+    # dès que la base a été modifiée), plutôt qu'une requête par appel
+    from services.occupancy import OccupancyCache
+
+    conflict_type = OccupancyCache.get_instance().conflict(instructor_id, group_id, room_id,
+                                                           day, start_hour, duration)
+    if conflict_type:
+        return conflict_message(conflict_type, instructor_id, group_id, room_id)
     return None # Aucun conflit détecté
 
 # --- TIMETABLE (EMPLOI DU TEMPS) ---
 
-def insert_schedule_slot(course_id, instructor_id, group_id, room_id, day, start_hour, duration, created_by=None):
-    # D'abord, vérifier les conflits avant l'insertion
-    conflict_message = check_conflict(instructor_id, group_id, room_id, day, start_hour, duration)
-    
-    if conflict_message:
-        print(f"Échec de l'insertion : {conflict_message}")
-        return False
-        
+def add_schedule_slot(course_id, instructor_id, group_id, room_id, day, start_hour, duration, created_by=None):
+    """
+    Insère un créneau en une seule instruction: les triggers anti-conflits
+    vérifient et écrivent atomiquement.
+
+    Returns:
+        tuple: (True, None) si inséré, (False, message) sinon
+    """
     conn = getConnection()
     cursor = conn.cursor()
     try:
@@ -691,13 +1071,22 @@ def insert_schedule_slot(course_id, instructor_id, group_id, room_id, day, start
             VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         """, (course_id, instructor_id, group_id, room_id, day, start_hour, duration, created_by))
         conn.commit()
-        return True
+        return True, None
     except sqlite3.IntegrityError as e:
-        print(f"Erreur d'intégrité lors de l'insertion d'un créneau: {e}")
-        return False
+        conflict_type = decode_conflict_error(e)
+        if conflict_type:
+            return False, conflict_message(conflict_type, instructor_id, group_id, room_id)
+        return False, f"Erreur d'intégrité lors de l'insertion d'un créneau: {e}"
     finally:
         conn.close()
 
+def insert_schedule_slot(course_id, instructor_id, group_id, room_id, day, start_hour, duration, created_by=None):
+    success, message = add_schedule_slot(course_id, instructor_id, group_id, room_id, day,
+                                         start_hour, duration, created_by)
+    if not success:
+        print(f"Échec de l'insertion : {message}")
+    return success
+
 def populate_timetable():
     print("\n--- Remplissage de l'Emploi du Temps (timetable) ---")
 
@@ -9,6 +9,8 @@ from database import getConnection, DAYS
 from controllers.admin_controller import AdminController
 from controllers.teacher_controller import TeacherController
 from controllers.student_controller import StudentController
+from services.analytics import WEEKLY_HOURS
+from services.soft_constraints import default_soft_constraints
 
 # Color Palette
 BG_COLOR = "#f0f2f5"
@@ -342,19 +344,20 @@ class AdminDashboard(DashboardFrame):
         # --- Section Stats Tableau ---
         tk.Label(self.content_area, text="📊 Taux d'Occupation Hebdomadaire", font=("Segoe UI", 14, "bold"), fg=ACCENT_COLOR).pack(anchor="w", pady=(20, 5))
         
-        cols = ("Salle", "Capacité", "Créneaux occupés /30", "Taux %", "Statut")
+        hours_col = f"Heures occupées /{WEEKLY_HOURS}"
+        cols = ("Salle", "Capacité", hours_col, "Taux %", "Statut")
         tree = ttk.Treeview(self.content_area, columns=cols, show="headings", height=10)
         for c in cols: tree.heading(c, text=c)
         tree.column("Salle", width=80)
         tree.column("Capacité", width=80)
-        tree.column("Créneaux occupés /30", width=120)
+        tree.column(hours_col, width=120)
         tree.column("Taux %", width=80)
         tree.column("Statut", width=100)
         tree.pack(fill="x")
         
         stats = self.controller.get_room_occupancy_stats()
         for s in stats:
-            tree.insert("", "end", values=(s['room'], s['capacity'], s['occupied'], f"{s['rate']}%", s['status']))
+            tree.insert("", "end", values=(s['room'], s['capacity'], s['hours'], f"{s['rate']}%", s['status']))
 
     def show_add_slot(self):
         self.clear_content()
@@ -440,13 +443,18 @@ class AdminDashboard(DashboardFrame):
         tk.Label(f_gen, text="🚀 Génération Automatique Complète", font=("Segoe UI", 14, "bold"), bg=WHITE, fg="#d35400").pack(anchor="w")
         tk.Label(f_gen, text="L'algorithme génétique va optimiser l'emploi du temps pour toute l'université.", bg=WHITE).pack(anchor="w")
         tk.Label(f_gen, text="Attention: Cela effacera l'emploi du temps actuel.", bg=WHITE, fg="red").pack(anchor="w", pady=5)
+
+        confort_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(f_gen, text="Optimiser aussi le confort (trous, journées chargées, vendredi tard)",
+                       variable=confort_var, bg=WHITE).pack(anchor="w")
         
         def run_full_gen():
             confirm = messagebox.askyesno("Confirmation", "Cela va effacer tout l'emploi du temps actuel et en générer un nouveau. Continuer ?")
             if confirm:
                 # Afficher un message de chargement (simple print pour l'instant car GUI bloquant)
                 self.master.update()
-                msg = self.controller.generer_planning_complet()
+                soft = default_soft_constraints() if confort_var.get() else None
+                msg = self.controller.generer_planning_complet(soft_constraints=soft)
                 messagebox.showinfo("Résultat Génération", msg)
         
         ttk.Button(f_gen, text="Lancer la Génération Globale", command=run_full_gen).pack(pady=10)
@@ -833,6 +841,7 @@ class TeacherDashboard(DashboardFrame):
         ttk.Button(f, text="📄 Exporter en PDF", command=self.export_pdf).pack(fill="x", pady=5)
         ttk.Button(f, text="📊 Exporter en Excel", command=self.export_excel).pack(fill="x", pady=5)
         ttk.Button(f, text="🖼️ Exporter en Image", command=self.export_image).pack(fill="x", pady=5)
+        ttk.Button(f, text="📅 Exporter vers un agenda (ICS)", command=self.export_ics).pack(fill="x", pady=5)
 
     def export_pdf(self):
         res = self.controller.export_my_timetable_pdf()
@@ -846,6 +855,10 @@ class TeacherDashboard(DashboardFrame):
         res = self.controller.export_my_timetable_image()
         messagebox.showinfo("Export Image", res)
 
+    def export_ics(self):
+        res = self.controller.export_my_timetable_ics()
+        messagebox.showinfo("Export Agenda", res)
+
 # --- STUDENT DASHBOARD ---
 class StudentDashboard(DashboardFrame):
     def __init__(self, master):
@@ -1003,6 +1016,7 @@ class StudentDashboard(DashboardFrame):
         ttk.Button(f, text="📄 Exporter en PDF", command=self.export_pdf).pack(fill="x", pady=5)
         ttk.Button(f, text="📊 Exporter en Excel", command=self.export_excel).pack(fill="x", pady=5)
         ttk.Button(f, text="🖼️ Exporter en Image", command=self.export_image).pack(fill="x", pady=5)
+        ttk.Button(f, text="📅 Exporter vers un agenda (ICS)", command=self.export_ics).pack(fill="x", pady=5)
 
     def export_pdf(self):
         res = self.controller.export_my_timetable_pdf()
@@ -1016,7 +1030,14 @@ class StudentDashboard(DashboardFrame):
         res = self.controller.export_my_timetable_image()
         messagebox.showinfo("Export Image", res)
 
+    def export_ics(self):
+        res = self.controller.export_my_timetable_ics()
+        messagebox.showinfo("Export Agenda", res)
+
 
 if __name__ == "__main__":
+    # Crée les tables manquantes (index, triggers, équipements...) sur une base existante
+    from database import setup
+    setup()
     app = App()
     app.mainloop()
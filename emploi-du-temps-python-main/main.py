@@ -10,6 +10,7 @@ from database import setup, getConnection
 from controllers.admin_controller import AdminController
 from controllers.teacher_controller import TeacherController
 from controllers.student_controller import StudentController
+from services.soft_constraints import default_soft_constraints
 import bcrypt
 
 def login():
@@ -54,13 +55,20 @@ def menu_admin(user):
         print("7. Afficher détails réservation")
         print("8. Voir réservations en attente")
         print("9. Déconnexion")
+        print("10. Valider toutes les réservations en attente (sans conflit)")
+        print("11. Versions de l'emploi du temps (publier / revenir en arrière)")
+        print("12. Exporter tous les emplois du temps (filières, enseignants, groupes)")
+        print("13. Mettre à jour les flux iCalendar (groupes, enseignants)")
+        print("14. Mettre à jour le site HTML des emplois du temps")
 
         choix = input("Choix : ")
 
         if choix == "0":
-            confirm = input("Cela va effacer tout l'emploi du temps actuel. Continuer ? (o/n) : ")
+            confirm = input("Cela va remplacer l'emploi du temps publié (retour arrière possible, option 11). Continuer ? (o/n) : ")
             if confirm.lower() == 'o':
-                msg = admin.generer_planning_complet()
+                confort = input("Optimiser aussi le confort (trous, journées chargées, vendredi tard) ? (o/n) : ")
+                soft = default_soft_constraints() if confort.lower() == 'o' else None
+                msg = admin.generer_planning_complet(soft_constraints=soft)
                 print(f"\n>> {msg}")
 
         elif choix == "1":
@@ -104,6 +112,34 @@ def menu_admin(user):
         elif choix == "9":
             break
 
+        elif choix == "10":
+            confirm = input("Valider en lot les réservations sans conflit et rejeter les autres ? (o/n) : ")
+            if confirm.lower() == "o":
+                admin.valider_reservations_en_lot()
+
+        elif choix == "11":
+            admin.lister_versions()
+            action = input("ID de la version à publier, 'r' pour revenir à la version précédente, "
+                           "'d ID' pour comparer une version à l'emploi du temps publié, Entrée pour quitter : ")
+            if action.lower() == "r":
+                admin.annuler_publication()
+            elif action.lower().startswith("d") and action[1:].strip().isdigit():
+                admin.comparer_versions(int(action[1:].strip()))
+            elif action.isdigit():
+                admin.publier_version(int(action))
+
+        elif choix == "12":
+            archive = input("Produire une archive zip ? (o/n) : ").lower() == 'o'
+            largeur = input("Largeur des vignettes PNG en pixels (Entrée: pas de vignettes) : ").strip()
+            vignettes = int(largeur) if largeur.isdigit() else None
+            print(f"\n>> {admin.exporter_tous_les_plannings(archive=archive, vignettes=vignettes)}")
+
+        elif choix == "13":
+            print(f"\n>> {admin.generer_flux_ics()}")
+
+        elif choix == "14":
+            print(f"\n>> {admin.publier_site_statique()}")
+
 def menu_teacher(user):
     teacher = TeacherController(user_id=user['id'])
     print(f"\n=== MENU ENSEIGNANT - {user['full_name']} ===")
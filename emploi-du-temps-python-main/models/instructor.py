@@ -17,9 +17,15 @@ class Instructor:
         name (str): Nom complet de l'enseignant
         speciality (str): Spécialité/domaine d'expertise
         unavailable_slots (list): Liste des créneaux d'indisponibilité
+        unavailable_mask (int): Masque hebdomadaire des indisponibilités (colonne instructors.unavailable_mask)
     """
     
-    def __init__(self, id, user_id, name, speciality, unavailable_slots=None):
+    # Disposition du masque (identique à database.unavailability_mask)
+    FIRST_HOUR = 8
+    HOURS_PER_DAY = 12
+    DAY_NUMBERS = {"Lundi": 1, "Mardi": 2, "Mercredi": 3, "Jeudi": 4, "Vendredi": 5}
+    
+    def __init__(self, id, user_id, name, speciality, unavailable_slots=None, unavailable_mask=0):
         """
         Initialise un nouvel enseignant.
         
@@ -29,11 +35,13 @@ class Instructor:
             name (str): Nom complet
             speciality (str): Spécialité
             unavailable_slots (str, optional): Créneaux indisponibles (format CSV)
+            unavailable_mask (int, optional): Masque des indisponibilités
         """
         self.id = id
         self.user_id = user_id
         self.name = name
         self.speciality = speciality
+        self.unavailable_mask = unavailable_mask or 0
         
         # Conversion string vers liste si nécessaire
         if unavailable_slots and isinstance(unavailable_slots, str):
@@ -48,15 +56,28 @@ class Instructor:
         Vérifie si l'enseignant est disponible à un créneau donné.
         
         Args:
-            day (str): Jour de la semaine
+            day (str or int): Jour de la semaine ("Lundi" ou 1)
             hour (int): Heure du créneau
             
         Returns:
             bool: True si disponible, False sinon
         """
+        bit = self._bit(day, hour)
+        if bit is not None and self.unavailable_mask >> bit & 1:
+            return False
         slot = f"{day}_{hour}"
         return slot not in self.unavailable_slots
 
+    def _bit(self, day, hour):
+        """Position du créneau dans le masque, ou None s'il est hors de la grille."""
+        day_num = self.DAY_NUMBERS.get(day, day)
+        if not isinstance(day_num, int) or not 1 <= day_num <= len(self.DAY_NUMBERS):
+            return None
+        offset = hour - self.FIRST_HOUR
+        if not 0 <= offset < self.HOURS_PER_DAY:
+            return None
+        return (day_num - 1) * self.HOURS_PER_DAY + offset
+
     def add_unavailability(self, day, hour):
         """
         Ajoute un créneau d'indisponibilité.
@@ -65,6 +86,9 @@ class Instructor:
             day (str): Jour de la semaine
             hour (int): Heure du créneau
         """
+        bit = self._bit(day, hour)
+        if bit is not None:
+            self.unavailable_mask |= 1 << bit
         slot = f"{day}_{hour}"
         if slot not in self.unavailable_slots:
             self.unavailable_slots.append(slot)
@@ -77,6 +101,9 @@ class Instructor:
             day (str): Jour de la semaine
             hour (int): Heure du créneau
         """
+        bit = self._bit(day, hour)
+        if bit is not None:
+            self.unavailable_mask &= ~(1 << bit)
         slot = f"{day}_{hour}"
         if slot in self.unavailable_slots:
             self.unavailable_slots.remove(slot)
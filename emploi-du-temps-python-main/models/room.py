@@ -17,6 +17,7 @@ class Room:
         room_type (str): Type de salle (Amphithéâtre, Salle TD, Salle TP)
         capacity (int): Capacité maximale de la salle
         equipments (list): Liste des équipements disponibles
+        equipment_mask (int): Masque binaire des équipements (table equipments, bit id - 1)
     """
     
     # Types de salles
@@ -25,7 +26,7 @@ class Room:
     TYPE_TP = "Salle TP"
     TYPE_COURS = "Salle Cours"
     
-    def __init__(self, id, name, room_type, capacity, equipments=None):
+    def __init__(self, id, name, room_type, capacity, equipments=None, equipment_mask=0):
         """
         Initialise une nouvelle salle.
         
@@ -35,17 +36,20 @@ class Room:
             room_type (str): Type de salle
             capacity (int): Capacité
             equipments (str, optional): Équipements (format CSV)
+            equipment_mask (int, optional): Masque des équipements normalisés
         """
         self.id = id
         self.name = name
         self.room_type = room_type
         self.capacity = capacity
         
-        # Conversion string vers liste si nécessaire
+        self.equipment_mask = equipment_mask
+        
+        # Conversion string vers liste si nécessaire (noms sans espaces superflus)
         if equipments and isinstance(equipments, str):
-            self.equipments = equipments.split(",")
+            self.equipments = [e.strip() for e in equipments.split(",") if e.strip()]
         elif equipments:
-            self.equipments = equipments
+            self.equipments = list(equipments)
         else:
             self.equipments = []
 
@@ -59,7 +63,20 @@ class Room:
         Returns:
             bool: True si la salle possède l'équipement
         """
-        return equipment in self.equipments
+        # Comparaison exacte (insensible à la casse) : "PC" ne correspond pas à "PCB lab"
+        return equipment.strip().upper() in (e.upper() for e in self.equipments)
+
+    def has_equipment_mask(self, required_mask):
+        """
+        Vérifie par inclusion binaire que la salle possède tous les équipements requis.
+        
+        Args:
+            required_mask (int): Masque des équipements requis
+            
+        Returns:
+            bool: True si tous les bits requis sont présents
+        """
+        return (self.equipment_mask & required_mask) == required_mask
 
     def is_suitable_for(self, student_count, required_equipment=None):
         """
@@ -82,7 +99,7 @@ class Room:
 
     def is_lab(self):
         """Vérifie si la salle est une salle de TP avec équipement informatique."""
-        return "PC" in self.equipments or "TP" in self.room_type
+        return self.has_equipment("PC") or "TP" in self.room_type
 
     def __str__(self):
         """Représentation textuelle de la salle."""
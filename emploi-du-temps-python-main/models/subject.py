@@ -18,6 +18,7 @@ class Subject:
         hours_total (int): Volume horaire total
         subject_type (str): Type de cours (CM, TD, TP, CM/TD, CM/TP)
         required_equipment (list): Équipements nécessaires
+        equipment_mask (int): Masque binaire des équipements requis (table equipments, bit id - 1)
     """
     
     # Types de cours
@@ -27,7 +28,7 @@ class Subject:
     TYPE_CM_TD = "CM/TD"
     TYPE_CM_TP = "CM/TP"
     
-    def __init__(self, id, name, code, hours_total, subject_type, required_equipment=None):
+    def __init__(self, id, name, code, hours_total, subject_type, required_equipment=None, equipment_mask=0):
         """
         Initialise une nouvelle matière.
         
@@ -38,6 +39,7 @@ class Subject:
             hours_total (int): Volume horaire
             subject_type (str): Type de cours
             required_equipment (str, optional): Équipements requis (format CSV)
+            equipment_mask (int, optional): Masque des équipements requis normalisés
         """
         self.id = id
         self.name = name
@@ -45,11 +47,13 @@ class Subject:
         self.hours_total = hours_total
         self.subject_type = subject_type
         
-        # Conversion string vers liste si nécessaire
+        self.equipment_mask = equipment_mask
+        
+        # Conversion string vers liste si nécessaire (noms sans espaces superflus)
         if required_equipment and isinstance(required_equipment, str):
-            self.required_equipment = required_equipment.split(",")
+            self.required_equipment = [e.strip() for e in required_equipment.split(",") if e.strip()]
         elif required_equipment:
-            self.required_equipment = required_equipment
+            self.required_equipment = list(required_equipment)
         else:
             self.required_equipment = []
 
@@ -72,7 +76,7 @@ class Subject:
         Returns:
             bool: True si l'équipement est requis
         """
-        return equipment in self.required_equipment
+        return equipment.strip().upper() in (e.upper() for e in self.required_equipment)
 
     def get_session_duration(self):
         """
@@ -626,17 +626,13 @@ def insert_subject_relations():
         ("LG52", "Ahmed Benali"),
     ]
     
-    for code, name in subject_instructors:
-        sub_id = get_id("subjects", "code", code)
-        instr_id = get_id("instructors", "name", name)
-        if sub_id and instr_id:
-            try:
-                cursor.execute("""
-                    INSERT INTO subject_instructors (subject_id, instructor_id)
-                    VALUES (?, ?)
-                """, (sub_id, instr_id))
-            except sqlite3.IntegrityError:
-                pass
+    # Résolution des codes / noms en mémoire et insertion en lot (services.importer)
+    from services.importer import BulkImporter
+    importer = BulkImporter(cursor)
+    importer.import_rows("qualifications", [
+        (line, {"subject_code": code, "instructor": name})
+        for line, (code, name) in enumerate(subject_instructors, start=1)
+    ])
     
     conn.commit()
     conn.close()
@@ -647,65 +643,39 @@ def insert_student_group_relations():
     conn = get_connection()
     cursor = conn.cursor()
     
-    # Mapping Etudiant -> Groupe (Nom partiel ou complet)
-    # LST AD
-    stu_ad = ["zelmaymouni", "rsaidi", "fkastit", "myassine", "ahoussam"]
-    grp_ad = get_id("groups", "name", "LST AD")
-    
-    # IDAI
-    stu_idai = ["imad", "ayman", "janat", "yasmine"]
-    grp_idai = get_id("groups", "name", "IDAI")
-    
-    # SSD
-    stu_ssd = ["houda", "badr", "ilyas", "hajar"]
-    grp_ssd = get_id("groups", "name", "SSD")
-    
-    # MID
-    stu_mid = ["karim", "salma", "omar", "rania"]
-    grp_mid = get_id("groups", "name", "MID")
-    
-    # Génie Civil
-    stu_gc = ["amine", "sara"]
-    grp_gc = get_id("groups", "name", "Génie Civil")
-    
-    # MIPC
-    stu_mipc = ["mehdi", "mariam"]
-    grp_mipc = get_id("groups", "name", "MIPC S6")
-    
+    # Mapping Etudiant -> Groupe
     assignments = [
-        (stu_ad, grp_ad, "LST AD"),
-        (stu_idai, grp_idai, "IDAI"),
-        (stu_ssd, grp_ssd, "SSD"),
-        (stu_mid, grp_mid, "MID"),
-        (stu_gc, grp_gc, "Génie Civil"),
-        (stu_mipc, grp_mipc, "MIPC"),
+        (["zelmaymouni", "rsaidi", "fkastit", "myassine", "ahoussam"], "LST AD"),
+        (["imad", "ayman", "janat", "yasmine"], "IDAI"),
+        (["houda", "badr", "ilyas", "hajar"], "SSD"),
+        (["karim", "salma", "omar", "rania"], "MID"),
+        (["amine", "sara"], "Génie Civil"),
+        (["mehdi", "mariam"], "MIPC S6"),
     ]
+    rows = [{"username": username, "group": group_name}
+            for students, group_name in assignments for username in students]
     
-    count = 0
-    for students, group_id, group_name in assignments:
-        if not group_id:
-            print(f"⚠️ Groupe {group_name} introuvable, impossible d'assigner les étudiants.")
-            continue
-            
-        for username in students:
-            # Get user ID
-            cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-            res = cursor.fetchone()
-            if res:
-                user_id = res['id']
-                try:
-                    cursor.execute("""
-                        INSERT INTO student_groups (user_id, group_id)
-                        VALUES (?, ?)
-                    """, (user_id, group_id))
-                    count += 1
-                except sqlite3.IntegrityError:
-                    pass
+    # Résolution des comptes / groupes en mémoire et insertion en lot (services.importer)
+    from services.importer import BulkImporter
+    importer = BulkImporter(cursor)
+    count = importer.import_rows("enrollments", enumerate(rows, start=1))
+    for error in importer.errors:
+        print(f"⚠️ Ligne {error['line']} : {error['message']}")
     
     conn.commit()
     conn.close()
     print(f"✓ {count} étudiants assignés à leurs groupes respectifs")
 
+def sync_equipment_tables():
+    """Normalise les équipements des salles et matières (tables equipments / *_equipments)"""
+    from database import sync_equipments
+
+    conn = get_connection()
+    sync_equipments(conn.cursor())
+    conn.commit()
+    conn.close()
+    print("✓ Équipements normalisés")
+
 def main():
     """Fonction principale de peuplement"""
     print("\n" + "="*60)
@@ -717,10 +687,19 @@ def main():
     insert_instructors()
     insert_rooms()
     insert_subjects()
+    sync_equipment_tables()
     insert_groups()
     insert_subject_relations()
     insert_student_group_relations()
     insert_timetable_fst()
+
+    # Chaque matière doit pouvoir être accueillie par au moins une salle
+    from services.feasibility import subjects_without_room
+    sans_salle = subjects_without_room()
+    if sans_salle:
+        print(f"⚠ Matières sans salle compatible : {', '.join(sans_salle)}")
+    else:
+        print("✓ Chaque matière dispose d'au moins une salle compatible")
     
     print("\n" + "="*60)
     print("   PEUPLEMENT TERMINÉ AVEC SUCCÈS!")
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Package des Services de l'application.
+
+Ce package regroupe les moteurs de calcul utilisés par les contrôleurs
+(planification, recherche de disponibilités, exports...):
+
+- feasibility: Solveur exact par backtracking (preuve de faisabilité / infaisabilité)
+- occupancy: Cache d'occupation hebdomadaire (bitmaps jour x heure) des salles,
+  enseignants et groupes, partagé par les recherches de disponibilité
+- room_matcher: Sélection best-fit des salles (capacité, équipements, disponibilité)
+- analytics: Utilisation des salles (heures, carte de chaleur, remplissage, heures de pointe,
+  charge des enseignants) en tableaux NumPy recalculés seulement si la base a changé
+- reservations: Validation en lot des réservations en attente (une transaction)
+- free_slots: Créneaux libres de toutes les salles en une requête et un balayage
+- versions: Brouillons d'emploi du temps, publication atomique et retour arrière
+- diff: Séances ajoutées, supprimées et déplacées entre deux états (publié, version,
+  fichier JSON), exécutable en ligne de commande: python -m services.diff
+- grid: Lecture de la grille hebdomadaire matérialisée (une requête indexée par export)
+- export: Modèle de grille commun et moteurs de rendu (PDF, Excel, PNG) des exports
+- soft_constraints: Contraintes souples pondérées de l'algorithme génétique (trous,
+  journées chargées, vendredi tard), évaluées incrémentalement
+- importer: Import en masse des données de référence (CSV/JSON, une transaction),
+  exécutable en ligne de commande: python -m services.importer
+- autotune: Réglage automatique des paramètres de l'algorithme génétique (profils nommés),
+  exécutable en ligne de commande: python -m services.autotune
+"""
+
+from .feasibility import FeasibilitySolver, check_feasibility, FEASIBLE, INFEASIBLE, UNKNOWN
+from .occupancy import OccupancyCache, slot_mask
+from .free_slots import free_intervals
+from .room_matcher import RoomMatcher
+from .analytics import RoomAnalytics
+from .reservations import approve_pending
+from .versions import create_version, add_draft_slots, publish_version, rollback, list_versions
+from .grid import load_grid
+
+__all__ = [
+    'FeasibilitySolver',
+    'check_feasibility',
+    'FEASIBLE',
+    'INFEASIBLE',
+    'UNKNOWN',
+    'OccupancyCache',
+    'slot_mask',
+    'free_intervals',
+    'RoomMatcher',
+    'RoomAnalytics',
+    'approve_pending',
+    'create_version',
+    'add_draft_slots',
+    'publish_version',
+    'rollback',
+    'list_versions',
+    'load_grid'
+]
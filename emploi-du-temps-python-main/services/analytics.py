@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+Statistiques d'utilisation des salles (tableaux NumPy précalculés).
+
+Les cours (timetable) et les réservations approuvées sont lus en une passe et
+chaque séance est dépliée en heures: le tableau `hours[salle, jour, heure]`
+compte les séances présentes dans chaque salle à chaque heure de la semaine.
+Toutes les statistiques en sont des agrégats (sommes selon un axe):
+
+- heures occupées par salle, par jour et par heure (durées réelles, pas un
+  nombre de lignes) et taux d'utilisation sur les heures d'ouverture;
+- carte de chaleur jour x heure (part des salles occupées);
+- taux de remplissage des places (effectif du groupe / capacité), pondéré
+  par la durée;
+- tension aux heures de pointe (séances simultanées / salles actives) et
+  doubles occupations d'une salle;
+- charge horaire hebdomadaire des enseignants.
+
+Les tableaux sont recalculés uniquement quand la base a changé (même
+`PRAGMA data_version` que le cache d'occupation).
+"""
+
+import numpy as np
+
+from database import getConnection
+from services.occupancy import OccupancyCache
+
+# Jours (1 = Lundi ... 6 = Samedi) et heures d'ouverture [OPENING_HOUR, CLOSING_HOUR)
+DAY_NUMBERS = (1, 2, 3, 4, 5, 6)
+OPENING_HOUR = 8
+CLOSING_HOUR = 18
+HOURS_PER_DAY = 24
+
+# Heures d'ouverture d'une salle par semaine
+WEEKLY_HOURS = len(DAY_NUMBERS) * (CLOSING_HOUR - OPENING_HOUR)
+
+# Seuils (taux d'utilisation, %) des statuts affichés
+BUSY_RATE = 75
+NORMAL_RATE = 40
+
+
+def _status(rate):
+    if rate > BUSY_RATE:
+        return "Surchargé"
+    if rate > NORMAL_RATE:
+        return "Normal"
+    return "Faible"
+
+
+def _expand(day, start, duration):
+    """
+    Déplie des séances en heures.
+
+    Returns:
+        tuple: (indice de la séance, jour, heure) pour chaque heure de chaque séance
+    """
+    duration = np.maximum(duration, 0)
+    rows = np.repeat(np.arange(len(duration)), duration)
+    # Décalage de chaque heure dans sa séance: 0, 1, ..., durée - 1
+    offsets = np.arange(len(rows)) - np.repeat(np.cumsum(duration) - duration, duration)
+    hours = start[rows] + offsets
+    inside = (hours >= 0) & (hours < HOURS_PER_DAY)
+    return rows[inside], day[rows][inside], hours[inside]
+
+
+def _index_of(ids, values):
+    """Position de chaque valeur dans `ids` (-1 si absente), par table de correspondance."""
+    size = int(max(ids.max(initial=0), values.max(initial=0))) + 1
+    lookup = np.full(size, -1, dtype=np.int64)
+    lookup[ids] = np.arange(len(ids))
+    return np.where(values >= 0, lookup[values.clip(0)], -1)
+
+
+class RoomAnalytics:
+    """
+    Agrégats d'utilisation des salles.
+
+    Attributes:
+        room_ids (ndarray): Identifiants des salles (ordre des autres tableaux)
+        names (list): Noms des salles
+        capacities (ndarray): Capacités
+        active (ndarray): Salles actives (booléens)
+        hours (ndarray): [salle, jour, heure] -> nombre de séances (cours et réservations)
+        seat_hours (ndarray): [salle] -> heures x étudiants accueillis (séances avec groupe)
+        grouped_hours (ndarray): [salle] -> heures de séances avec groupe
+        instructor_ids (ndarray), instructor_names (list), instructor_hours (ndarray): Charge des enseignants
+        sessions (int): Nombre de cours planifiés
+        reservations (int): Nombre de réservations approuvées (avec salle)
+    """
+
+    _instance = None
+
+    @staticmethod
+    def get_instance():
+        if RoomAnalytics._instance is None:
+            RoomAnalytics._instance = RoomAnalytics()
+        return RoomAnalytics._instance
+
+    def __init__(self, occupancy=None):
+        self.occupancy = occupancy or OccupancyCache.get_instance()
+        self._version = None
+        self.room_ids = np.zeros(0, dtype=np.int64)
+        self.names = []
+        self.capacities = np.zeros(0, dtype=np.int64)
+        self.active = np.zeros(0, dtype=bool)
+        self.hours = np.zeros((0, len(DAY_NUMBERS), HOURS_PER_DAY), dtype=np.int32)
+        self.seat_hours = np.zeros(0)
+        self.grouped_hours = np.zeros(0)
+        self.instructor_ids = np.zeros(0, dtype=np.int64)
+        self.instructor_names = []
+        self.instructor_hours = np.zeros(0, dtype=np.int64)
+        self.sessions = 0
+        self.reservations = 0
+
+    def refresh(self):
+        """Recalcule les agrégats si la base a été modifiée."""
+        self.occupancy.refresh()
+        if self._version != self.occupancy.version:
+            self._load()
+            self._version = self.occupancy.version
+        return self
+
+    def _load(self):
+        conn = getConnection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, name, capacity, active FROM rooms ORDER BY name")
+        rooms = cursor.fetchall()
+        cursor.execute("SELECT id, name FROM instructors ORDER BY name")
+        instructors = cursor.fetchall()
+        # Une seule lecture des cours et des réservations approuvées (type 0 = cours, 1 = réservation)
+        cursor.execute("""
+            SELECT 0, t.room_id, t.instructor_id, t.day, t.start_hour, t.duration, g.student_count
+            FROM timetable t LEFT JOIN groups g ON g.id = t.group_id
+            UNION ALL
+            SELECT 1, r.room_id, r.instructor_id, r.day, r.start_hour, r.duration, g.student_count
+            FROM reservations r LEFT JOIN groups g ON g.id = r.group_id
+            WHERE r.status = 'APPROVED' AND r.room_id IS NOT NULL
+        """)
+        rows = cursor.fetchall()
+        conn.close()
+
+        room_ids = np.array([row['id'] for row in rooms], dtype=np.int64)
+        capacities = np.array([row['capacity'] for row in rooms], dtype=np.int64)
+        instructor_ids = np.array([row['id'] for row in instructors], dtype=np.int64)
+
+        data = np.array([tuple(-1 if value is None else value for value in row) for row in rows],
+                        dtype=np.int64).reshape(-1, 7)
+        kind, room, instructor, day, start, duration, students = data.T
+
+        # Séances rattachées à une salle connue, un jour affiché
+        room_idx = _index_of(room_ids, room)
+        day_idx = day - DAY_NUMBERS[0]
+        known = (room_idx >= 0) & (day_idx >= 0) & (day_idx < len(DAY_NUMBERS))
+
+        session, session_day, session_hour = _expand(day_idx[known], start[known], duration[known])
+        hours = np.zeros((len(room_ids), len(DAY_NUMBERS), HOURS_PER_DAY), dtype=np.int32)
+        np.add.at(hours, (room_idx[known][session], session_day, session_hour), 1)
+
+        # Remplissage des places: heures x effectif des séances avec groupe
+        grouped = known & (students >= 0)
+        seat_hours = np.bincount(room_idx[grouped], weights=students[grouped] * duration[grouped],
+                                 minlength=len(room_ids))
+        grouped_hours = np.bincount(room_idx[grouped], weights=duration[grouped], minlength=len(room_ids))
+
+        # Charge des enseignants: cours et réservations
+        instructor_idx = _index_of(instructor_ids, instructor)
+        assigned = instructor_idx >= 0
+        instructor_hours = np.bincount(instructor_idx[assigned], weights=duration[assigned],
+                                       minlength=len(instructor_ids)).astype(np.int64)
+
+        self.room_ids, self.capacities = room_ids, capacities
+        self.names = [row['name'] for row in rooms]
+        self.active = np.array([bool(row['active']) for row in rooms], dtype=bool)
+        self.hours = hours
+        self.seat_hours, self.grouped_hours = seat_hours, grouped_hours
+        self.instructor_ids = instructor_ids
+        self.instructor_names = [row['name'] for row in instructors]
+        self.instructor_hours = instructor_hours
+        self.sessions = int(np.count_nonzero(kind == 0))
+        self.reservations = int(np.count_nonzero(kind == 1))
+
+    # ------------------------------------------------------------------
+    # Agrégats
+    # ------------------------------------------------------------------
+
+    def _opening(self):
+        """Occupation restreinte aux heures d'ouverture: [salle, jour, heure d'ouverture]."""
+        return self.hours[:, :, OPENING_HOUR:CLOSING_HOUR]
+
+    def room_stats(self):
+        """
+        Utilisation de chaque salle, de la plus occupée à la moins occupée.
+
+        Returns:
+            list: [{"room", "capacity", "active", "hours", "rate", "seat_fill", "double_booked", "status"}, ...]
+                  hours: heures occupées pendant l'ouverture; rate: % des WEEKLY_HOURS;
+                  seat_fill: % moyen des places occupées (None sans séance avec groupe)
+        """
+        self.refresh()
+        opening = self._opening()
+        occupied = np.count_nonzero(opening, axis=(1, 2))
+        double_booked = np.count_nonzero(opening > 1, axis=(1, 2))
+        rates = occupied * 100.0 / WEEKLY_HOURS
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fill = np.where((self.grouped_hours > 0) & (self.capacities > 0),
+                            self.seat_hours * 100.0 / (self.grouped_hours * self.capacities), np.nan)
+
+        stats = []
+        for i in np.lexsort((np.arange(len(self.names)), -occupied)):
+            stats.append({
+                "room": self.names[i],
+                "capacity": int(self.capacities[i]),
+                "active": bool(self.active[i]),
+                "hours": int(occupied[i]),
+                "rate": round(float(rates[i]), 1),
+                "seat_fill": None if np.isnan(fill[i]) else round(float(fill[i]), 1),
+                "double_booked": int(double_booked[i]),
+                "status": _status(rates[i]),
+            })
+        return stats
+
+    def hours_by_day(self):
+        """Heures de séances par jour (toutes salles): {jour: heures}."""
+        self.refresh()
+        return dict(zip(DAY_NUMBERS, self.hours.sum(axis=(0, 2)).tolist()))
+
+    def hours_by_hour(self):
+        """Heures de séances par heure de la journée (toute la semaine): {heure: heures}."""
+        self.refresh()
+        totals = self.hours.sum(axis=(0, 1))
+        return {hour: int(totals[hour]) for hour in range(OPENING_HOUR, CLOSING_HOUR)}
+
+    def heatmap(self):
+        """
+        Part des salles actives occupées à chaque heure d'ouverture.
+
+        Returns:
+            ndarray: [jour, heure - OPENING_HOUR] -> taux (0 à 1)
+        """
+        self.refresh()
+        active = max(int(self.active.sum()), 1)
+        return np.count_nonzero(self._opening()[self.active], axis=0) / active
+
+    def peak_contention(self, top=5):
+        """
+        Heures les plus tendues: séances simultanées rapportées au nombre de salles actives.
+
+        Returns:
+            list: [{"day", "hour", "sessions", "rooms", "ratio"}, ...] par tension décroissante
+        """
+        self.refresh()
+        active = int(self.active.sum())
+        demand = self._opening().sum(axis=0)
+        order = np.argsort(-demand, axis=None, kind="stable")[:top]
+        peaks = []
+        for flat in order:
+            day_idx, hour_idx = np.unravel_index(flat, demand.shape)
+            sessions = int(demand[day_idx, hour_idx])
+            if not sessions:
+                break
+            peaks.append({"day": DAY_NUMBERS[day_idx], "hour": OPENING_HOUR + int(hour_idx),
+                          "sessions": sessions, "rooms": active,
+                          "ratio": round(sessions / active, 2) if active else None})
+        return peaks
+
+    def instructor_load(self):
+        """Charge hebdomadaire (heures) des enseignants, décroissante: [(nom, heures), ...]."""
+        self.refresh()
+        order = np.lexsort((np.arange(len(self.instructor_names)), -self.instructor_hours))
+        return [(self.instructor_names[i], int(self.instructor_hours[i])) for i in order]
+
+    def summary(self):
+        """Chiffres généraux: {"sessions", "reservations", "rooms", "active_rooms", "hours", "rate"}."""
+        self.refresh()
+        active = int(self.active.sum())
+        occupied = int(np.count_nonzero(self._opening()[self.active]))
+        return {
+            "sessions": self.sessions,
+            "reservations": self.reservations,
+            "rooms": len(self.room_ids),
+            "active_rooms": active,
+            "hours": int(self.hours.sum()),
+            "rate": round(occupied * 100.0 / (active * WEEKLY_HOURS), 1) if active else 0.0,
+        }
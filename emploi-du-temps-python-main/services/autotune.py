@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+Réglage automatique des paramètres de l'algorithme génétique.
+
+Recherche par "successive halving": on tire un ensemble de configurations,
+on les évalue toutes avec un petit budget de temps dans un pool de processus,
+on garde la meilleure fraction (1/eta), on multiplie le budget par eta et on
+recommence jusqu'à ce qu'il ne reste qu'une configuration.
+
+Toutes les configurations d'un tour disposent du même budget: elles sont
+classées par fitness moyenne obtenue, puis, à fitness égale (typiquement
+quand plusieurs atteignent la solution sans conflit), par durée moyenne pour y
+parvenir. Une configuration qui s'arrête tôt sur une fitness médiocre ne
+peut donc pas passer devant une meilleure. La configuration gagnante est
+enregistrée comme profil nommé (table ga_profiles, créée par database.setup)
+que AdminController.generer_planning_complet peut recharger.
+
+Utilisation:
+    python -m services.autotune --db university_schedule.db --profile S6_2026
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import database
+from database import getConnection
+
+# Espace de recherche des paramètres
+PARAM_SPACE = {
+    "population_size": [8, 12, 16, 24, 32],
+    "mutation_size": [1, 2, 3, 4, 6],
+    "mutation_prob": [0.1, 0.2, 0.3, 0.5],
+    "crossover_prob": [0.6, 0.8, 0.9, 1.0],
+    "crossover_points": [1, 2, 3, 5],
+    "tournament_size": [2, 3, 4, 5],
+    "max_generations": [50, 100, 200, 400],
+}
+
+# Paramètres historiques de generer_planning_complet
+DEFAULT_PARAMS = {
+    "population_size": 12,
+    "mutation_size": 2,
+    "mutation_prob": 0.2,
+    "crossover_prob": 0.8,
+    "crossover_points": 2,
+    "tournament_size": 3,
+    "max_generations": 50,
+}
+
+# Clés transmises au constructeur de GeneticAlgorithm
+GA_KEYS = ("population_size", "mutation_size", "mutation_prob", "crossover_prob",
+           "crossover_points", "tournament_size")
+
+
+def sample_configurations(n, rng=None):
+    """Tire n configurations distinctes (la configuration par défaut est toujours incluse)."""
+    rng = rng or random.Random()
+    configs = [dict(DEFAULT_PARAMS)]
+    seen = {tuple(sorted(DEFAULT_PARAMS.items()))}
+    attempts = 0
+    while len(configs) < n and attempts < n * 50:
+        attempts += 1
+        params = {key: rng.choice(values) for key, values in PARAM_SPACE.items()}
+        key = tuple(sorted(params.items()))
+        if key not in seen:
+            seen.add(key)
+            configs.append(params)
+    return configs
+
+
+# ----------------------------------------------------------------------
+# Exécution dans les processus du pool
+# ----------------------------------------------------------------------
+
+def _init_worker(db_path):
+    """Initialise un processus: pointe vers la base cible et charge la Configuration une fois."""
+    database.DB_NAME = db_path
+    from Schedule import Configuration
+    Configuration.get_instance()
+
+
+def _run_trial(task):
+    """Exécute l'algorithme génétique avec une configuration et un budget donnés."""
+    params, budget, seed = task
+    from Schedule import GeneticAlgorithm
+
+    random.seed(seed)
+    start = time.monotonic()
+    ga = GeneticAlgorithm(**{key: params[key] for key in GA_KEYS})
+    best = ga.evolve(max_generations=params["max_generations"], target_fitness=1.0,
+                     time_budget=budget)
+    elapsed = max(time.monotonic() - start, 1e-6)
+    return {"fitness": best.fitness, "elapsed": elapsed, "generations": ga.generation}
+
+
+def successive_halving(db_path, n_configs=16, min_budget=1.0, eta=2, repeats=2,
+                       workers=None, seed=None, verbose=True):
+    """
+    Lance la recherche par successive halving.
+
+    Args:
+        db_path (str): Base SQLite contenant les données du semestre
+        n_configs (int): Nombre de configurations tirées au départ
+        min_budget (float): Budget (secondes) par essai au premier tour
+        eta (int): Facteur de réduction (on garde 1/eta des configurations à chaque tour)
+        repeats (int): Nombre d'essais (graines) par configuration et par tour
+        workers (int, optional): Nombre de processus (défaut: nombre de CPU)
+        seed (int, optional): Graine pour la reproductibilité du tirage
+
+    Returns:
+        dict: {"params": dict, "score": float, "fitness": float, "elapsed": float, "history": list}
+              score: fitness moyenne au dernier tour (budget le plus long)
+    """
+    rng = random.Random(seed)
+    db_path = os.path.abspath(db_path)
+    candidates = sample_configurations(n_configs, rng)
+    budget = min_budget
+    history = []
+    scored = []
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(db_path,)) as pool:
+        round_idx = 0
+        while True:
+            round_idx += 1
+            tasks = [(params, budget, rng.randrange(2 ** 31))
+                     for params in candidates for _ in range(repeats)]
+            results = list(pool.map(_run_trial, tasks))
+
+            scored = []
+            for idx, params in enumerate(candidates):
+                trials = results[idx * repeats:(idx + 1) * repeats]
+                fitness = sum(t["fitness"] for t in trials) / len(trials)
+                elapsed = sum(t["elapsed"] for t in trials) / len(trials)
+                scored.append({"params": params, "fitness": fitness, "elapsed": elapsed,
+                               "score": fitness})
+            # Budget identique pour tous: la fitness d'abord, puis la durée pour l'atteindre
+            scored.sort(key=lambda r: (-r["fitness"], r["elapsed"]))
+            history.append({"round": round_idx, "budget": budget, "results": scored})
+
+            if verbose:
+                top = scored[0]
+                print(f"Tour {round_idx} | budget {budget:.1f}s | {len(candidates)} configs | "
+                      f"meilleure fitness {top['fitness']:.3f} en {top['elapsed']:.2f}s")
+
+            if len(candidates) <= 1:
+                break
+            keep = max(1, len(candidates) // eta)
+            candidates = [r["params"] for r in scored[:keep]]
+            budget *= eta
+
+    best = scored[0]
+    return {"params": best["params"], "score": best["score"], "fitness": best["fitness"],
+            "elapsed": best["elapsed"], "history": history}
+
+
+# ----------------------------------------------------------------------
+# Profils nommés
+# ----------------------------------------------------------------------
+
+def save_profile(name, params, score=None):
+    """Enregistre (ou remplace) un profil de paramètres nommé."""
+    conn = getConnection()
+    conn.execute("""
+        INSERT INTO ga_profiles (name, params, score) VALUES (?, ?, ?)
+        ON CONFLICT(name) DO UPDATE SET params = excluded.params, score = excluded.score,
+                                        updated_at = CURRENT_TIMESTAMP
+    """, (name, json.dumps(params), score))
+    conn.commit()
+    conn.close()
+
+
+def load_profile(name):
+    """
+    Charge un profil nommé.
+
+    Returns:
+        dict or None: Paramètres complétés par les valeurs par défaut, ou None si absent
+    """
+    conn = getConnection()
+    row = conn.execute("SELECT params FROM ga_profiles WHERE name = ?", (name,)).fetchone()
+    conn.close()
+    if not row:
+        return None
+    params = dict(DEFAULT_PARAMS)
+    params.update(json.loads(row['params']))
+    return params
+
+
+def list_profiles():
+    """Liste les profils enregistrés (nom, score, date de mise à jour)."""
+    conn = getConnection()
+    rows = conn.execute("SELECT name, score, updated_at FROM ga_profiles ORDER BY name").fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Réglage automatique de l'algorithme génétique")
+    parser.add_argument("--db", default=database.DB_NAME, help="Base SQLite du semestre")
+    parser.add_argument("--profile", required=True, help="Nom du profil à enregistrer")
+    parser.add_argument("--configs", type=int, default=16, help="Nombre de configurations initiales")
+    parser.add_argument("--budget", type=float, default=1.0, help="Budget (s) par essai au premier tour")
+    parser.add_argument("--eta", type=int, default=2, help="Facteur de réduction")
+    parser.add_argument("--repeats", type=int, default=2, help="Essais par configuration et par tour")
+    parser.add_argument("--workers", type=int, default=None, help="Nombre de processus")
+    parser.add_argument("--seed", type=int, default=None, help="Graine aléatoire")
+    args = parser.parse_args()
+
+    database.DB_NAME = os.path.abspath(args.db)
+    database.setup()
+    result = successive_halving(args.db, n_configs=args.configs, min_budget=args.budget,
+                                eta=args.eta, repeats=args.repeats, workers=args.workers,
+                                seed=args.seed)
+    save_profile(args.profile, result["params"], result["score"])
+
+    print(f"\nProfil '{args.profile}' enregistré (fitness {result['fitness']:.3f} "
+          f"en {result['elapsed']:.2f}s) :")
+    for key, value in result["params"].items():
+        print(f"  {key} = {value}")
+
+
+if __name__ == "__main__":
+    main()
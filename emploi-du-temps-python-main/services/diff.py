@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+"""
+Différences entre deux états de l'emploi du temps.
+
+Un état (« instantané ») est la liste des séances de l'emploi du temps publié,
+d'une version enregistrée (brouillon ou archive, voir services.versions) ou
+d'un fichier JSON écrit par save_snapshot. Les ids des lignes timetable
+changent à chaque publication: les séances sont donc appariées par
+(cours, groupe). Pour chaque clé, les séances identiques des deux côtés sont
+écartées, puis les séances restantes sont appariées dans l'ordre (jour, heure)
+en séances déplacées; le surplus est ajouté ou supprimé. L'ensemble est en
+O(n log n).
+
+Le résultat (ChangeSet) liste les séances ajoutées, supprimées et déplacées,
+les groupes, enseignants et salles touchés (clés "group/<id>", ... des exports
+groupés) et se sérialise en JSON.
+
+Utilisation en ligne de commande:
+    python -m services.diff [--before 12] [--after published] [--json changes.json]
+"""
+
+import argparse
+import json
+import os
+from collections import Counter
+
+import database
+from database import getConnection
+from services.export.model import DAYS, GROUP, INSTRUCTOR, ROOM
+
+ADDED = "added"
+REMOVED = "removed"
+MOVED = "moved"
+
+PUBLISHED_SOURCE = "published"
+
+# Colonnes d'une séance: identité (clé d'appariement) et placement
+KEY_FIELDS = ("course_id", "group_id")
+PLACEMENT_FIELDS = ("day", "start_hour", "duration", "room_id", "instructor_id")
+
+# Entité touchée par une séance: (type, colonne de l'id)
+ENTITY_FIELDS = ((GROUP, "group_id"), (INSTRUCTOR, "instructor_id"), (ROOM, "room_id"))
+
+_DAY_NAMES = dict(DAYS)
+
+_SELECT = """
+    SELECT t.course_id, t.group_id, t.instructor_id, t.room_id, t.day, t.start_hour, t.duration,
+           s.name AS subject, g.name AS group_name, i.name AS instructor, r.name AS room
+    FROM {table} t
+    LEFT JOIN subjects s ON s.id = t.course_id
+    LEFT JOIN groups g ON g.id = t.group_id
+    LEFT JOIN instructors i ON i.id = t.instructor_id
+    LEFT JOIN rooms r ON r.id = t.room_id
+"""
+
+
+def load_snapshot(source=PUBLISHED_SOURCE):
+    """
+    Séances d'un état de l'emploi du temps.
+
+    Args:
+        source: "published" (table timetable), id d'une version (int) ou chemin d'un fichier JSON
+
+    Returns:
+        list: [{"course_id", "group_id", "instructor_id", "room_id", "day", "start_hour",
+                "duration", "subject", "group_name", "instructor", "room"}, ...]
+
+    Raises:
+        ValueError: Version introuvable
+    """
+    if isinstance(source, str) and source != PUBLISHED_SOURCE and not source.isdigit():
+        with open(source, encoding="utf-8") as f:
+            data = json.load(f)
+        return data["sessions"] if isinstance(data, dict) else data
+
+    conn = getConnection()
+    cursor = conn.cursor()
+    if source == PUBLISHED_SOURCE:
+        cursor.execute(_SELECT.format(table="timetable"))
+    else:
+        version_id = int(source)
+        cursor.execute("SELECT status FROM timetable_versions WHERE id = ?", (version_id,))
+        row = cursor.fetchone()
+        if not row:
+            conn.close()
+            raise ValueError(f"Version {version_id} introuvable.")
+        # La version publiée vit dans timetable, les autres dans timetable_drafts
+        if row['status'] == "PUBLISHED":
+            cursor.execute(_SELECT.format(table="timetable"))
+        else:
+            cursor.execute(_SELECT.format(table="timetable_drafts") + " WHERE t.version_id = ?", (version_id,))
+    sessions = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return sessions
+
+
+def save_snapshot(sessions, path):
+    """Écrit un instantané (relisible par load_snapshot) dans un fichier JSON."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"sessions": sessions}, f, ensure_ascii=False)
+    return path
+
+
+def _placement(session):
+    return tuple(session[field] for field in PLACEMENT_FIELDS)
+
+
+def _by_key(sessions):
+    grouped = {}
+    for session in sessions:
+        grouped.setdefault(tuple(session[field] for field in KEY_FIELDS), []).append(session)
+    return grouped
+
+
+def _without(sessions, common):
+    """Séances qui ne font pas partie des séances communes (Counter des placements)."""
+    remaining = common.copy()
+    left = []
+    for session in sessions:
+        placement = _placement(session)
+        if remaining[placement]:
+            remaining[placement] -= 1
+        else:
+            left.append(session)
+    return left
+
+
+def _describe(session):
+    return (f"{_DAY_NAMES.get(session['day'], session['day'])} {session['start_hour']}h "
+            f"({session['duration']}h, {session.get('room') or session['room_id']})")
+
+
+class ChangeSet:
+    """
+    Séances ajoutées, supprimées et déplacées entre deux états.
+
+    Attributes:
+        added (list): Séances ajoutées
+        removed (list): Séances supprimées
+        moved (list): [{"before": séance, "after": séance, "fields": [colonnes modifiées]}, ...]
+        unchanged (int): Nombre de séances identiques
+    """
+
+    def __init__(self, added=(), removed=(), moved=(), unchanged=0):
+        self.added = list(added)
+        self.removed = list(removed)
+        self.moved = list(moved)
+        self.unchanged = unchanged
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.moved)
+
+    def changes(self):
+        """Changements à plat: [(type, séance avant, séance après), ...] (None si absente)."""
+        result = [(ADDED, None, session) for session in self.added]
+        result += [(REMOVED, session, None) for session in self.removed]
+        result += [(MOVED, move["before"], move["after"]) for move in self.moved]
+        return result
+
+    def by_entity(self):
+        """
+        Changements par groupe, enseignant et salle. Une séance déplacée d'une salle
+        (ou d'un enseignant) à une autre apparaît pour les deux.
+
+        Returns:
+            dict: {"group": {id: [(type, avant, après), ...]}, "instructor": {...}, "room": {...}}
+        """
+        entities = {kind: {} for kind, _ in ENTITY_FIELDS}
+        for change in self.changes():
+            for kind, field in ENTITY_FIELDS:
+                ids = {session[field] for session in change[1:] if session is not None}
+                for entity_id in ids:
+                    entities[kind].setdefault(entity_id, []).append(change)
+        return entities
+
+    def affected_keys(self):
+        """Clés des grilles touchées ("group/<id>", "instructor/<id>", "room/<id>"), comme les exports groupés."""
+        return sorted(f"{kind}/{entity_id}" for kind, entities in self.by_entity().items() for entity_id in entities)
+
+    def summary(self):
+        """Résumé en une ligne."""
+        if not self:
+            return f"Aucun changement ({self.unchanged} séances identiques)."
+        touched = self.by_entity()
+        return (f"{len(self.added)} séance(s) ajoutée(s), {len(self.removed)} supprimée(s), "
+                f"{len(self.moved)} déplacée(s), {self.unchanged} identique(s) ; "
+                f"{len(touched[GROUP])} groupe(s), {len(touched[INSTRUCTOR])} enseignant(s), "
+                f"{len(touched[ROOM])} salle(s) concerné(s).")
+
+    def lines(self):
+        """Description lisible de chaque changement."""
+        for kind, before, after in self.changes():
+            session = after or before
+            label = f"{session.get('subject') or session['course_id']} ({session.get('group_name') or session['group_id']})"
+            if kind == ADDED:
+                yield f"+ {label} : {_describe(after)}"
+            elif kind == REMOVED:
+                yield f"- {label} : {_describe(before)}"
+            else:
+                yield f"~ {label} : {_describe(before)} -> {_describe(after)}"
+
+    def to_dict(self):
+        """Jeu de changements sérialisable (JSON)."""
+        touched = self.by_entity()
+        return {
+            "summary": {"added": len(self.added), "removed": len(self.removed),
+                        "moved": len(self.moved), "unchanged": self.unchanged},
+            "added": self.added,
+            "removed": self.removed,
+            "moved": self.moved,
+            "affected": {kind: sorted(entities) for kind, entities in touched.items()},
+        }
+
+    def to_json(self, path=None):
+        """Jeu de changements en JSON (écrit dans `path` si fourni)."""
+        text = json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+        return text
+
+
+def diff_snapshots(before, after):
+    """
+    Compare deux listes de séances.
+
+    Returns:
+        ChangeSet
+    """
+    before_by_key, after_by_key = _by_key(before), _by_key(after)
+    added, removed, moved = [], [], []
+    unchanged = 0
+
+    for key in sorted(before_by_key.keys() | after_by_key.keys()):
+        old, new = before_by_key.get(key, []), after_by_key.get(key, [])
+
+        # Séances identiques des deux côtés (à multiplicité près)
+        common = Counter(map(_placement, old)) & Counter(map(_placement, new))
+        unchanged += sum(common.values())
+        old_left, new_left = _without(old, common), _without(new, common)
+
+        # Appariement des séances restantes dans l'ordre chronologique
+        old_left.sort(key=_placement)
+        new_left.sort(key=_placement)
+        for old_session, new_session in zip(old_left, new_left):
+            fields = [field for field in PLACEMENT_FIELDS if old_session[field] != new_session[field]]
+            moved.append({"before": old_session, "after": new_session, "fields": fields})
+        removed.extend(old_left[len(new_left):])
+        added.extend(new_left[len(old_left):])
+
+    return ChangeSet(added, removed, moved, unchanged)
+
+
+def diff_versions(before=PUBLISHED_SOURCE, after=PUBLISHED_SOURCE):
+    """Compare deux états (voir load_snapshot pour les sources acceptées)."""
+    return diff_snapshots(load_snapshot(before), load_snapshot(after))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Différences entre deux états de l'emploi du temps")
+    parser.add_argument("--before", default=None,
+                        help="État de référence: 'published', id de version ou fichier JSON "
+                             "(défaut: version remplacée par la publication courante)")
+    parser.add_argument("--after", default=PUBLISHED_SOURCE, help="État comparé (défaut: published)")
+    parser.add_argument("--json", help="Écrire le jeu de changements dans ce fichier")
+    parser.add_argument("--save-snapshot", help="Écrire l'état --after dans ce fichier JSON et quitter")
+    parser.add_argument("--db", default=database.DB_NAME, help="Base SQLite")
+    args = parser.parse_args()
+
+    database.DB_NAME = os.path.abspath(args.db)
+    database.setup()
+
+    if args.save_snapshot:
+        sessions = load_snapshot(args.after)
+        save_snapshot(sessions, args.save_snapshot)
+        print(f"{len(sessions)} séances écrites dans {args.save_snapshot}")
+        return
+
+    before = args.before
+    if before is None:
+        conn = getConnection()
+        row = conn.execute("SELECT replaces FROM timetable_versions WHERE status = 'PUBLISHED'").fetchone()
+        conn.close()
+        if not row or row['replaces'] is None:
+            print("Aucune version précédente: préciser --before.")
+            return
+        before = row['replaces']
+
+    changes = diff_versions(before, args.after)
+    for line in changes.lines():
+        print(line)
+    print(changes.summary())
+    if args.json:
+        changes.to_json(args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Exports de l'emploi du temps.
+
+Les grilles (filière, groupe, enseignant, salle) sont construites une seule fois par
+le modèle commun, puis passées au moteur de rendu du format demandé:
+
+- model: Grille jours x créneaux (une lecture de la grille matérialisée par export)
+- pdf: Rendu PDF (reportlab, page par page avec styles partagés)
+- xlsx: Rendu Excel (openpyxl, écriture en flux avec styles nommés)
+- png: Rendu image (Pillow, fond de grille et textes en cache, rendu par lot et vignettes)
+- html: Rendu HTML (page autonome ou page du site statique)
+- site: Site statique (une page par groupe, enseignant et salle, index), reconstruit
+  page par page selon les empreintes du manifest,
+  exécutable en ligne de commande: python -m services.export.site
+- ics: Calendriers iCalendar (événements récurrents à UID stable)
+- feeds: Flux ICS par groupe et par enseignant, réécrits seulement s'ils ont changé,
+  exécutable en ligne de commande: python -m services.export.feeds
+- cache: Cache des fichiers rendus adressé par contenu (éviction LRU par taille et âge)
+- bulk: Export groupé parallèle de toutes les grilles (dossier daté ou zip, manifest),
+  exécutable en ligne de commande: python -m services.export.bulk
+- benchmark: Durée et pic de mémoire du rendu d'un gros classeur Excel ou livret PDF,
+  exécutable en ligne de commande: python -m services.export.benchmark
+
+Un nouveau format s'ajoute avec register_renderer(format, fonction), la
+fonction recevant (grilles, chemin) et renvoyant le chemin écrit.
+"""
+
+import os
+from datetime import datetime
+
+from .model import (
+    TimetableGrid, build_filiere_grids, build_group_grid, build_instructor_grid, build_room_grid,
+    FILIERE, GROUP, INSTRUCTOR, ROOM, DAYS, TIME_SLOTS,
+)
+from .pdf import render_pdf
+from .xlsx import render_xlsx
+from .png import render_png
+from .ics import render_ics
+from .html import render_html
+
+# Moteurs de rendu par format (extension du fichier)
+RENDERERS = {
+    "pdf": render_pdf,
+    "xlsx": render_xlsx,
+    "png": render_png,
+    "ics": render_ics,
+    "html": render_html,
+}
+
+
+def register_renderer(fmt, renderer):
+    """Ajoute (ou remplace) le moteur de rendu d'un format."""
+    RENDERERS[fmt] = renderer
+
+
+def render(grids, fmt, path):
+    """
+    Rend des grilles dans le format demandé.
+
+    Raises:
+        ValueError: Format inconnu
+        ImportError: Bibliothèque du format non installée
+    """
+    if fmt not in RENDERERS:
+        raise ValueError(f"Format d'export inconnu: {fmt}")
+    return RENDERERS[fmt](grids, path)
+
+
+def export_path(filename, timestamp=False):
+    """
+    Chemin dans le dossier exports/ du répertoire courant (créé au besoin).
+
+    Args:
+        filename (str): Nom du fichier
+        timestamp (bool): Ajouter un horodatage avant l'extension
+    """
+    if timestamp:
+        base, ext = os.path.splitext(filename)
+        filename = f"{base}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{ext}"
+    exports_dir = os.path.join(os.getcwd(), "exports")
+    os.makedirs(exports_dir, exist_ok=True)
+    return os.path.join(exports_dir, filename)
+
+
+__all__ = [
+    'TimetableGrid',
+    'build_filiere_grids',
+    'build_group_grid',
+    'build_instructor_grid',
+    'build_room_grid',
+    'FILIERE',
+    'GROUP',
+    'INSTRUCTOR',
+    'ROOM',
+    'DAYS',
+    'TIME_SLOTS',
+    'RENDERERS',
+    'register_renderer',
+    'render',
+    'export_path'
+]
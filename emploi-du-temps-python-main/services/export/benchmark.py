@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Mesure du rendu d'un gros document (classeur Excel ou livret PDF): durée et
+pic de mémoire (RSS).
+
+Chaque mesure est faite dans un processus neuf, sur des grilles synthétiques
+(aucune base nécessaire), en mode flux (write-only / page par page) puis en
+mode document construit en mémoire pour comparaison.
+
+Utilisation:
+    python -m services.export.benchmark --format xlsx --sheets 500
+    python -m services.export.benchmark --format pdf --sheets 500
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from services.export.model import TimetableGrid, GROUP, DAYS, TIME_SLOTS
+from services.export.pdf import render_pdf
+from services.export.xlsx import render_xlsx
+
+# Moteurs de rendu disposant d'un mode flux (paramètre streaming)
+STREAMING_RENDERERS = {"xlsx": render_xlsx, "pdf": render_pdf}
+
+
+def synthetic_grids(count, slots_per_grid=20, seed=0):
+    """Grilles de groupe synthétiques, générées à la demande."""
+    rng = random.Random(seed)
+    for index in range(count):
+        slots = [{
+            "day": rng.choice(DAYS)[0],
+            "start_hour": rng.choice(TIME_SLOTS)[1],
+            "duration": 2,
+            "subject": f"Matière {rng.randrange(200)}",
+            "room": f"Salle {rng.randrange(80)}",
+            "group_name": f"Groupe {index}",
+            "instructor": f"Enseignant {rng.randrange(300)}",
+        } for _ in range(slots_per_grid)]
+        yield TimetableGrid(GROUP, f"Groupe {index}", slots)
+
+
+def _peak_rss_mb():
+    """Pic de mémoire résidente du processus courant (Mo), ou None si indisponible."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilo-octets sous Linux, octets sous macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _measure(fmt, sheets, streaming):
+    """Mesure dans le processus courant (lancé par run_benchmark)."""
+    start_rss = _peak_rss_mb()
+    fd, path = tempfile.mkstemp(suffix=f".{fmt}")
+    os.close(fd)
+    try:
+        start = time.perf_counter()
+        STREAMING_RENDERERS[fmt](synthetic_grids(sheets), path, streaming=streaming)
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(path)
+    finally:
+        os.remove(path)
+    peak = _peak_rss_mb()
+    return {"format": fmt, "mode": "flux" if streaming else "mémoire", "sheets": sheets, "seconds": round(elapsed, 2),
+            "peak_rss_mb": round(peak, 1) if peak is not None else None,
+            "start_rss_mb": round(start_rss, 1) if start_rss is not None else None,
+            "file_kb": round(size / 1024)}
+
+
+def run_benchmark(fmt="xlsx", sheets=500):
+    """
+    Mesure les deux modes d'un format, chacun dans un processus neuf.
+
+    Returns:
+        list: [{"format", "mode", "sheets", "seconds", "peak_rss_mb", "start_rss_mb", "file_kb"}, ...]
+    """
+    results = []
+    for streaming in (True, False):
+        args = [sys.executable, "-m", "services.export.benchmark", "--format", fmt,
+                "--sheets", str(sheets), "--child"]
+        if not streaming:
+            args.append("--in-memory")
+        output = subprocess.run(args, check=True, capture_output=True, text=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du rendu d'un gros document (durée et pic RSS)")
+    parser.add_argument("--format", choices=sorted(STREAMING_RENDERERS), default="xlsx", help="Format rendu")
+    parser.add_argument("--sheets", type=int, default=500, help="Nombre de grilles (feuilles ou pages)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--in-memory", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(_measure(args.format, args.sheets, streaming=not args.in_memory)))
+        return
+
+    print(f"{'Mode':<10}{'Grilles':>10}{'Durée (s)':>12}{'Pic RSS (Mo)':>15}{'Fichier (Ko)':>15}")
+    for result in run_benchmark(args.format, args.sheets):
+        print(f"{result['mode']:<10}{result['sheets']:>10}{result['seconds']:>12}"
+              f"{str(result['peak_rss_mb']):>15}{result['file_kb']:>15}")
+
+
+if __name__ == "__main__":
+    main()
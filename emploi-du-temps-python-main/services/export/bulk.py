@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+Export groupé de toutes les grilles (filières, enseignants, groupes) dans tous les formats.
+
+Les grilles sont construites dans le processus principal à partir d'une seule
+lecture de la grille matérialisée, puis rendues en parallèle par un pool de
+processus (le rendu PDF/Excel/PNG est limité par le CPU). Chaque exécution écrit
+dans un dossier daté (ou une archive zip) accompagné d'un manifest.json; une
+grille dont l'empreinte n'a pas changé depuis l'export précédent n'est pas
+rendue à nouveau: son fichier est recopié depuis l'export précédent.
+
+Les images PNG sont rendues par lots (un lot par processus, avec
+render_png_batch: polices et fonds de grille chargés une fois par lot). Avec
+une largeur de vignette, chaque grille reçoit aussi une vignette PNG dans le
+dossier thumbnails/ de l'export.
+
+Utilisation en ligne de commande:
+    python -m services.export.bulk [--formats pdf,xlsx,png] [--zip] [--workers N] [--thumbnails 320]
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import unicodedata
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import database
+from database import getConnection
+from services.grid import fetch_slots
+from services.export import render, RENDERERS
+from services.export.model import TimetableGrid, FILIERE, GROUP, INSTRUCTOR, ROOM, FILIERE_NOTES, LAYOUT_VERSION
+from services.export.png import render_png_batch
+
+BULK_DIR = "bulk"
+LATEST_FILE = "latest.json"
+
+# Format des vignettes dans le manifest (fichiers PNG sous THUMBNAILS_DIR)
+THUMBNAIL = "thumbnail"
+THUMBNAILS_DIR = "thumbnails"
+
+
+def _slug(text):
+    """Nom de fichier ASCII (accents retirés, séparateurs normalisés)."""
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode()
+    return re.sub(r"[^A-Za-z0-9]+", "_", text).strip("_") or "sans_nom"
+
+
+def collect_grids(kinds=(FILIERE, INSTRUCTOR, GROUP)):
+    """
+    Grilles de toutes les filières, enseignants actifs, groupes actifs et salles actives
+    (selon `kinds`), en une lecture de la grille matérialisée.
+
+    Returns:
+        list: [(clé, TimetableGrid), ...] où clé vaut "filiere/<slug>", "instructor/<id>",
+              "group/<id>" ou "room/<id>"
+    """
+    conn = getConnection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT DISTINCT filiere FROM groups WHERE filiere IS NOT NULL ORDER BY filiere")
+    filieres = [row['filiere'] for row in cursor.fetchall()]
+    entities = {}
+    for kind, table in ((INSTRUCTOR, "instructors"), (GROUP, "groups"), (ROOM, "rooms")):
+        if kind in kinds:
+            cursor.execute(f"SELECT id, name FROM {table} WHERE active = 1 ORDER BY id")
+            entities[kind] = cursor.fetchall()
+    conn.close()
+
+    slots_by = {FILIERE: {}, INSTRUCTOR: {}, GROUP: {}, ROOM: {}}
+    for slot in fetch_slots():
+        slots_by[FILIERE].setdefault(slot['filiere'], []).append(slot)
+        slots_by[INSTRUCTOR].setdefault(slot['instructor_id'], []).append(slot)
+        slots_by[GROUP].setdefault(slot['group_id'], []).append(slot)
+        slots_by[ROOM].setdefault(slot['room_id'], []).append(slot)
+
+    grids = []
+    if FILIERE in kinds:
+        grids += [(f"{FILIERE}/{_slug(name)}",
+                   TimetableGrid(FILIERE, name, slots_by[FILIERE].get(name, []), FILIERE_NOTES))
+                  for name in filieres]
+    for kind in (INSTRUCTOR, GROUP, ROOM):
+        grids += [(f"{kind}/{row['id']}", TimetableGrid(kind, row['name'], slots_by[kind].get(row['id'], [])))
+                  for row in entities.get(kind, [])]
+    return grids
+
+
+def entity_file_name(key, grid, fmt):
+    """Chemin relatif d'un fichier dans l'export: <type>/<nom>[_<id>].<format>."""
+    kind, ident = key.split("/", 1)
+    name = _slug(grid.label) if kind == FILIERE else f"{_slug(grid.label)}_{ident}"
+    return f"{kind}/{name}.{fmt}"
+
+
+def _render_job(grid, fmt, path):
+    """Rendu d'un fichier (exécuté dans un processus du pool)."""
+    try:
+        render([grid], fmt, path)
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+    return None
+
+
+def _render_png_batch_job(items, thumbnail_width):
+    """Rendu d'un lot d'images PNG [(grille, chemin), ...] (exécuté dans un processus du pool)."""
+    try:
+        render_png_batch(items, thumbnail_width)
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+    return None
+
+
+def _load_latest(root):
+    """Manifest de l'export précédent (avec le chemin de sa sortie), ou None."""
+    try:
+        with open(os.path.join(root, LATEST_FILE), encoding="utf-8") as f:
+            latest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return latest if os.path.exists(latest.get("output", "")) else None
+
+
+def _copy_previous(previous, name, target):
+    """Recopie un fichier de l'export précédent (dossier ou archive). Renvoie False s'il manque."""
+    output = previous["output"]
+    try:
+        if output.endswith(".zip"):
+            with zipfile.ZipFile(output) as archive, archive.open(name) as src, open(target, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+        else:
+            shutil.copy2(os.path.join(output, name), target)
+    except (OSError, KeyError):
+        return False
+    return True
+
+
+def bulk_export(formats=None, archive=False, workers=None, force=False, root=None, thumbnail_width=None):
+    """
+    Exporte toutes les grilles dans tous les formats demandés.
+
+    Args:
+        formats (list, optional): Formats à produire (défaut: tous les moteurs enregistrés)
+        archive (bool): Produire une archive zip au lieu d'un dossier
+        workers (int, optional): Nombre de processus de rendu (défaut: nombre de CPU)
+        force (bool): Rendre à nouveau toutes les grilles, même inchangées
+        root (str, optional): Dossier racine des exports groupés (défaut: exports/bulk)
+        thumbnail_width (int, optional): Largeur (pixels) des vignettes PNG; None = pas de vignettes
+
+    Returns:
+        dict: {"success", "message", "output", "rendered", "unchanged", "errors"}
+    """
+    formats = list(formats or RENDERERS)
+    unknown = [fmt for fmt in formats if fmt not in RENDERERS]
+    if unknown:
+        return {"success": False, "message": f"Format(s) d'export inconnu(s): {', '.join(unknown)}",
+                "output": None, "rendered": 0, "unchanged": 0, "errors": []}
+
+    root = root or os.path.join(os.getcwd(), "exports", BULK_DIR)
+    base_dir = output_dir = os.path.join(root, datetime.now().strftime("%Y%m%d_%H%M%S"))
+    suffix = 2
+    while os.path.exists(output_dir) or os.path.exists(output_dir + ".zip"):
+        output_dir = f"{base_dir}-{suffix}"
+        suffix += 1
+
+    previous = None if force else _load_latest(root)
+    previous_hashes = {(entry["key"], entry["format"]): entry["hash"]
+                       for entry in (previous or {}).get("files", [])}
+
+    entries, jobs = [], []
+    for key, grid in collect_grids():
+        digest = grid.digest()
+        files = [(fmt, entity_file_name(key, grid, fmt), digest) for fmt in formats]
+        if thumbnail_width:
+            # La largeur fait partie de l'empreinte: une autre largeur rend à nouveau les vignettes
+            files.append((THUMBNAIL, f"{THUMBNAILS_DIR}/{entity_file_name(key, grid, 'png')}",
+                          f"{digest}|{thumbnail_width}"))
+        for fmt, name, file_hash in files:
+            target = os.path.join(output_dir, name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            entry = {"key": key, "kind": grid.kind, "label": grid.label, "format": fmt,
+                     "file": name, "hash": file_hash, "slots": len(grid.slots)}
+            if previous_hashes.get((key, fmt)) == file_hash and _copy_previous(previous, name, target):
+                entry["status"] = "unchanged"
+            else:
+                entry["status"] = "rendered"
+                jobs.append((entry, grid, fmt, target))
+            entries.append(entry)
+
+    errors = []
+    if jobs:
+        # Images et vignettes: un lot par processus et par largeur
+        batch_size = workers or os.cpu_count() or 1
+        batches = []
+        for fmt, width in (("png", None), (THUMBNAIL, thumbnail_width)):
+            png_jobs = [job for job in jobs if job[2] == fmt]
+            batches += [(png_jobs[i::batch_size], width) for i in range(min(batch_size, len(png_jobs)))]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [([entry], pool.submit(_render_job, grid, fmt, target))
+                       for entry, grid, fmt, target in jobs if fmt not in ("png", THUMBNAIL)]
+            futures += [([entry for entry, _, _, _ in batch],
+                         pool.submit(_render_png_batch_job, [(grid, target) for _, grid, _, target in batch], width))
+                        for batch, width in batches]
+            for batch_entries, future in futures:
+                error = future.result()
+                if error:
+                    for entry in batch_entries:
+                        entry["status"] = "error"
+                        entry["error"] = error
+                        errors.append(f"{entry['file']}: {error}")
+
+    rendered = sum(1 for entry in entries if entry["status"] == "rendered")
+    unchanged = sum(1 for entry in entries if entry["status"] == "unchanged")
+    manifest = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "layout_version": LAYOUT_VERSION,
+        "formats": formats,
+        "thumbnail_width": thumbnail_width,
+        "rendered": rendered,
+        "unchanged": unchanged,
+        "files": entries,
+    }
+    with open(os.path.join(output_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    output = output_dir
+    if archive:
+        output = shutil.make_archive(output_dir, "zip", output_dir)
+        shutil.rmtree(output_dir)
+
+    # Les fichiers en erreur ne sont pas repris tels quels à l'export suivant
+    latest = dict(manifest, output=output,
+                  files=[entry for entry in entries if entry["status"] != "error"])
+    with open(os.path.join(root, LATEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(latest, f, ensure_ascii=False, indent=2)
+
+    message = f"Export groupé : {rendered} fichier(s) rendu(s), {unchanged} inchangé(s)"
+    if errors:
+        message += f", {len(errors)} erreur(s)"
+    return {"success": not errors, "message": f"{message} -> {output}", "output": output,
+            "rendered": rendered, "unchanged": unchanged, "errors": errors}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export groupé de toutes les grilles")
+    parser.add_argument("--formats", default=",".join(RENDERERS),
+                        help=f"Formats séparés par des virgules ({', '.join(RENDERERS)})")
+    parser.add_argument("--zip", action="store_true", help="Produire une archive zip")
+    parser.add_argument("--workers", type=int, help="Nombre de processus de rendu")
+    parser.add_argument("--force", action="store_true", help="Rendre à nouveau les grilles inchangées")
+    parser.add_argument("--thumbnails", type=int, metavar="LARGEUR",
+                        help="Produire aussi une vignette PNG de cette largeur (pixels) par grille")
+    parser.add_argument("--db", default=database.DB_NAME, help="Base SQLite")
+    args = parser.parse_args()
+
+    database.DB_NAME = os.path.abspath(args.db)
+    database.setup()
+    result = bulk_export([fmt for fmt in args.formats.split(",") if fmt], archive=args.zip,
+                         workers=args.workers, force=args.force, thumbnail_width=args.thumbnails)
+    print(result["message"])
+    for error in result["errors"]:
+        print(f"  ! {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Cache des fichiers d'export, adressé par contenu.
+
+Un fichier rendu est rangé dans exports/cache sous l'empreinte de
+(format, empreinte de chaque grille): tant que l'emploi du temps de l'entité
+n'a pas changé, la même demande d'export renvoie le fichier existant sans
+nouveau rendu. Le fichier demandé par l'utilisateur (exports/<nom>) est une
+copie de l'entrée du cache, remplacée à chaque export: le dossier exports/ ne
+grossit plus à chaque clic, et modifier le fichier exporté ne touche pas au cache.
+
+Éviction LRU: la date de modification d'une entrée est remise à jour à chaque
+utilisation; les entrées plus anciennes que max_age sont supprimées, puis les
+moins récemment utilisées tant que la taille totale dépasse max_bytes.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+
+from services.export import render, export_path
+
+CACHE_DIR = "cache"
+
+# Limites par défaut
+MAX_CACHE_BYTES = 200 * 1024 * 1024
+MAX_CACHE_AGE = 30 * 24 * 3600
+
+
+class ExportCache:
+    """
+    Cache des exports rendus, borné en taille et en âge.
+
+    Attributes:
+        directory (str): Dossier des entrées (une entrée = un fichier <empreinte>.<format>)
+        max_bytes (int): Taille totale maximale du cache
+        max_age (float): Âge maximal (secondes depuis la dernière utilisation)
+        hits (int): Demandes servies depuis le cache
+        misses (int): Demandes ayant nécessité un rendu
+    """
+
+    def __init__(self, directory=None, max_bytes=MAX_CACHE_BYTES, max_age=MAX_CACHE_AGE):
+        self.directory = directory or os.path.join(os.getcwd(), "exports", CACHE_DIR)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(grids, fmt):
+        """Empreinte d'un export: format et contenu de chaque grille, dans l'ordre."""
+        digest = hashlib.sha256(fmt.encode("utf-8"))
+        for grid in grids:
+            digest.update(grid.digest().encode("ascii"))
+        return digest.hexdigest()
+
+    def _entry(self, key, fmt):
+        return os.path.join(self.directory, f"{key}.{fmt}")
+
+    def get(self, grids, fmt):
+        """Entrée du cache pour ces grilles (rendue au besoin), marquée comme utilisée."""
+        entry = self._entry(self.key(grids, fmt), fmt)
+        if os.path.exists(entry):
+            os.utime(entry)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        os.makedirs(self.directory, exist_ok=True)
+        # Rendu dans un fichier temporaire puis renommage: une entrée n'est jamais lue à moitié écrite
+        fd, tmp = tempfile.mkstemp(suffix=f".{fmt}", dir=self.directory)
+        os.close(fd)
+        try:
+            render(grids, fmt, tmp)
+            os.replace(tmp, entry)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        self.evict(keep=entry)
+        return entry
+
+    def evict(self, keep=None):
+        """
+        Supprime les entrées expirées puis les moins récemment utilisées au-delà de max_bytes.
+
+        Returns:
+            int: Nombre d'entrées supprimées
+        """
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return 0
+        entries = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        now = time.time()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for mtime, size, path in entries:
+            if path == keep:
+                continue
+            if now - mtime <= self.max_age and total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        """Vide le cache."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+_default_cache = None
+
+
+def get_cache():
+    """Cache partagé par les contrôleurs."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ExportCache()
+    return _default_cache
+
+
+def cached_export(grids, fmt, filename):
+    """
+    Export servi par le cache, publié sous exports/<filename>.
+
+    Args:
+        grids (list): Grilles à rendre
+        fmt (str): Format (clé de RENDERERS)
+        filename (str): Nom du fichier dans exports/ (remplacé s'il existe)
+
+    Returns:
+        str: Chemin de exports/<filename>
+
+    Raises:
+        ImportError: Bibliothèque du format non installée (uniquement si un rendu est nécessaire)
+    """
+    entry = get_cache().get(grids, fmt)
+    path = export_path(filename)
+    tmp = f"{path}.tmp"
+    if os.path.lexists(tmp):
+        os.remove(tmp)
+    # Copie et non lien physique: une modification du fichier exporté altérerait l'entrée du cache
+    shutil.copyfile(entry, tmp)
+    os.replace(tmp, path)
+    return path
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Flux iCalendar par groupe et par enseignant.
+
+Un fichier .ics par groupe actif et par enseignant actif, à chemin fixe pour
+les abonnements. Seuls les flux dont les créneaux (ou les bornes du semestre)
+ont changé depuis la génération précédente sont réécrits; dans un flux
+réécrit, le SEQUENCE des événements modifiés est incrémenté et celui des
+autres conservé (état dans feeds.json).
+
+Utilisation en ligne de commande:
+    python -m services.export.feeds [--start 2026-02-02] [--end 2026-06-05]
+"""
+
+import argparse
+import json
+import os
+from datetime import date, datetime, timezone
+
+import database
+from services.export.bulk import collect_grids, entity_file_name
+from services.export.ics import SEMESTER_START, SEMESTER_END, iter_calendar, write_calendar, event_uids
+from services.export.model import GROUP, INSTRUCTOR
+
+FEEDS_DIR = "ics"
+STATE_FILE = "feeds.json"
+
+
+def _load_state(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def generate_feeds(start=SEMESTER_START, end=SEMESTER_END, root=None, force=False):
+    """
+    Met à jour un fichier .ics par groupe actif et par enseignant actif.
+
+    Un flux n'est réécrit que si ses créneaux (ou les bornes du semestre) ont changé
+    depuis la génération précédente; les chemins restent fixes pour les abonnements.
+
+    Args:
+        start, end (date): Bornes du semestre
+        root (str, optional): Dossier des flux (défaut: exports/ics)
+        force (bool): Réécrire tous les flux
+
+    Returns:
+        dict: {"success", "message", "written", "unchanged", "removed", "directory"}
+    """
+    if end < start:
+        return {"success": False, "message": "La fin du semestre précède son début.",
+                "written": 0, "unchanged": 0, "removed": 0, "directory": None}
+
+    root = root or os.path.join(os.getcwd(), "exports", FEEDS_DIR)
+    state_path = os.path.join(root, STATE_FILE)
+    state = {} if force else _load_state(state_path)
+    feeds = {}
+    now = datetime.now(timezone.utc)
+    written = unchanged = 0
+
+    for key, grid in collect_grids():
+        if grid.kind not in (GROUP, INSTRUCTOR):
+            continue
+        name = entity_file_name(key, grid, "ics")
+        path = os.path.join(root, name)
+        digest = f"{grid.digest()}|{start.isoformat()}|{end.isoformat()}"
+        previous = state.get(key, {})
+        if previous.get("hash") == digest and previous.get("file") == name and os.path.exists(path):
+            feeds[key] = previous
+            unchanged += 1
+            continue
+
+        sequences = previous.get("events", {})
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_calendar(iter_calendar([grid], start, end, sequences, now), path)
+        current = set(event_uids(grid.slots))
+        feeds[key] = {"hash": digest, "file": name,
+                      "events": {uid: value for uid, value in sequences.items() if uid in current}}
+        written += 1
+
+    # Flux des groupes ou enseignants disparus (ou renommés)
+    kept = {feed["file"] for feed in feeds.values()}
+    removed = 0
+    for key, feed in state.items():
+        if feed.get("file") not in kept:
+            try:
+                os.remove(os.path.join(root, feed["file"]))
+                removed += 1
+            except OSError:
+                pass
+
+    os.makedirs(root, exist_ok=True)
+    with open(state_path, "w", encoding="utf-8") as f:
+        json.dump(feeds, f, ensure_ascii=False)
+
+    return {"success": True,
+            "message": f"Flux ICS : {written} écrit(s), {unchanged} inchangé(s), {removed} supprimé(s) -> {root}",
+            "written": written, "unchanged": unchanged, "removed": removed, "directory": root}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flux iCalendar par groupe et par enseignant")
+    parser.add_argument("--start", type=date.fromisoformat, default=SEMESTER_START,
+                        help="Début du semestre (AAAA-MM-JJ)")
+    parser.add_argument("--end", type=date.fromisoformat, default=SEMESTER_END,
+                        help="Fin du semestre (AAAA-MM-JJ)")
+    parser.add_argument("--force", action="store_true", help="Réécrire tous les flux")
+    parser.add_argument("--db", default=database.DB_NAME, help="Base SQLite")
+    args = parser.parse_args()
+
+    database.DB_NAME = os.path.abspath(args.db)
+    database.setup()
+    print(generate_feeds(args.start, args.end, force=args.force)["message"])
+
+
+if __name__ == "__main__":
+    main()
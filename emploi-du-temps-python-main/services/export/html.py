@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""Rendu HTML des grilles (page autonome, ou page d'un site statique avec feuille de style partagée)."""
+
+from datetime import datetime
+from html import escape
+
+from services.export.model import INSTITUTION, FACULTY
+
+STYLESHEET = """
+body { font-family: "Segoe UI", Arial, sans-serif; margin: 2em; color: #222; }
+header { text-align: center; margin-bottom: 1em; }
+h1 { font-size: 1.1em; font-weight: normal; margin: 0; }
+h2 { font-size: 1.2em; margin: 0.4em 0; }
+nav { margin-bottom: 1em; }
+table.edt { border-collapse: collapse; width: 100%; table-layout: fixed; }
+table.edt th, table.edt td { border: 1px solid #000; padding: 4px; text-align: center; vertical-align: middle; font-size: 0.8em; }
+table.edt thead th { background: #4472c4; color: #fff; }
+table.edt tbody th { background: #d9e2f3; width: 8em; }
+table.edt td .entry + .entry { margin-top: 0.6em; }
+table.edt td .title { font-weight: bold; }
+.notes { font-style: italic; font-size: 0.85em; }
+.generated { text-align: right; color: #888; font-size: 0.75em; }
+ul.index { columns: 3; }
+"""
+
+
+def _cell(grid, day_idx, slot_idx):
+    entries = []
+    for entry in grid.entries(day_idx, slot_idx):
+        title, *details = grid.entry_lines(entry)
+        lines = [f'<div class="title">{escape(title)}</div>'] + [f"<div>{escape(line)}</div>" for line in details]
+        entries.append(f'<div class="entry">{"".join(lines)}</div>')
+    return f"<td>{''.join(entries)}</td>"
+
+
+def grid_section(grid):
+    """Fragment HTML d'une grille (titres, tableau, remarques)."""
+    parts = [
+        "<section>",
+        f"<header><h1>{escape(INSTITUTION)}<br>{escape(FACULTY)}</h1>",
+        f"<h2>{escape(grid.title)}</h2><h2>{escape(grid.subtitle)}</h2></header>",
+        '<table class="edt"><thead><tr><th>JOURS</th>',
+        "".join(f"<th>{escape(label)}</th>" for label in grid.slot_labels),
+        "</tr></thead><tbody>",
+    ]
+    for day_idx, day_label in enumerate(grid.day_labels):
+        parts.append(f"<tr><th>{escape(day_label)}</th>")
+        parts.extend(_cell(grid, day_idx, slot_idx) for slot_idx in range(len(grid.slot_labels)))
+        parts.append("</tr>")
+    parts.append("</tbody></table>")
+    if grid.notes:
+        parts.append(f'<p class="notes">N.B : {"<br>".join(escape(note) for note in grid.notes)}</p>')
+    parts.append("</section>")
+    return "".join(parts)
+
+
+def html_page(title, body, stylesheet=None, generated_at=None):
+    """
+    Page HTML complète.
+
+    Args:
+        title (str): Titre de la page
+        body (str): Contenu (HTML)
+        stylesheet (str, optional): Lien vers une feuille de style partagée; sinon les styles sont intégrés
+        generated_at (str, optional): Date affichée en pied de page
+    """
+    style = (f'<link rel="stylesheet" href="{escape(stylesheet)}">' if stylesheet
+             else f"<style>{STYLESHEET}</style>")
+    footer = f'<p class="generated">Mis à jour le {escape(generated_at)}</p>' if generated_at else ""
+    return (f'<!DOCTYPE html>\n<html lang="fr"><head><meta charset="utf-8">'
+            f'<meta name="viewport" content="width=device-width, initial-scale=1">'
+            f"<title>{escape(title)}</title>{style}</head><body>{body}{footer}</body></html>\n")
+
+
+def render_html(grids, path):
+    """Écrit les grilles dans une page HTML autonome (styles intégrés)."""
+    grids = list(grids)
+    title = grids[0].subtitle if len(grids) == 1 else "Emploi du Temps - FST Tanger"
+    body = "".join(grid_section(grid) for grid in grids)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(html_page(title, body, generated_at=datetime.now().strftime('%d/%m/%Y %H:%M')))
+    return path
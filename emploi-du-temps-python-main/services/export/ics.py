@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+Flux iCalendar (ICS) des emplois du temps.
+
+Chaque créneau hebdomadaire devient un seul événement récurrent (RRULE
+FREQ=WEEKLY jusqu'à la fin du semestre) au lieu d'une occurrence par semaine.
+Les calendriers sont produits ligne par ligne par des générateurs et écrits
+en flux.
+
+Les horaires sont ceux des libellés affichés dans les grilles (10h ->
+10h45-12h15, Vendredi après-midi à 15h00), pas les heures entières en base.
+
+L'UID d'un événement est dérivé de son identité (groupe, matière, rang de la
+séance dans la semaine) et non de l'id de la ligne timetable, qui change à
+chaque publication, ni de son horaire: une séance déplacée garde son UID et
+son SEQUENCE est incrémenté, le client met l'événement à jour au lieu de le
+supprimer puis d'en créer un autre. Les flux par groupe et par enseignant sont
+tenus à jour par services.export.feeds.
+"""
+
+import hashlib
+import json
+import os
+from datetime import date, datetime, timedelta, timezone
+
+from services.export.model import INSTRUCTOR, slot_bounds
+
+# Semestre 6 (2025/2026) par défaut
+SEMESTER_START = date(2026, 2, 2)
+SEMESTER_END = date(2026, 6, 5)
+
+PRODID = "-//FST Tanger//Emploi du temps//FR"
+UID_DOMAIN = "edt.fst-tanger"
+TIMEZONE = "Africa/Casablanca"
+
+# Longueur maximale d'une ligne (octets, hors CRLF)
+_LINE_LIMIT = 75
+
+
+def _escape(text):
+    """Échappement d'une valeur TEXT (RFC 5545 §3.3.11)."""
+    return (str(text).replace("\\", "\\\\").replace(";", "\\;")
+            .replace(",", "\\,").replace("\n", "\\n"))
+
+
+def _fold(line):
+    """Coupe une ligne en segments de 75 octets au plus (sans couper un caractère UTF-8)."""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= _LINE_LIMIT:
+        yield line
+        return
+    chunk, size, limit = [], 0, _LINE_LIMIT
+    for char in line:
+        width = len(char.encode("utf-8"))
+        if size + width > limit:
+            yield "".join(chunk)
+            # Les lignes de continuation commencent par une espace
+            chunk, size, limit = [" "], 1, _LINE_LIMIT
+        chunk.append(char)
+        size += width
+    yield "".join(chunk)
+
+
+def _stamp(moment):
+    return moment.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def event_uids(slots, occurrences=None):
+    """
+    UIDs stables des créneaux (même ordre que `slots`).
+
+    Les séances d'une même matière pour un même groupe sont numérotées dans
+    l'ordre de la semaine: l'UID ne dépend ni de l'id de la ligne ni de l'horaire,
+    et reste le même quand une séance est déplacée.
+
+    Args:
+        occurrences (dict, optional): Compteur {identité: séances vues} partagé
+            entre plusieurs grilles d'un même calendrier (UIDs uniques)
+    """
+    occurrences = {} if occurrences is None else occurrences
+    uids = [None] * len(slots)
+    for index in sorted(range(len(slots)), key=lambda i: (slots[i]['day'], slots[i]['start_hour'])):
+        slot = slots[index]
+        identity = f"{slot['group_name']}|{slot['subject']}"
+        rank = occurrences.get(identity, 0)
+        occurrences[identity] = rank + 1
+        uid = hashlib.sha1(f"{identity}|{rank}".encode("utf-8")).hexdigest()[:20]
+        uids[index] = f"{uid}@{UID_DOMAIN}"
+    return uids
+
+
+def _event_hash(slot, start, end):
+    payload = [slot[key] for key in ("day", "start_hour", "duration", "subject", "room",
+                                     "group_name", "instructor")] + [start.isoformat(), end.isoformat()]
+    return hashlib.sha1(json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+
+def _first_date(start, day):
+    """Premier jour du semestre tombant le jour `day` (1 = Lundi)."""
+    return start + timedelta(days=(day - 1 - start.weekday()) % 7)
+
+
+def iter_events(grid, start, end, sequences=None, now=None, occurrences=None):
+    """
+    Lignes VEVENT (non pliées) des créneaux d'une grille.
+
+    Args:
+        grid (TimetableGrid): Grille (ses créneaux sont tous exportés, même hors colonnes)
+        start, end (date): Bornes du semestre
+        sequences (dict, optional): {uid: [empreinte, sequence, dtstamp]} mis à jour en place;
+            SEQUENCE est incrémenté quand l'empreinte d'un événement change
+        now (datetime, optional): Horodatage des événements nouveaux ou modifiés
+        occurrences (dict, optional): Compteur partagé de event_uids()
+    """
+    now = now or datetime.now(timezone.utc)
+    for slot, uid in zip(grid.slots, event_uids(grid.slots, occurrences)):
+        first = _first_date(start, slot['day'])
+        if first > end:
+            continue
+        digest = _event_hash(slot, start, end)
+        sequence, dtstamp = 0, _stamp(now)
+        if sequences is not None:
+            known = sequences.get(uid)
+            if known and known[0] == digest:
+                sequence, dtstamp = known[1], known[2]
+            elif known:
+                sequence = known[1] + 1
+            sequences[uid] = [digest, sequence, dtstamp]
+
+        begin_minutes, end_minutes = slot_bounds(slot['day'], slot['start_hour'], slot['duration'])
+        midnight = datetime.combine(first, datetime.min.time())
+        begin = midnight + timedelta(minutes=begin_minutes)
+        finish = midnight + timedelta(minutes=end_minutes)
+        if grid.kind == INSTRUCTOR:
+            summary = f"{slot['subject']} - {slot['group_name']}"
+        else:
+            summary = slot['subject']
+        description = "\\n".join(_escape(text) for text in (f"Groupe : {slot['group_name']}",
+                                                            f"Enseignant : {slot['instructor']}"))
+
+        yield "BEGIN:VEVENT"
+        yield f"UID:{uid}"
+        yield f"DTSTAMP:{dtstamp}"
+        yield f"SEQUENCE:{sequence}"
+        # Heures locales "flottantes" (sans fuseau), répétées chaque semaine jusqu'à la fin du semestre
+        yield f"DTSTART:{begin.strftime('%Y%m%dT%H%M%S')}"
+        yield f"DTEND:{finish.strftime('%Y%m%dT%H%M%S')}"
+        yield f"RRULE:FREQ=WEEKLY;UNTIL={end.strftime('%Y%m%d')}T235959"
+        yield f"SUMMARY:{_escape(summary)}"
+        yield f"LOCATION:{_escape(slot['room'])}"
+        yield f"DESCRIPTION:{description}"
+        yield "END:VEVENT"
+
+
+def iter_calendar(grids, start=SEMESTER_START, end=SEMESTER_END, sequences=None, now=None):
+    """Lignes (pliées, sans fin de ligne) d'un VCALENDAR contenant les événements des grilles."""
+    grids = list(grids)
+    name = grids[0].subtitle if len(grids) == 1 else "Emploi du Temps - FST Tanger"
+    header = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{_escape(name)}",
+        f"X-WR-TIMEZONE:{TIMEZONE}",
+    ]
+    for line in header:
+        yield from _fold(line)
+    occurrences = {}
+    for grid in grids:
+        for line in iter_events(grid, start, end, sequences, now, occurrences):
+            yield from _fold(line)
+    yield "END:VCALENDAR"
+
+
+def write_calendar(lines, path):
+    """Écrit un calendrier en flux (CRLF), de façon atomique pour les clients abonnés."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8", newline="") as f:
+        for line in lines:
+            f.write(line)
+            f.write("\r\n")
+    os.replace(tmp, path)
+    return path
+
+
+def render_ics(grids, path):
+    """Moteur de rendu "ics": un calendrier contenant les créneaux de toutes les grilles."""
+    return write_calendar(iter_calendar(grids), path)
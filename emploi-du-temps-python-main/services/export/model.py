@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+Modèle de grille hebdomadaire commun à tous les formats d'export.
+
+Une grille (filière, groupe ou enseignant) est construite à partir d'une seule
+lecture de la grille matérialisée (services.grid.fetch_slots): les créneaux
+sont rangés en mémoire dans les cellules (jour x créneau horaire), puis passés
+tels quels aux moteurs de rendu (PDF, Excel, PNG...).
+"""
+
+import hashlib
+import json
+
+from database import getConnection
+from services.grid import fetch_slots
+
+# Types de grilles
+FILIERE = "filiere"
+GROUP = "group"
+INSTRUCTOR = "instructor"
+ROOM = "room"
+
+# Valeurs acceptées pour "toutes les filières"
+ALL_FILIERES = ("all", "tout")
+
+INSTITUTION = "Université Abdelmalek Essaâdi"
+FACULTY = "Faculté des Sciences et Techniques - Tanger"
+SEMESTER_TITLE = "Emploi du Temps du Semestre 6 (2025/2026)"
+
+# Jours affichés (numéro en base, libellé)
+DAYS = [(1, "LUNDI"), (2, "MARDI"), (3, "MERCREDI"), (4, "JEUDI"), (5, "VENDREDI"), (6, "SAMEDI")]
+
+# Créneaux affichés (libellé, heure de début en base)
+TIME_SLOTS = [("08h00-09h30", 8), ("09h00-10h30", 9), ("10h45-12h15", 10),
+              ("12h30-14h00", 12), ("14h15-15h45", 14), ("16h00-17h30", 16)]
+
+# Le Vendredi après-midi, les cours commencent à 15h00
+FRIDAY = 5
+SLOT_START_EXCEPTIONS = {(FRIDAY, "14h15-15h45"): 15}
+
+FILIERE_NOTES = [
+    "Les plannings de Travaux Pratiques seront affichés dans les départements concernés.",
+    "Le Vendredi après-midi, les cours commencent à 15h00.",
+]
+
+# Version du gabarit des grilles: à incrémenter quand la mise en page change,
+# pour que les exports déjà produits (cache, export groupé) soient rendus à nouveau
+LAYOUT_VERSION = 1
+
+# Colonnes d'un créneau prises en compte dans l'empreinte d'une grille
+_DIGEST_COLUMNS = ("day", "start_hour", "duration", "subject", "room", "group_name", "instructor")
+
+
+def _slot_columns():
+    """{jour: {heure de début: indice du créneau}} avec l'exception du Vendredi."""
+    columns = {}
+    for day, _ in DAYS:
+        columns[day] = {SLOT_START_EXCEPTIONS.get((day, label), hour): index
+                        for index, (label, hour) in enumerate(TIME_SLOTS)}
+    return columns
+
+
+SLOT_COLUMNS = _slot_columns()
+
+
+def _minutes(text):
+    """"10h45" -> 645 (minutes depuis minuit)."""
+    hours, _, minutes = text.partition("h")
+    return int(hours) * 60 + int(minutes or 0)
+
+
+def slot_bounds(day, start_hour, duration):
+    """
+    Horaires réels d'un créneau, tels qu'affichés dans les grilles.
+
+    Le libellé de la colonne fait foi (10h -> 10h45-12h15); le Vendredi après-midi,
+    le créneau commence à 15h00 et garde la durée de son libellé. Un créneau hors
+    colonnes garde ses heures en base.
+
+    Returns:
+        tuple: (début, fin) en minutes depuis minuit
+    """
+    column = SLOT_COLUMNS.get(day, {}).get(start_hour)
+    if column is None:
+        return start_hour * 60, (start_hour + duration) * 60
+    label = TIME_SLOTS[column][0]
+    begin, end = (_minutes(part) for part in label.split("-"))
+    exception = SLOT_START_EXCEPTIONS.get((day, label))
+    if exception is not None:
+        begin, end = exception * 60, exception * 60 + (end - begin)
+    return begin, end
+
+
+class TimetableGrid:
+    """
+    Grille jours x créneaux d'une filière, d'un groupe, d'un enseignant ou d'une salle.
+
+    Attributes:
+        kind (str): FILIERE, GROUP, INSTRUCTOR ou ROOM
+        label (str): Nom de l'entité (filière, groupe, enseignant ou salle)
+        subtitle (str): Ligne d'identification ("Filière : MID", ...)
+        notes (list): Remarques imprimées sous la grille
+        cells (dict): (indice jour, indice créneau) -> [créneau, ...]
+        slots (list): Créneaux publiés de l'entité (lignes de services.grid.fetch_slots)
+    """
+
+    def __init__(self, kind, label, slots, notes=()):
+        self.kind = kind
+        self.label = label
+        self.slots = slots
+        self.notes = list(notes)
+        self.title = SEMESTER_TITLE
+        self.subtitle = {
+            FILIERE: f"Filière : {label}",
+            GROUP: f"Étudiant ({label})",
+            INSTRUCTOR: f"Enseignant : {label}",
+            ROOM: f"Salle : {label}",
+        }[kind]
+
+        # Rangement en mémoire: un créneau ne commençant pas à l'heure d'une colonne n'est pas affiché
+        day_index = {day: index for index, (day, _) in enumerate(DAYS)}
+        self.cells = {}
+        for slot in slots:
+            column = SLOT_COLUMNS.get(slot['day'], {}).get(slot['start_hour'])
+            if column is not None:
+                self.cells.setdefault((day_index[slot['day']], column), []).append(slot)
+
+    @property
+    def day_labels(self):
+        return [label for _, label in DAYS]
+
+    @property
+    def slot_labels(self):
+        return [label for label, _ in TIME_SLOTS]
+
+    def digest(self):
+        """Empreinte du contenu (gabarit, type, libellé, créneaux): deux grilles identiques ont la même."""
+        rows = sorted(tuple(slot[key] for key in _DIGEST_COLUMNS) for slot in self.slots)
+        payload = json.dumps([LAYOUT_VERSION, self.kind, self.label, self.notes, rows],
+                             ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def entries(self, day_idx, slot_idx):
+        """Créneaux d'une cellule (indices dans DAYS et TIME_SLOTS)."""
+        return self.cells.get((day_idx, slot_idx), [])
+
+    def entry_lines(self, entry):
+        """Lignes affichées pour un créneau: intitulé puis détails selon le type de grille."""
+        if self.kind == FILIERE:
+            return [f"{entry['subject']} ({entry['group_name']})", entry['room']]
+        if self.kind == INSTRUCTOR:
+            return [entry['subject'], entry['group_name'], f"({entry['room']})"]
+        if self.kind == ROOM:
+            return [f"{entry['subject']} ({entry['group_name']})", entry['instructor']]
+        return [entry['subject'], entry['room'], f"({entry['instructor']})"]
+
+    def cell_text(self, day_idx, slot_idx, separator="\n"):
+        """Texte d'une cellule (créneaux séparés par `separator`)."""
+        return separator.join("\n".join(self.entry_lines(entry)) for entry in self.entries(day_idx, slot_idx))
+
+    def rows(self, separator="\n"):
+        """Lignes du tableau: [(jour, [texte de chaque cellule]), ...]."""
+        return [(day_label, [self.cell_text(day_idx, slot_idx, separator) for slot_idx in range(len(TIME_SLOTS))])
+                for day_idx, day_label in enumerate(self.day_labels)]
+
+
+# ----------------------------------------------------------------------
+# Construction
+# ----------------------------------------------------------------------
+
+def build_filiere_grids(filiere_name):
+    """
+    Grilles d'une filière, ou de toutes les filières ("all" / "tout") à partir
+    d'une seule lecture de l'ensemble de la grille.
+
+    Returns:
+        list: [TimetableGrid, ...] (vide si aucune filière n'existe)
+    """
+    if filiere_name.lower() not in ALL_FILIERES:
+        return [TimetableGrid(FILIERE, filiere_name, fetch_slots(filiere=filiere_name), FILIERE_NOTES)]
+
+    conn = getConnection()
+    filieres = [row['filiere'] for row in conn.execute(
+        "SELECT DISTINCT filiere FROM groups WHERE filiere IS NOT NULL ORDER BY filiere")]
+    conn.close()
+
+    by_filiere = {}
+    for slot in fetch_slots():
+        by_filiere.setdefault(slot['filiere'], []).append(slot)
+    return [TimetableGrid(FILIERE, name, by_filiere.get(name, []), FILIERE_NOTES) for name in filieres]
+
+
+def _entity_name(table, entity_id, default):
+    conn = getConnection()
+    row = conn.execute(f"SELECT name FROM {table} WHERE id = ?", (entity_id,)).fetchone()
+    conn.close()
+    return row['name'] if row else default
+
+
+def build_group_grid(group_id):
+    """Grille d'un groupe (emploi du temps étudiant)."""
+    return TimetableGrid(GROUP, _entity_name("groups", group_id, "Groupe Inconnu"),
+                         fetch_slots(group_id=group_id))
+
+
+def build_instructor_grid(instructor_id):
+    """Grille d'un enseignant."""
+    return TimetableGrid(INSTRUCTOR, _entity_name("instructors", instructor_id, "Enseignant"),
+                         fetch_slots(instructor_id=instructor_id))
+
+
+def build_room_grid(room_id):
+    """Grille d'occupation d'une salle."""
+    return TimetableGrid(ROOM, _entity_name("rooms", room_id, "Salle"), fetch_slots(room_id=room_id))
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+Rendu PDF des grilles (une page A4 paysage par grille, format officiel FST Tanger).
+
+Par défaut le document est produit page par page: les éléments d'une grille
+sont placés dans le cadre de la page puis dessinés sur le canevas, qui ne
+conserve que le flux compressé de la page terminée. Seule la grille en cours
+est en mémoire sous forme d'éléments (Table, Paragraph), quel que soit le
+nombre de grilles du livret. Les styles (TableStyle, ParagraphStyle) sont
+construits une fois et partagés par toutes les pages.
+
+Mesure: python -m services.export.benchmark --format pdf --sheets 500
+"""
+
+from datetime import datetime
+from functools import lru_cache
+
+from services.export.model import INSTITUTION, FACULTY
+
+# Marges de la page (points), identiques à celles de SimpleDocTemplate
+MARGIN = 72
+
+# Largeurs des colonnes du tableau (points)
+DAY_COLUMN_WIDTH = 80
+SLOT_COLUMN_WIDTH = 110
+
+
+@lru_cache(maxsize=1)
+def _styles():
+    """Styles partagés par toutes les pages (construits au premier rendu)."""
+    from reportlab.lib import colors
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.platypus import TableStyle
+
+    return {
+        'header': ParagraphStyle('Header', fontSize=12, leading=14, alignment=1),
+        'title': ParagraphStyle('Title', fontSize=13, leading=16, alignment=1,
+                                spaceAfter=10, fontName='Helvetica-Bold'),
+        'nb': ParagraphStyle('NB', fontSize=9, italic=True),
+        'footer': ParagraphStyle('Footer', fontSize=7, alignment=2),
+        'table': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('BACKGROUND', (0, 1), (0, -1), colors.whitesmoke),
+        ]),
+    }
+
+
+def _grid_elements(grid, styles):
+    from reportlab.platypus import Table, Paragraph, Spacer
+
+    elements = [
+        Paragraph(f"{INSTITUTION}<br/>{FACULTY}", styles['header']),
+        Paragraph(grid.title, styles['title']),
+        Paragraph(grid.subtitle, styles['title']),
+        Spacer(1, 15),
+    ]
+
+    data = [["JOURS"] + grid.slot_labels]
+    data.extend([day] + cells for day, cells in grid.rows(separator="\n\n"))
+
+    table = Table(data, colWidths=[DAY_COLUMN_WIDTH] + [SLOT_COLUMN_WIDTH] * len(grid.slot_labels),
+                  style=styles['table'], repeatRows=1)
+    elements.append(table)
+
+    if grid.notes:
+        elements.append(Spacer(1, 15))
+        elements.append(Paragraph("<b>N.B:</b> " + "<br/>".join(grid.notes), styles['nb']))
+    return elements
+
+
+def _footer(generated_at, styles):
+    from reportlab.platypus import Paragraph, Spacer
+
+    return [Spacer(1, 10), Paragraph(f"Document généré le {generated_at}", styles['footer'])]
+
+
+def _fill_frame(frame, elements, canvas):
+    """
+    Place dans le cadre les éléments qui y tiennent (en scindant le tableau au besoin)
+    et les retire de la liste; ceux qui restent iront sur la page suivante.
+    """
+    from reportlab.platypus.doctemplate import LayoutError
+
+    while elements:
+        if frame.add(elements[0], canvas, trySplit=0):
+            del elements[0]
+            continue
+        parts = frame.split(elements[0], canvas)
+        if parts:
+            elements[0:1] = parts
+            if frame.add(elements[0], canvas, trySplit=0):
+                del elements[0]
+                continue
+        if frame._atTop:
+            raise LayoutError(f"Élément trop grand pour une page: {elements[0].identity()}")
+        return
+
+
+def render_pdf(grids, path, streaming=True):
+    """
+    Écrit les grilles dans un PDF (une page par grille, ou plus si une grille déborde).
+
+    Args:
+        grids (iterable): Grilles à écrire (parcourues une seule fois, un générateur suffit)
+        path (str ou fichier): Chemin ou fichier binaire ouvert en écriture
+        streaming (bool): Rendu page par page; False construit tout le document avant l'écriture
+
+    Raises:
+        ImportError: reportlab n'est pas installé
+    """
+    from reportlab.lib.pagesizes import A4, landscape
+
+    styles = _styles()
+    generated_at = datetime.now().strftime('%d/%m/%Y %H:%M')
+
+    if not streaming:
+        from reportlab.platypus import SimpleDocTemplate, PageBreak
+
+        elements = []
+        for index, grid in enumerate(grids):
+            if index:
+                elements.append(PageBreak())
+            elements.extend(_grid_elements(grid, styles))
+        elements.extend(_footer(generated_at, styles))
+        SimpleDocTemplate(path, pagesize=landscape(A4)).build(elements)
+        return path
+
+    from reportlab.pdfgen.canvas import Canvas
+    from reportlab.platypus import Frame
+
+    width, height = landscape(A4)
+    canvas = Canvas(path, pagesize=(width, height), pageCompression=1)
+
+    def new_frame():
+        return Frame(MARGIN, MARGIN, width - 2 * MARGIN, height - 2 * MARGIN)
+
+    frame = None
+    for grid in grids:
+        if frame is not None:
+            canvas.showPage()
+        frame = new_frame()
+        elements = _grid_elements(grid, styles)
+        _fill_frame(frame, elements, canvas)
+        while elements:
+            canvas.showPage()
+            frame = new_frame()
+            _fill_frame(frame, elements, canvas)
+
+    # Pied de page à la suite de la dernière grille (ou sur une nouvelle page s'il n'y tient plus)
+    footer = _footer(generated_at, styles)
+    _fill_frame(frame or new_frame(), footer, canvas)
+    if footer:
+        canvas.showPage()
+        _fill_frame(new_frame(), footer, canvas)
+
+    canvas.save()
+    return path
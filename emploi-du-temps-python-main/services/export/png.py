@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+Rendu PNG des grilles (grilles empilées verticalement dans une seule image).
+
+Le fond d'une grille (en-tête des créneaux, colonne des jours, bordures des
+cellules) ne dépend que de la mise en page: il est dessiné une fois par jeu de
+jours et de créneaux puis copié pour chaque grille, sur laquelle seuls les
+titres et le contenu des cellules sont collés. Les polices sont chargées une
+seule fois par processus et le rendu d'un texte (masque de glyphes) est mis en
+cache: matières, salles et groupes reviennent d'une grille à l'autre.
+render_png_batch rend une image (ou une vignette) par grille en réutilisant
+ces caches.
+"""
+
+import os
+from datetime import datetime
+from functools import lru_cache
+
+from services.export.model import INSTITUTION
+
+# Dimensions (pixels)
+CELL_WIDTH = 130
+CELL_HEIGHT = 80
+DAY_COL_WIDTH = 100
+TITLE_HEIGHT = 60
+SLOT_HEADER_HEIGHT = 30
+GRID_MARGIN = 20
+FOOTER_HEIGHT = 30
+LEFT = 10
+
+# Couleurs
+HEADER_COLOR = (68, 114, 196)
+DAY_COLOR = (217, 226, 243)
+GRID_COLOR = (0, 0, 0)
+TEXT_COLOR = (0, 0, 0)
+DETAIL_COLOR = (100, 100, 100)
+FOOTER_COLOR = (128, 128, 128)
+
+# Créneaux affichés par cellule (au-delà, le texte déborderait)
+MAX_ENTRIES_PER_CELL = 2
+
+# Compression zlib des fichiers PNG: les aplats de couleur se compressent bien
+# dès les premiers niveaux, les niveaux élevés coûtent surtout du temps
+PNG_COMPRESS_LEVEL = 1
+
+# Indices des polices dans _fonts()
+FONT_TITLE, FONT_HEADER, FONT_CELL = range(3)
+
+
+@lru_cache(maxsize=1)
+def _fonts():
+    """Polices (titre, en-tête, cellule), chargées une fois par processus."""
+    from PIL import ImageFont
+
+    try:
+        return (ImageFont.truetype("arial.ttf", 16), ImageFont.truetype("arial.ttf", 12),
+                ImageFont.truetype("arial.ttf", 9))
+    except OSError:
+        default = ImageFont.load_default()
+        return default, default, default
+
+
+@lru_cache(maxsize=4096)
+def _text_mask(text, font_index):
+    """Masque (niveaux de gris) d'un texte et son décalage, rendu une fois par texte et police."""
+    from PIL import Image, ImageDraw
+
+    font = _fonts()[font_index]
+    left, top, right, bottom = font.getbbox(text)
+    mask = Image.new('L', (max(right - left, 1), max(bottom - top, 1)), 0)
+    ImageDraw.Draw(mask).text((-left, -top), text, fill=255, font=font)
+    return mask, (left, top)
+
+
+def _paste_text(img, position, text, color, font_index):
+    """Équivalent de ImageDraw.text, à partir du masque en cache."""
+    if not text:
+        return
+    mask, (left, top) = _text_mask(text, font_index)
+    img.paste(color, (position[0] + left, position[1] + top), mask)
+
+
+def _panel_size(day_count, slot_count):
+    width = LEFT + DAY_COL_WIDTH + CELL_WIDTH * slot_count + 10
+    height = TITLE_HEIGHT + SLOT_HEADER_HEIGHT + CELL_HEIGHT * day_count + GRID_MARGIN
+    return width, height
+
+
+@lru_cache(maxsize=8)
+def _template(day_labels, slot_labels):
+    """Fond d'une grille pour une mise en page (jours et créneaux), sans titre ni contenu."""
+    from PIL import Image, ImageDraw
+
+    _, font_header, font_cell = _fonts()
+    img = Image.new('RGB', _panel_size(len(day_labels), len(slot_labels)), color='white')
+    draw = ImageDraw.Draw(img)
+    start_y = TITLE_HEIGHT
+
+    # En-tête des créneaux
+    draw.rectangle([LEFT, start_y, LEFT + DAY_COL_WIDTH, start_y + SLOT_HEADER_HEIGHT], fill=HEADER_COLOR)
+    draw.text((LEFT + 10, start_y + 8), "JOURS", fill='white', font=font_header)
+    for i, label in enumerate(slot_labels):
+        x = LEFT + DAY_COL_WIDTH + i * CELL_WIDTH
+        draw.rectangle([x, start_y, x + CELL_WIDTH, start_y + SLOT_HEADER_HEIGHT], fill=HEADER_COLOR)
+        draw.text((x + 10, start_y + 8), label, fill='white', font=font_cell)
+
+    # Colonne des jours et bordures des cellules
+    for day_idx, day_label in enumerate(day_labels):
+        y = start_y + SLOT_HEADER_HEIGHT + day_idx * CELL_HEIGHT
+        draw.rectangle([LEFT, y, LEFT + DAY_COL_WIDTH, y + CELL_HEIGHT], fill=DAY_COLOR, outline=GRID_COLOR)
+        draw.text((LEFT + 10, y + 30), day_label, fill=TEXT_COLOR, font=font_header)
+        for slot_idx in range(len(slot_labels)):
+            x = LEFT + DAY_COL_WIDTH + slot_idx * CELL_WIDTH
+            draw.rectangle([x, y, x + CELL_WIDTH, y + CELL_HEIGHT], outline=GRID_COLOR)
+    return img
+
+
+def render_panel(grid):
+    """Image d'une grille: copie du fond de sa mise en page, titres et contenu des cellules."""
+    img = _template(tuple(grid.day_labels), tuple(grid.slot_labels)).copy()
+    _paste_text(img, (LEFT, 10), f"{INSTITUTION} - FST Tanger", TEXT_COLOR, FONT_TITLE)
+    _paste_text(img, (LEFT, 35), f"Emploi du Temps - {grid.subtitle}", TEXT_COLOR, FONT_HEADER)
+
+    # Seules les cellules occupées sont écrites
+    for (day_idx, slot_idx), entries in grid.cells.items():
+        x = LEFT + DAY_COL_WIDTH + slot_idx * CELL_WIDTH
+        text_y = TITLE_HEIGHT + SLOT_HEADER_HEIGHT + day_idx * CELL_HEIGHT + 5
+        for entry in entries[:MAX_ENTRIES_PER_CELL]:
+            title, *details = grid.entry_lines(entry)
+            _paste_text(img, (x + 5, text_y), title[:22], TEXT_COLOR, FONT_CELL)
+            text_y += 12
+            _paste_text(img, (x + 5, text_y), " ".join(details)[:26], DETAIL_COLOR, FONT_CELL)
+            text_y += 15
+    return img
+
+
+def _with_footer(panels, generated_at):
+    """Assemble des grilles les unes sous les autres et ajoute le pied de page."""
+    from PIL import Image
+
+    width = max((panel.width for panel in panels), default=LEFT + DAY_COL_WIDTH + 10)
+    height = sum(panel.height for panel in panels) + FOOTER_HEIGHT
+    img = Image.new('RGB', (width, height), color='white')
+    top = 0
+    for panel in panels:
+        img.paste(panel, (0, top))
+        top += panel.height
+    _paste_text(img, (LEFT, height - 25), f"Généré le {generated_at}", FOOTER_COLOR, FONT_CELL)
+    return img
+
+
+def render_png(grids, path):
+    """
+    Écrit les grilles dans une image PNG.
+
+    Raises:
+        ImportError: Pillow n'est pas installé
+    """
+    generated_at = datetime.now().strftime('%d/%m/%Y %H:%M')
+    _with_footer([render_panel(grid) for grid in grids], generated_at).save(path, compress_level=PNG_COMPRESS_LEVEL)
+    return path
+
+
+def render_png_batch(items, thumbnail_width=None):
+    """
+    Rend une image par grille, en réutilisant polices et fonds de grille.
+
+    Args:
+        items (iterable): [(TimetableGrid, chemin), ...]
+        thumbnail_width (int, optional): Largeur des vignettes (pixels); None = taille réelle
+
+    Returns:
+        list: Chemins écrits
+
+    Raises:
+        ImportError: Pillow n'est pas installé
+    """
+    from PIL import Image
+
+    generated_at = datetime.now().strftime('%d/%m/%Y %H:%M')
+    paths = []
+    for grid, path in items:
+        img = _with_footer([render_panel(grid)], generated_at)
+        if thumbnail_width and thumbnail_width < img.width:
+            height = round(img.height * thumbnail_width / img.width)
+            img = img.resize((thumbnail_width, height), Image.LANCZOS)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        img.save(path, compress_level=PNG_COMPRESS_LEVEL)
+        paths.append(path)
+    return paths
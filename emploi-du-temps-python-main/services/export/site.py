@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Site statique des emplois du temps (intranet).
+
+Une page par groupe, par enseignant et par salle, plus un index, construites
+à partir d'une seule lecture de la grille matérialisée (les mêmes créneaux
+publiés que get_group_timetable / get_teacher_timetable). Le manifest
+(manifest.json) garde l'empreinte du contenu de chaque page: une
+reconstruction ne réécrit que les pages dont les créneaux ont changé, l'index
+seulement si la liste des pages a changé, et supprime les pages des entités
+disparues. Les pages sont écrites de façon atomique et peuvent être servies
+pendant la reconstruction.
+
+Utilisation en ligne de commande:
+    python -m services.export.site [--output exports/site] [--force]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from datetime import datetime
+from html import escape
+
+import database
+from services.export.bulk import collect_grids, entity_file_name
+from services.export.html import STYLESHEET, grid_section, html_page
+from services.export.model import GROUP, INSTRUCTOR, ROOM, LAYOUT_VERSION
+
+SITE_DIR = "site"
+MANIFEST_FILE = "manifest.json"
+INDEX_FILE = "index.html"
+STYLESHEET_FILE = "style.css"
+
+# Sections de l'index (type, titre), dans l'ordre d'affichage
+SECTIONS = [(GROUP, "Groupes"), (INSTRUCTOR, "Enseignants"), (ROOM, "Salles")]
+
+
+def _write(path, content):
+    """Écriture atomique (une page servie n'est jamais lue à moitié écrite)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+def _digest(*parts):
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _load_manifest(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if manifest.get("layout_version") == LAYOUT_VERSION else {}
+
+
+def _index_body(pages):
+    parts = ['<header><h2>Emplois du temps - FST Tanger</h2></header>']
+    for kind, title in SECTIONS:
+        entries = sorted((page for page in pages if page["kind"] == kind), key=lambda page: page["label"].lower())
+        if not entries:
+            continue
+        parts.append(f"<h2>{escape(title)}</h2><ul class=\"index\">")
+        parts.extend(f'<li><a href="{escape(page["file"])}">{escape(page["label"])}</a></li>' for page in entries)
+        parts.append("</ul>")
+    return "".join(parts)
+
+
+def build_site(output=None, force=False):
+    """
+    Construit (ou met à jour) le site statique.
+
+    Args:
+        output (str, optional): Dossier du site (défaut: exports/site)
+        force (bool): Réécrire toutes les pages
+
+    Returns:
+        dict: {"success", "message", "written", "unchanged", "removed", "directory"}
+    """
+    output = output or os.path.join(os.getcwd(), "exports", SITE_DIR)
+    manifest_path = os.path.join(output, MANIFEST_FILE)
+    previous = {} if force else _load_manifest(manifest_path)
+    previous_pages = previous.get("pages", {})
+    generated_at = datetime.now().strftime('%d/%m/%Y %H:%M')
+
+    stylesheet_hash = _digest(STYLESHEET)
+    if previous.get("stylesheet") != stylesheet_hash or not os.path.exists(os.path.join(output, STYLESHEET_FILE)):
+        _write(os.path.join(output, STYLESHEET_FILE), STYLESHEET)
+
+    pages = {}
+    written = unchanged = 0
+    for key, grid in collect_grids(kinds=(GROUP, INSTRUCTOR, ROOM)):
+        name = entity_file_name(key, grid, "html")
+        digest = grid.digest()
+        page = {"kind": grid.kind, "label": grid.label, "file": name, "hash": digest}
+        pages[key] = page
+        known = previous_pages.get(key)
+        if known and known["hash"] == digest and known["file"] == name \
+                and os.path.exists(os.path.join(output, name)):
+            unchanged += 1
+            continue
+        body = '<nav><a href="../index.html">&larr; Tous les emplois du temps</a></nav>' + grid_section(grid)
+        _write(os.path.join(output, name),
+               html_page(grid.subtitle, body, stylesheet=f"../{STYLESHEET_FILE}", generated_at=generated_at))
+        written += 1
+
+    # Pages des entités disparues ou renommées
+    current_files = {page["file"] for page in pages.values()}
+    removed = 0
+    for page in previous_pages.values():
+        if page["file"] not in current_files:
+            try:
+                os.remove(os.path.join(output, page["file"]))
+                removed += 1
+            except OSError:
+                pass
+
+    index_hash = _digest(sorted((page["kind"], page["label"], page["file"]) for page in pages.values()))
+    if previous.get("index") != index_hash or not os.path.exists(os.path.join(output, INDEX_FILE)):
+        _write(os.path.join(output, INDEX_FILE),
+               html_page("Emplois du temps - FST Tanger", _index_body(pages.values()),
+                         stylesheet=STYLESHEET_FILE, generated_at=generated_at))
+        written += 1
+
+    _write(manifest_path, json.dumps({"layout_version": LAYOUT_VERSION, "stylesheet": stylesheet_hash,
+                                      "index": index_hash, "pages": pages}, ensure_ascii=False))
+
+    return {"success": True,
+            "message": f"Site statique : {written} page(s) écrite(s), {unchanged} inchangée(s), "
+                       f"{removed} supprimée(s) -> {output}",
+            "written": written, "unchanged": unchanged, "removed": removed, "directory": output}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Site statique des emplois du temps")
+    parser.add_argument("--output", help="Dossier du site (défaut: exports/site)")
+    parser.add_argument("--force", action="store_true", help="Réécrire toutes les pages")
+    parser.add_argument("--db", default=database.DB_NAME, help="Base SQLite")
+    args = parser.parse_args()
+
+    database.DB_NAME = os.path.abspath(args.db)
+    database.setup()
+    print(build_site(args.output, force=args.force)["message"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Rendu Excel des grilles (une feuille par grille).
+
+Par défaut le classeur est écrit en flux (mode write-only d'openpyxl): chaque
+ligne est sérialisée dès qu'elle est ajoutée, chaque feuille est fermée dès
+qu'elle est terminée et les mises en forme sont des styles nommés déclarés une
+fois pour tout le classeur, au lieu d'objets de style portés par chaque
+cellule. Aucune cellule ne reste en mémoire: seule la description de chaque
+feuille (environ 15 Ko dans openpyxl) est conservée jusqu'à l'enregistrement.
+
+Mesure: python -m services.export.benchmark --format xlsx --sheets 500
+"""
+
+import re
+from datetime import datetime
+
+from services.export.model import INSTITUTION
+
+# Styles nommés du classeur
+HEADER_STYLE = "edt_header"
+TITLE_STYLE = "edt_title"
+SLOT_STYLE = "edt_slot"
+CORNER_STYLE = "edt_corner"
+DAY_STYLE = "edt_day"
+CELL_STYLE = "edt_cell"
+
+# Dimensions
+DAY_COLUMN_WIDTH = 12
+SLOT_COLUMN_WIDTH = 22
+ROW_HEIGHT = 60
+
+
+def sheet_title(label):
+    """Nom de feuille valide pour Excel (31 caractères, sans []:*?/\\)."""
+    return re.sub(r"[\[\]:*?/\\]", "-", label)[:31] or "Planning"
+
+
+def _named_styles():
+    """Styles partagés par toutes les cellules du classeur."""
+    from openpyxl.styles import NamedStyle, Font, Alignment, PatternFill, Border, Side
+
+    side = Side(style='thin')
+    border = Border(left=side, right=side, top=side, bottom=side)
+    center = Alignment(horizontal='center', vertical='center', wrap_text=True)
+    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+    day_fill = PatternFill(start_color="D9E2F3", end_color="D9E2F3", fill_type="solid")
+
+    def style(name, font=None, fill=None, cell_border=None):
+        named = NamedStyle(name=name, alignment=center)
+        if font:
+            named.font = font
+        if fill:
+            named.fill = fill
+        if cell_border:
+            named.border = cell_border
+        return named
+
+    return [
+        style(HEADER_STYLE, font=Font(bold=True, size=14)),
+        style(TITLE_STYLE, font=Font(bold=True, size=11)),
+        style(CORNER_STYLE, font=Font(bold=True, size=11), fill=header_fill, cell_border=border),
+        style(SLOT_STYLE, font=Font(bold=True, color="FFFFFF"), fill=header_fill, cell_border=border),
+        style(DAY_STYLE, font=Font(bold=True, size=11), fill=day_fill, cell_border=border),
+        style(CELL_STYLE, cell_border=border),
+    ]
+
+
+def _write_sheet(ws, grid, generated_at):
+    """Écrit une grille ligne par ligne (compatible avec une feuille write-only)."""
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.utils import get_column_letter
+
+    def cell(value, style):
+        c = WriteOnlyCell(ws, value=value)
+        c.style = style
+        return c
+
+    last_column = get_column_letter(len(grid.slot_labels) + 1)
+
+    # Dimensions et fusions: à déclarer avant les lignes en mode write-only
+    ws.column_dimensions['A'].width = DAY_COLUMN_WIDTH
+    for col in range(2, len(grid.slot_labels) + 2):
+        ws.column_dimensions[get_column_letter(col)].width = SLOT_COLUMN_WIDTH
+    for row in range(5, 5 + len(grid.day_labels)):
+        ws.row_dimensions[row].height = ROW_HEIGHT
+    ws.merged_cells.add(f'A1:{last_column}1')
+    ws.merged_cells.add(f'A2:{last_column}2')
+
+    # En-tête
+    ws.append([cell(f"{INSTITUTION} - FST Tanger", HEADER_STYLE)])
+    ws.append([cell(f"Emploi du Temps - {grid.subtitle}", TITLE_STYLE)])
+    ws.append([])
+
+    # En-tête du tableau (ligne 4)
+    ws.append([cell("JOURS", CORNER_STYLE)] + [cell(label, SLOT_STYLE) for label in grid.slot_labels])
+
+    # Données
+    for day, texts in grid.rows():
+        ws.append([cell(day, DAY_STYLE)] + [cell(text, CELL_STYLE) for text in texts])
+
+    # Pied de page
+    ws.append([])
+    ws.append([f"Généré le {generated_at}"])
+
+
+def render_xlsx(grids, path, streaming=True):
+    """
+    Écrit les grilles dans un classeur Excel (une feuille par grille).
+
+    Args:
+        grids (iterable): Grilles à écrire (parcourues une seule fois, un générateur suffit)
+        path (str): Fichier de sortie
+        streaming (bool): Écriture en flux (write-only); False garde tout le classeur en mémoire
+
+    Raises:
+        ImportError: openpyxl n'est pas installé
+    """
+    import openpyxl
+
+    wb = openpyxl.Workbook(write_only=streaming)
+    if not streaming:
+        wb.remove(wb.active)
+    for named in _named_styles():
+        wb.add_named_style(named)
+
+    generated_at = datetime.now().strftime('%d/%m/%Y %H:%M')
+    used = set()
+    for grid in grids:
+        title = sheet_title(grid.label)
+        # Deux entités peuvent avoir le même nom tronqué
+        suffix = 2
+        while title in used:
+            title = f"{sheet_title(grid.label)[:28]}_{suffix}"
+            suffix += 1
+        used.add(title)
+        ws = wb.create_sheet(title=title)
+        _write_sheet(ws, grid, generated_at)
+        if streaming:
+            # Feuille terminée: son fichier temporaire est finalisé et ses tampons libérés
+            ws.close()
+    if not used:
+        wb.create_sheet(title="Planning")
+
+    wb.save(path)
+    return path
@@ -0,0 +1,336 @@
+# -*- coding: utf-8 -*-
+"""
+Solveur exact de faisabilité (backtracking + forward checking).
+
+Contrairement à l'algorithme génétique, ce solveur explore l'espace de recherche
+de manière complète: il retourne soit un emploi du temps sans aucun conflit, soit
+la preuve qu'aucune solution n'existe accompagnée d'un noyau de cours incompatibles.
+
+Chaque cours possède un domaine représenté par un entier Python utilisé comme
+bitset: le bit `pos` est à 1 si le cours peut commencer à la position `pos`,
+avec le même encodage que Schedule.py:
+
+    pos = jour * (NbSalles * DAY_HOURS) + salle * DAY_HOURS + heure
+"""
+
+import time
+
+from database import getConnection, UNAVAILABILITY_HOURS_PER_DAY, SUBJECT_EQUIPMENT_MASK_SQL
+from Schedule import Configuration, DAY_HOURS, DAYS_NUM, subject_suits_room
+
+# Statuts possibles d'une résolution
+FEASIBLE = "feasible"
+INFEASIBLE = "infeasible"
+UNKNOWN = "unknown"     # Budget (noeuds / temps) épuisé avant la conclusion
+
+
+class _BudgetExceeded(Exception):
+    """Levée en interne quand le budget de noeuds ou de temps est consommé."""
+
+
+class FeasibilitySolver:
+    """
+    Solveur complet pour un ensemble de cours (CourseClass).
+
+    Attributes:
+        config (Configuration): Contexte (salles et cours chargés depuis la BD)
+        course_classes (list): Cours à placer
+        max_nodes (int): Nombre maximal de noeuds explorés par résolution
+        time_limit (float): Durée maximale (secondes) de solve(), extraction du noyau comprise
+    """
+
+    def __init__(self, config=None, course_classes=None, max_nodes=200000, time_limit=10.0,
+                 unavailability=None):
+        """
+        Args:
+            unavailability (dict, optional): {instructor_id: masque d'indisponibilité}
+                                             (défaut: colonne instructors.unavailable_mask)
+        """
+        self.config = config or Configuration.get_instance()
+        self.course_classes = list(course_classes if course_classes is not None
+                                   else self.config.GetCourseClasses())
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+
+        self.nr = self.config.GetNumberOfRooms()
+        self.day_size = self.nr * DAY_HOURS
+        self._window_cache = {}
+
+        if unavailability is None:
+            unavailability = self._load_unavailability()
+        self.unavailability = unavailability
+
+        # Domaines initiaux (contraintes unaires: capacité, labo, horaires, indisponibilités)
+        self.initial_domains = [self._initial_domain(cc) for cc in self.course_classes]
+
+        # Voisins: cours partageant un enseignant ou un groupe (conflit quelle que soit la salle)
+        n = len(self.course_classes)
+        self.neighbours = [[] for _ in range(n)]
+        for i in range(n):
+            for j in range(i + 1, n):
+                a, b = self.course_classes[i], self.course_classes[j]
+                if a.ProfessorOverlaps(b) or a.GroupsOverlap(b):
+                    self.neighbours[i].append(j)
+                    self.neighbours[j].append(i)
+        self.neighbour_sets = [set(v) for v in self.neighbours]
+
+        self.nodes = 0
+        self._deadline = None
+
+    # ------------------------------------------------------------------
+    # Construction des domaines
+    # ------------------------------------------------------------------
+
+    def _load_unavailability(self):
+        """Charge les masques d'indisponibilité: {instructor_id: unavailable_mask}"""
+        conn = getConnection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, unavailable_mask FROM instructors WHERE unavailable_mask != 0")
+        result = {row['id']: row['unavailable_mask'] for row in cursor.fetchall()}
+        conn.close()
+        return result
+
+    def _blocked_starts(self, unavailable, day, duration):
+        """
+        Débuts t (heure 8 + t) dont la plage [t, t + duration) chevauche une indisponibilité
+        du jour `day` (0 = Lundi). Les deux grilles commencent à 8h: le bit t du jour est l'heure 8 + t.
+        """
+        day_bits = (unavailable >> (day * UNAVAILABILITY_HOURS_PER_DAY)) & ((1 << UNAVAILABILITY_HOURS_PER_DAY) - 1)
+        blocked = 0
+        for k in range(duration):
+            blocked |= day_bits >> k
+        return blocked
+
+    def _initial_domain(self, cc):
+        duration = cc.GetDuration()
+        unavailable = self.unavailability.get(cc.GetProfessor()['id'], 0)
+
+        # Masque des heures de début valides dans une journée (même borne que le GA)
+        hours_mask = (1 << max(0, DAY_HOURS - duration)) - 1
+
+        domain = 0
+        for room_idx in range(self.nr):
+            room = self.config.GetRoomById(room_idx)
+            if room.GetNumberOfSeats() < cc.GetNumberOfSeats():
+                continue
+            if not cc.SuitsRoom(room):
+                continue
+            for day in range(DAYS_NUM):
+                day_mask = hours_mask
+                if unavailable:
+                    day_mask &= ~self._blocked_starts(unavailable, day, duration)
+                domain |= day_mask << (day * self.day_size + room_idx * DAY_HOURS)
+        return domain
+
+    def _window(self, day, lo, hi, room_idx=None):
+        """
+        Bitset des débuts compris entre lo et hi (inclus) pour un jour donné,
+        sur une seule salle ou sur toutes les salles.
+        """
+        lo = max(lo, 0)
+        hi = min(hi, DAY_HOURS - 1)
+        if lo > hi:
+            return 0
+        key = (day, lo, hi, room_idx)
+        mask = self._window_cache.get(key)
+        if mask is None:
+            run = ((1 << (hi - lo + 1)) - 1) << lo
+            base = day * self.day_size
+            if room_idx is not None:
+                mask = run << (base + room_idx * DAY_HOURS)
+            else:
+                mask = 0
+                for r in range(self.nr):
+                    mask |= run << (base + r * DAY_HOURS)
+            self._window_cache[key] = mask
+        return mask
+
+    # ------------------------------------------------------------------
+    # Recherche
+    # ------------------------------------------------------------------
+
+    def _select_variable(self, domains, unassigned):
+        """Heuristique MRV (domaine le plus petit), départage par le degré."""
+        best = None
+        best_key = None
+        for i in unassigned:
+            key = (domains[i].bit_count(), -len(self.neighbours[i]))
+            if best_key is None or key < best_key:
+                best, best_key = i, key
+        return best
+
+    def _propagate(self, var, pos, domains, unassigned):
+        """
+        Forward checking: retire des domaines des cours non placés les positions
+        incompatibles avec (var, pos). Retourne les nouveaux domaines ou None si
+        un domaine devient vide.
+        """
+        duration = self.course_classes[var].GetDuration()
+        day = pos // self.day_size
+        rem = pos % self.day_size
+        room_idx = rem // DAY_HOURS
+        t = rem % DAY_HOURS
+
+        new_domains = list(domains)
+        for j in unassigned:
+            other_duration = self.course_classes[j].GetDuration()
+            lo, hi = t - other_duration + 1, t + duration - 1
+            if j in self.neighbour_sets[var]:
+                mask = self._window(day, lo, hi)
+            else:
+                mask = self._window(day, lo, hi, room_idx)
+            d = new_domains[j] & ~mask
+            if not d:
+                return None
+            new_domains[j] = d
+        return new_domains
+
+    def _search(self, domains, unassigned, assignment):
+        if not unassigned:
+            return True
+
+        self.nodes += 1
+        if self.nodes > self.max_nodes or time.monotonic() > self._deadline:
+            raise _BudgetExceeded()
+
+        var = self._select_variable(domains, unassigned)
+        rest = [i for i in unassigned if i != var]
+
+        d = domains[var]
+        while d:
+            low = d & -d
+            pos = low.bit_length() - 1
+            d ^= low
+
+            new_domains = self._propagate(var, pos, domains, rest)
+            if new_domains is None:
+                continue
+            assignment[var] = pos
+            if self._search(new_domains, rest, assignment):
+                return True
+            del assignment[var]
+        return False
+
+    def _solve_subset(self, indices):
+        """
+        Résout le sous-problème restreint aux cours `indices` avant l'échéance courante
+        (self._deadline, fixée une fois par solve()). Retourne (statut, affectation).
+        """
+        self.nodes = 0
+
+        if any(not self.initial_domains[i] for i in indices):
+            return INFEASIBLE, None
+
+        assignment = {}
+        try:
+            found = self._search(self.initial_domains, list(indices), assignment)
+        except _BudgetExceeded:
+            return UNKNOWN, None
+        return (FEASIBLE, assignment) if found else (INFEASIBLE, None)
+
+    def _minimal_core(self, indices):
+        """
+        Réduction par suppression: retire un à un les cours dont l'absence laisse
+        le problème infaisable. Toutes les sous-résolutions partagent l'échéance de
+        solve(): le noyau obtenu est minimal si aucune n'a épuisé son budget et que
+        tous les cours ont pu être testés avant l'échéance.
+        """
+        # Un cours sans aucune position possible est à lui seul un noyau
+        for i in indices:
+            if not self.initial_domains[i]:
+                return [i], True
+
+        core = list(indices)
+        minimal = True
+        for i in list(core):
+            if time.monotonic() > self._deadline:
+                # Échéance atteinte: les cours restants ne sont pas testés
+                return core, False
+            candidate = [j for j in core if j != i]
+            status, _ = self._solve_subset(candidate)
+            if status == INFEASIBLE:
+                core = candidate
+            elif status == UNKNOWN:
+                minimal = False
+        return core, minimal
+
+    def solve(self, extract_core=True):
+        """
+        Lance la résolution complète.
+
+        Returns:
+            dict: {
+                "status": "feasible" | "infeasible" | "unknown",
+                "assignment": {CourseClass: pos} (si faisable),
+                "core": [CourseClass, ...] (si infaisable),
+                "core_minimal": bool,
+                "nodes": int,
+                "elapsed": float
+            }
+        """
+        start = time.monotonic()
+        # Une seule échéance pour la résolution et l'extraction du noyau
+        self._deadline = start + self.time_limit
+        indices = list(range(len(self.course_classes)))
+        status, assignment = self._solve_subset(indices)
+        nodes = self.nodes
+
+        result = {"status": status, "assignment": None, "core": None,
+                  "core_minimal": False, "nodes": nodes}
+
+        if status == FEASIBLE:
+            result["assignment"] = {self.course_classes[i]: pos for i, pos in assignment.items()}
+        elif status == INFEASIBLE and extract_core:
+            core, minimal = self._minimal_core(indices)
+            result["core"] = [self.course_classes[i] for i in core]
+            result["core_minimal"] = minimal
+
+        result["elapsed"] = time.monotonic() - start
+        return result
+
+
+def check_feasibility(filiere=None, max_nodes=200000, time_limit=10.0, extract_core=True):
+    """
+    Vérifie la faisabilité de l'emploi du temps (global ou d'une filière).
+
+    Args:
+        filiere (str, optional): Restreindre aux groupes de cette filière
+        max_nodes (int): Budget de noeuds de recherche
+        time_limit (float): Budget de temps en secondes (résolution et extraction du noyau)
+        extract_core (bool): Calculer un noyau de conflit si infaisable
+
+    Returns:
+        dict: Résultat de FeasibilitySolver.solve()
+    """
+    config = Configuration.get_instance()
+    config.load_data()
+
+    course_classes = config.GetCourseClasses()
+    if filiere:
+        course_classes = [cc for cc in course_classes
+                          if (cc.group.get('filiere') or '').upper() == filiere.upper()]
+
+    solver = FeasibilitySolver(config, course_classes, max_nodes=max_nodes, time_limit=time_limit)
+    return solver.solve(extract_core=extract_core)
+
+
+def subjects_without_room(config=None):
+    """
+    Matières qu'aucune salle active ne peut accueillir (équipements requis, salle
+    informatique pour un TP sans équipement précisé). Tous leurs cours seraient
+    impossibles à placer: à vérifier après un import ou un peuplement des données.
+
+    Returns:
+        list: Noms des matières concernées
+    """
+    config = config or Configuration.get_instance()
+    rooms = [config.GetRoomById(i) for i in range(config.GetNumberOfRooms())]
+
+    conn = getConnection()
+    subjects = conn.execute(f"""
+        SELECT s.name, s.type, {SUBJECT_EQUIPMENT_MASK_SQL} AS equipment_mask
+        FROM subjects s ORDER BY s.name
+    """).fetchall()
+    conn.close()
+    return [subject['name'] for subject in subjects
+            if not any(subject_suits_room(dict(subject), room) for room in rooms)]
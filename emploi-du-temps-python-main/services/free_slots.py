@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Calcul des créneaux libres des salles par balayage (sweep-line).
+
+Tous les intervalles occupés (cours et réservations approuvées) des jours
+demandés sont lus en une seule requête triée par (salle, jour, heure de début);
+un unique parcours produit ensuite les intervalles libres de toutes les salles.
+Le coût ne dépend plus du nombre de requêtes (une par salle auparavant) mais
+seulement du nombre de créneaux occupés.
+
+Une période (date de début, date de fin) peut être demandée à la place d'une
+liste de jours: chaque date est ramenée à son jour de la semaine, l'emploi du
+temps étant hebdomadaire, et le balayage n'est fait qu'une fois par jour.
+"""
+
+from datetime import timedelta
+
+from database import getConnection, DAYS
+
+# Plage horaire considérée pour les disponibilités
+DAY_START = 8
+DAY_END = 18
+
+
+def dates_between(start_date, end_date):
+    """
+    Dates ouvrées (jours de l'emploi du temps) de la période, bornes incluses.
+
+    Returns:
+        dict: {date: jour (1 = Lundi ... 5 = Vendredi)}
+    """
+    dates = {}
+    current = start_date
+    while current <= end_date:
+        if current.isoweekday() in DAYS:
+            dates[current] = current.isoweekday()
+        current += timedelta(days=1)
+    return dates
+
+
+def free_intervals(days=None, room_ids=None, day_start=DAY_START, day_end=DAY_END,
+                   start_date=None, end_date=None):
+    """
+    Intervalles libres de chaque salle pour les jours ou la période demandés.
+
+    Args:
+        days (iterable, optional): Jours (1 = Lundi ... 5 = Vendredi)
+        room_ids (iterable, optional): Salles à couvrir (défaut: salles actives)
+        day_start (int): Début de journée
+        day_end (int): Fin de journée
+        start_date (date, optional): Début de période (remplace `days`)
+        end_date (date, optional): Fin de période, incluse (défaut: start_date)
+
+    Returns:
+        dict: {(room_id, day): [(début, fin), ...]} pour chaque salle et chaque jour,
+              y compris les salles sans aucun cours (journée entière libre);
+              {(room_id, date): [...]} pour une période
+    """
+    if start_date is not None:
+        dates = dates_between(start_date, end_date or start_date)
+        by_day = free_intervals(dates.values(), room_ids, day_start, day_end)
+        rooms = {room_id for room_id, _ in by_day}
+        return {(room_id, date): list(by_day[(room_id, day)])
+                for room_id in rooms for date, day in dates.items()}
+
+    days = sorted(set(days or ()))
+    if not days:
+        return {}
+
+    conn = getConnection()
+    cursor = conn.cursor()
+    if room_ids is None:
+        cursor.execute("SELECT id FROM rooms WHERE active = 1")
+        room_ids = [row['id'] for row in cursor.fetchall()]
+
+    placeholders = ",".join("?" * len(days))
+    cursor.execute(f"""
+        SELECT room_id, day, start_hour, start_hour + duration AS end_hour
+        FROM timetable WHERE day IN ({placeholders})
+        UNION ALL
+        SELECT room_id, day, start_hour, start_hour + duration
+        FROM reservations WHERE day IN ({placeholders}) AND status = 'APPROVED'
+        AND room_id IS NOT NULL
+        ORDER BY room_id, day, start_hour
+    """, days + days)
+    occupied = cursor.fetchall()
+    conn.close()
+
+    result = {(room_id, day): [] for room_id in room_ids for day in days}
+    seen = set()
+
+    # Balayage: `current` est la fin de la dernière occupation vue pour (salle, jour)
+    key = None
+    current = day_start
+    for row in occupied:
+        row_key = (row['room_id'], row['day'])
+        if row_key != key:
+            if key in result and current < day_end:
+                result[key].append((current, day_end))
+            key = row_key
+            current = day_start
+            seen.add(key)
+        if key not in result:
+            continue
+        start = min(row['start_hour'], day_end)
+        if current < start:
+            result[key].append((current, start))
+        current = max(current, row['end_hour'])
+    if key in result and current < day_end:
+        result[key].append((current, day_end))
+
+    # Salles / jours sans aucune occupation: journée entière libre
+    for slots_key, slots in result.items():
+        if slots_key not in seen:
+            slots.append((day_start, day_end))
+    return result
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Lecture de la grille hebdomadaire matérialisée (table timetable_grid).
+
+La grille est une copie dénormalisée de l'emploi du temps publié, avec les
+libellés (matière, salle, groupe, enseignant, filière) déjà joints et tenue à
+jour par triggers (voir database.create_grid_triggers). Une grille complète
+(filière, groupe ou enseignant) est lue en une requête sur index, au lieu d'une
+requête avec quatre jointures par cellule.
+"""
+
+from database import getConnection
+
+# Noms de colonnes attendus par les exports
+_SELECT = """
+    SELECT timetable_id, day, start_hour, duration, filiere, group_id, instructor_id, room_id,
+           subject_name AS subject, room_name AS room, group_name, instructor_name AS instructor
+    FROM timetable_grid
+"""
+
+
+def fetch_slots(filiere=None, group_id=None, instructor_id=None, room_id=None):
+    """
+    Créneaux publiés d'une filière, d'un groupe, d'un enseignant, d'une salle (ou de tout
+    l'établissement si aucun filtre n'est donné), en une requête.
+
+    Args:
+        filiere (str, optional): Nom (ou partie du nom) de la filière, sans tenir compte de la casse
+        group_id (int, optional): Groupe
+        instructor_id (int, optional): Enseignant
+        room_id (int, optional): Salle
+
+    Returns:
+        list: [{"day", "start_hour", "duration", "filiere", "subject", "room", "group_name", "instructor", ...}, ...]
+              triés par jour, heure puis groupe
+    """
+    conn = getConnection()
+    cursor = conn.cursor()
+    if filiere is not None:
+        # Résolution du nom saisi en clés exactes sur la petite table groups,
+        # puis lecture par plage sur l'index (filiere_key, day, start_hour)
+        cursor.execute("""
+            SELECT DISTINCT UPPER(filiere) AS filiere_key FROM groups
+            WHERE UPPER(filiere) LIKE UPPER('%' || ? || '%')
+        """, (filiere,))
+        keys = [row['filiere_key'] for row in cursor.fetchall()]
+        placeholders = ",".join("?" * len(keys))
+        cursor.execute(f"{_SELECT} WHERE filiere_key IN ({placeholders}) ORDER BY day, start_hour, group_name",
+                       keys)
+    elif group_id is not None:
+        cursor.execute(f"{_SELECT} WHERE group_id = ? ORDER BY day, start_hour, timetable_id", (group_id,))
+    elif instructor_id is not None:
+        cursor.execute(f"{_SELECT} WHERE instructor_id = ? ORDER BY day, start_hour, timetable_id",
+                       (instructor_id,))
+    elif room_id is not None:
+        cursor.execute(f"{_SELECT} WHERE room_id = ? ORDER BY day, start_hour, timetable_id", (room_id,))
+    else:
+        cursor.execute(f"{_SELECT} ORDER BY day, start_hour, group_name")
+    rows = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return rows
+
+
+def load_grid(filiere=None, group_id=None, instructor_id=None):
+    """
+    Créneaux rangés par cellule (voir fetch_slots pour les filtres).
+
+    Returns:
+        dict: {(jour, heure de début): [{"subject", "room", "group_name", "instructor", ...}, ...]}
+    """
+    cells = {}
+    for row in fetch_slots(filiere, group_id, instructor_id):
+        cells.setdefault((row['day'], row['start_hour']), []).append(row)
+    return cells
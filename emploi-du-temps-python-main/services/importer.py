@@ -0,0 +1,356 @@
+# -*- coding: utf-8 -*-
+"""
+Import en masse des données de référence (CSV, JSON ou JSON Lines).
+
+Entités prises en charge, dans l'ordre où elles sont importées (chaque entité
+peut référencer les précédentes, y compris celles du même import):
+
+- rooms: name, type, capacity, equipments, active
+- subjects: name, code, hours_total, type, required_equipment
+- groups: name, student_count, filiere, active
+- instructors: name, speciality, username (compte existant, optionnel), active
+- enrollments (étudiants ↔ groupes): username, group
+- qualifications (matières ↔ enseignants): subject_code, instructor
+- curriculum (matières ↔ groupes): subject_code, group
+
+Les noms sont résolus en identifiants par des dictionnaires chargés une fois
+par import (au lieu d'un SELECT par ligne), les lignes valides sont écrites par
+`executemany` et tout l'import tient dans une seule transaction. Une ligne
+invalide n'empêche pas les autres d'être importées (sauf en mode strict):
+elle est signalée avec son fichier, son numéro de ligne et le motif.
+
+Salles, matières et groupes existants (même nom / code) sont mis à jour;
+les enseignants sont rapprochés par leur nom. Les comptes utilisateurs ne
+sont pas créés ici (le hachage bcrypt de chaque mot de passe domine le coût):
+enrollments et instructors référencent des comptes existants.
+
+Utilisation:
+    python -m services.importer --db university_schedule.db rooms=salles.csv groups=groupes.json
+"""
+
+import argparse
+import csv
+import json
+import os
+
+import database
+from database import getConnection, parse_equipment_list, equipment_ids
+
+# Ordre d'import (dépendances entre entités)
+ENTITIES = ("rooms", "subjects", "groups", "instructors", "enrollments", "qualifications", "curriculum")
+
+
+class RowError(ValueError):
+    """Ligne rejetée (champ manquant, valeur invalide, référence inconnue)."""
+
+
+# ----------------------------------------------------------------------
+# Lecture des fichiers
+# ----------------------------------------------------------------------
+
+def read_rows(path):
+    """
+    Parcourt un fichier ligne à ligne.
+
+    Formats: .csv (séparateur ',' ou ';', en-tête obligatoire), .json (tableau
+    d'objets) et .jsonl (un objet par ligne).
+
+    Yields:
+        tuple: (numéro de ligne, dict)
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".json":
+        with open(path, encoding="utf-8-sig") as f:
+            data = json.load(f)
+        if not isinstance(data, list):
+            raise ValueError(f"{path}: un tableau d'objets est attendu")
+        for index, row in enumerate(data, start=1):
+            yield index, row
+    elif extension == ".jsonl":
+        with open(path, encoding="utf-8-sig") as f:
+            for index, line in enumerate(f, start=1):
+                if line.strip():
+                    yield index, json.loads(line)
+    else:
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            sample = f.read(4096)
+            f.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=",;")
+            except csv.Error:
+                dialect = csv.excel
+            # Ligne 1 = en-tête
+            for index, row in enumerate(csv.DictReader(f, dialect=dialect), start=2):
+                yield index, row
+
+
+# ----------------------------------------------------------------------
+# Validation des champs
+# ----------------------------------------------------------------------
+
+def _text(row, field, required=True):
+    value = row.get(field)
+    value = "" if value is None else str(value).strip()
+    if required and not value:
+        raise RowError(f"champ '{field}' manquant")
+    return value
+
+
+def _int(row, field, default=None):
+    value = _text(row, field, required=default is None)
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise RowError(f"champ '{field}' invalide: '{value}' n'est pas un entier")
+
+
+def _active(row):
+    value = _text(row, "active", required=False).lower()
+    if value in ("", "1", "true", "oui", "yes"):
+        return 1
+    if value in ("0", "false", "non", "no"):
+        return 0
+    raise RowError(f"champ 'active' invalide: '{value}'")
+
+
+def _equipments(row, field):
+    """Liste d'équipements (CSV "PC, Projecteur" ou liste JSON) normalisée au format CSV."""
+    value = row.get(field)
+    if isinstance(value, list):
+        value = ",".join(str(item) for item in value)
+    return ",".join(parse_equipment_list(value))
+
+
+def _lookup(mapping, row, field, label):
+    value = _text(row, field)
+    if value not in mapping:
+        raise RowError(f"{label} inconnu(e): '{value}'")
+    return mapping[value]
+
+
+# ----------------------------------------------------------------------
+# Importeur
+# ----------------------------------------------------------------------
+
+class BulkImporter:
+    """
+    Import d'un lot de fichiers dans une transaction.
+
+    Attributes:
+        rooms, subjects, groups, instructors, users (dict): nom (code pour les
+            matières, username pour les comptes) -> id, tenus à jour pendant l'import
+        errors (list): [{"source", "line", "message"}, ...]
+        counts (dict): entité -> nombre de lignes importées
+    """
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.errors = []
+        self.counts = {}
+        self._load_maps()
+
+    def _load_maps(self):
+        cursor = self.cursor
+        self.rooms = {row[1]: row[0] for row in cursor.execute("SELECT id, name FROM rooms")}
+        self.subjects = {row[1]: row[0] for row in cursor.execute("SELECT id, code FROM subjects")}
+        self.groups = {row[1]: row[0] for row in cursor.execute("SELECT id, name FROM groups")}
+        self.instructors = {row[1]: row[0] for row in cursor.execute("SELECT id, name FROM instructors")}
+        self.users = {row[1]: row[0] for row in cursor.execute("SELECT id, username FROM users")}
+
+    def _validate(self, source, rows, parse):
+        """Applique `parse` à chaque ligne; les lignes invalides sont consignées dans errors."""
+        params = []
+        for line, row in rows:
+            try:
+                if not isinstance(row, dict):
+                    raise RowError("objet attendu")
+                params.append(parse(row))
+            except RowError as e:
+                self.errors.append({"source": source, "line": line, "message": str(e)})
+        return params
+
+    def import_rows(self, entity, rows, source=None):
+        """
+        Importe des lignes déjà lues.
+
+        Args:
+            entity (str): Une des ENTITIES
+            rows (iterable): [(numéro de ligne, dict), ...] (voir read_rows)
+
+        Returns:
+            int: Nombre de lignes importées
+        """
+        if entity not in ENTITIES:
+            raise ValueError(f"Entité inconnue: {entity} (attendu: {', '.join(ENTITIES)})")
+        count = getattr(self, f"_import_{entity}")(source or entity, rows)
+        self.counts[entity] = self.counts.get(entity, 0) + count
+        return count
+
+    # --- Entités ---
+
+    def _import_rooms(self, source, rows):
+        params = self._validate(source, rows, lambda row: (
+            _text(row, "name"), _text(row, "type"), _int(row, "capacity"),
+            _equipments(row, "equipments"), _active(row)))
+        params = list({p[0]: p for p in params}.values())     # Dernière occurrence d'un nom
+        self.cursor.executemany("""
+            INSERT INTO rooms (name, type, capacity, equipments, active) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET type = excluded.type, capacity = excluded.capacity,
+                equipments = excluded.equipments, active = excluded.active
+        """, params)
+        self.rooms = {row[1]: row[0] for row in self.cursor.execute("SELECT id, name FROM rooms")}
+        self._link_equipments("room_equipments", "room_id",
+                              [(self.rooms[p[0]], p[3]) for p in params])
+        return len(params)
+
+    def _import_subjects(self, source, rows):
+        params = self._validate(source, rows, lambda row: (
+            _text(row, "name"), _text(row, "code"), _int(row, "hours_total"), _text(row, "type"),
+            _equipments(row, "required_equipment")))
+        params = list({p[1]: p for p in params}.values())     # Dernière occurrence d'un code
+        self.cursor.executemany("""
+            INSERT INTO subjects (name, code, hours_total, type, required_equipment) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(code) DO UPDATE SET name = excluded.name, hours_total = excluded.hours_total,
+                type = excluded.type, required_equipment = excluded.required_equipment
+        """, params)
+        self.subjects = {row[1]: row[0] for row in self.cursor.execute("SELECT id, code FROM subjects")}
+        self._link_equipments("subject_equipments", "subject_id",
+                              [(self.subjects[p[1]], p[4]) for p in params])
+        return len(params)
+
+    def _link_equipments(self, table, key, owners):
+        """Remplace les équipements normalisés des salles / matières importées (voir database.sync_equipments)."""
+        names = sorted({name for _, csv_value in owners for name in parse_equipment_list(csv_value)})
+        ids = {name: equipment_ids(self.cursor, name)[0] for name in names}
+        self.cursor.executemany(f"DELETE FROM {table} WHERE {key} = ?", [(owner,) for owner, _ in owners])
+        self.cursor.executemany(f"INSERT OR IGNORE INTO {table} ({key}, equipment_id) VALUES (?, ?)",
+                                [(owner, ids[name]) for owner, csv_value in owners
+                                 for name in parse_equipment_list(csv_value)])
+
+    def _import_groups(self, source, rows):
+        params = self._validate(source, rows, lambda row: (
+            _text(row, "name"), _int(row, "student_count"), _text(row, "filiere"), _active(row)))
+        params = list({p[0]: p for p in params}.values())
+        self.cursor.executemany("""
+            INSERT INTO groups (name, student_count, filiere, active) VALUES (?, ?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET student_count = excluded.student_count,
+                filiere = excluded.filiere, active = excluded.active
+        """, params)
+        self.groups = {row[1]: row[0] for row in self.cursor.execute("SELECT id, name FROM groups")}
+        return len(params)
+
+    def _import_instructors(self, source, rows):
+        def parse(row):
+            username = _text(row, "username", required=False)
+            if username and username not in self.users:
+                raise RowError(f"compte inconnu: '{username}'")
+            return (self.users.get(username), _text(row, "name"),
+                    _text(row, "speciality", required=False), _active(row))
+
+        params = self._validate(source, rows, parse)
+        # Pas de contrainte d'unicité sur le nom: rapprochement par le dictionnaire
+        updates = [(user_id, speciality, active, self.instructors[name])
+                   for user_id, name, speciality, active in params if name in self.instructors]
+        inserts = list({p[1]: p for p in params if p[1] not in self.instructors}.values())
+        self.cursor.executemany("""
+            UPDATE instructors SET user_id = COALESCE(?, user_id), speciality = ?, active = ? WHERE id = ?
+        """, updates)
+        self.cursor.executemany("""
+            INSERT INTO instructors (user_id, name, speciality, unavailable_slots, active) VALUES (?, ?, ?, '', ?)
+        """, inserts)
+        self.instructors = {row[1]: row[0] for row in self.cursor.execute("SELECT id, name FROM instructors")}
+        return len(params)
+
+    def _import_links(self, source, rows, table, columns, parse):
+        params = self._validate(source, rows, parse)
+        self.cursor.executemany(f"INSERT OR IGNORE INTO {table} ({columns}) VALUES (?, ?)", params)
+        return len(params)
+
+    def _import_enrollments(self, source, rows):
+        return self._import_links(source, rows, "student_groups", "user_id, group_id", lambda row: (
+            _lookup(self.users, row, "username", "compte"), _lookup(self.groups, row, "group", "groupe")))
+
+    def _import_qualifications(self, source, rows):
+        return self._import_links(source, rows, "subject_instructors", "subject_id, instructor_id", lambda row: (
+            _lookup(self.subjects, row, "subject_code", "matière"),
+            _lookup(self.instructors, row, "instructor", "enseignant")))
+
+    def _import_curriculum(self, source, rows):
+        return self._import_links(source, rows, "subject_groups", "subject_id, group_id", lambda row: (
+            _lookup(self.subjects, row, "subject_code", "matière"), _lookup(self.groups, row, "group", "groupe")))
+
+
+def import_files(sources, strict=False, dry_run=False):
+    """
+    Importe plusieurs fichiers en une transaction.
+
+    Args:
+        sources (list): [(entité, chemin), ...] dans n'importe quel ordre
+        strict (bool): Annuler tout l'import si une ligne est invalide
+        dry_run (bool): Tout valider puis annuler (rapport sans écriture)
+
+    Returns:
+        dict: {"success": bool, "counts": {entité: n}, "errors": [...], "message": str}
+    """
+    sources = sorted(sources, key=lambda source: ENTITIES.index(source[0]) if source[0] in ENTITIES else -1)
+    conn = getConnection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        importer = BulkImporter(cursor)
+        for entity, path in sources:
+            importer.import_rows(entity, read_rows(path), source=path)
+
+        total = sum(importer.counts.values())
+        if dry_run or (strict and importer.errors):
+            conn.rollback()
+            state = "validation seule, rien n'a été écrit" if dry_run else "import annulé (mode strict)"
+        else:
+            conn.commit()
+            state = "import terminé"
+    except Exception as e:
+        conn.rollback()
+        return {"success": False, "counts": {}, "errors": [],
+                "message": f"Import annulé, rien n'a changé : {e}"}
+    finally:
+        conn.close()
+
+    return {
+        "success": not (strict and importer.errors),
+        "counts": importer.counts,
+        "errors": importer.errors,
+        "message": f"{state} : {total} ligne(s) valide(s), {len(importer.errors)} erreur(s)."
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import en masse des données de référence")
+    parser.add_argument("sources", nargs="+", metavar="ENTITE=FICHIER",
+                        help=f"Entité ({', '.join(ENTITIES)}) et fichier CSV/JSON/JSONL")
+    parser.add_argument("--db", default=database.DB_NAME, help="Base SQLite")
+    parser.add_argument("--strict", action="store_true", help="Annuler l'import à la première ligne invalide")
+    parser.add_argument("--dry-run", action="store_true", help="Valider sans écrire")
+    args = parser.parse_args()
+
+    sources = []
+    for source in args.sources:
+        entity, sep, path = source.partition("=")
+        if not sep or entity not in ENTITIES:
+            parser.error(f"argument invalide '{source}' (attendu: {'|'.join(ENTITIES)}=fichier)")
+        sources.append((entity, path))
+
+    database.DB_NAME = os.path.abspath(args.db)
+    database.setup()
+    result = import_files(sources, strict=args.strict, dry_run=args.dry_run)
+
+    print(result["message"])
+    for entity, count in result["counts"].items():
+        print(f"  {entity}: {count}")
+    for error in result["errors"]:
+        print(f"  ! {error['source']}:{error['line']} : {error['message']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+Cache d'occupation hebdomadaire partagé par toutes les recherches de disponibilité.
+
+L'occupation de chaque salle, enseignant et groupe est stockée sous forme de
+bitmap (entier Python): le bit `jour * HOURS_PER_DAY + heure` est à 1 si
+l'entité est occupée pendant cette heure. Une question "cette salle est-elle
+libre de 10h à 12h mardi ?" devient un simple ET binaire.
+
+Le cache est chargé en une seule passe (timetable, réservations approuvées,
+indisponibilités) et rechargé automatiquement quand la base a été modifiée:
+une connexion dédiée, qui n'écrit jamais, compare `PRAGMA data_version`
+(incrémenté à chaque commit d'une autre connexion).
+"""
+
+import os
+import sqlite3
+
+import database
+from database import (
+    CONFLICT_ROOM,
+    CONFLICT_INSTRUCTOR,
+    CONFLICT_GROUP,
+    CONFLICT_UNAVAILABLE,
+)
+
+# Nombre de bits réservés par jour (heures 0 à 23)
+HOURS_PER_DAY = 24
+
+
+def slot_mask(day, start_hour, duration):
+    """Bitmap d'une plage [start_hour, start_hour + duration) le jour `day` (1 = Lundi)."""
+    start = max(0, start_hour)
+    end = min(HOURS_PER_DAY, start_hour + duration)
+    if end <= start:
+        return 0
+    return ((1 << (end - start)) - 1) << (day * HOURS_PER_DAY + start)
+
+
+class OccupancyCache:
+    """
+    Bitmaps d'occupation (jour x heure) par salle, enseignant et groupe.
+
+    Attributes:
+        rooms (dict): room_id -> bitmap des cours (timetable)
+        reserved_rooms (dict): room_id -> bitmap des réservations approuvées
+        instructors (dict): instructor_id -> bitmap des cours
+        groups (dict): group_id -> bitmap des cours
+        unavailable (dict): instructor_id -> bitmap des indisponibilités déclarées
+    """
+
+    _instance = None
+
+    @staticmethod
+    def get_instance():
+        if OccupancyCache._instance is None:
+            OccupancyCache._instance = OccupancyCache()
+        return OccupancyCache._instance
+
+    def __init__(self):
+        self._conn = None
+        self._db_path = None
+        self._version = None
+        self.rooms = {}
+        self.reserved_rooms = {}
+        self.instructors = {}
+        self.groups = {}
+        self.unavailable = {}
+
+    # ------------------------------------------------------------------
+    # Chargement et invalidation
+    # ------------------------------------------------------------------
+
+    def _connection(self):
+        """Connexion dédiée au cache (rouverte si database.DB_NAME a changé)."""
+        db_path = os.path.abspath(database.DB_NAME)
+        if self._conn is None or db_path != self._db_path:
+            if self._conn is not None:
+                self._conn.close()
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._db_path = db_path
+            self._version = None
+        return self._conn
+
+    @property
+    def version(self):
+        """Valeur de PRAGMA data_version au dernier chargement (None si à recharger)."""
+        return self._version
+
+    def invalidate(self):
+        """Force un rechargement complet à la prochaine interrogation."""
+        self._version = None
+
+    def refresh(self):
+        """Recharge les bitmaps si la base a été modifiée depuis le dernier chargement."""
+        conn = self._connection()
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._version:
+            self._load(conn)
+            self._version = version
+        return self
+
+    def _load(self, conn):
+        rooms, instructors, groups = {}, {}, {}
+        reserved_rooms, unavailable = {}, {}
+
+        rows = conn.execute("SELECT room_id, instructor_id, group_id, day, start_hour, duration FROM timetable")
+        for room_id, instructor_id, group_id, day, start_hour, duration in rows:
+            mask = slot_mask(day, start_hour, duration)
+            rooms[room_id] = rooms.get(room_id, 0) | mask
+            instructors[instructor_id] = instructors.get(instructor_id, 0) | mask
+            groups[group_id] = groups.get(group_id, 0) | mask
+
+        rows = conn.execute("""
+            SELECT room_id, day, start_hour, duration FROM reservations
+            WHERE status = 'APPROVED' AND room_id IS NOT NULL
+        """)
+        for room_id, day, start_hour, duration in rows:
+            reserved_rooms[room_id] = reserved_rooms.get(room_id, 0) | slot_mask(day, start_hour, duration)
+
+        rows = conn.execute("SELECT instructor_id, day, start_hour, duration FROM teacher_unavailability")
+        for instructor_id, day, start_hour, duration in rows:
+            unavailable[instructor_id] = unavailable.get(instructor_id, 0) | slot_mask(day, start_hour, duration)
+
+        self.rooms, self.instructors, self.groups = rooms, instructors, groups
+        self.reserved_rooms, self.unavailable = reserved_rooms, unavailable
+
+    # ------------------------------------------------------------------
+    # Interrogation
+    # ------------------------------------------------------------------
+
+    def room_busy(self, room_id, day, start_hour, duration, include_reservations=True):
+        """True si la salle est occupée (cours ou réservation approuvée) sur la plage."""
+        self.refresh()
+        mask = slot_mask(day, start_hour, duration)
+        occupied = self.rooms.get(room_id, 0)
+        if include_reservations:
+            occupied |= self.reserved_rooms.get(room_id, 0)
+        return bool(occupied & mask)
+
+    def free_rooms(self, room_ids, day, start_hour, duration, include_reservations=True):
+        """Filtre `room_ids` en ne gardant que les salles libres sur la plage (ordre conservé)."""
+        self.refresh()
+        mask = slot_mask(day, start_hour, duration)
+        rooms, reserved = self.rooms, self.reserved_rooms
+        if include_reservations:
+            return [rid for rid in room_ids
+                    if not ((rooms.get(rid, 0) | reserved.get(rid, 0)) & mask)]
+        return [rid for rid in room_ids if not (rooms.get(rid, 0) & mask)]
+
+    def conflict(self, instructor_id, group_id, room_id, day, start_hour, duration):
+        """
+        Même règles et même ordre que database.check_conflict (timetable puis indisponibilités).
+
+        Returns:
+            str or None: CONFLICT_INSTRUCTOR, CONFLICT_GROUP, CONFLICT_ROOM, CONFLICT_UNAVAILABLE ou None
+        """
+        self.refresh()
+        mask = slot_mask(day, start_hour, duration)
+        if self.instructors.get(instructor_id, 0) & mask:
+            return CONFLICT_INSTRUCTOR
+        if self.groups.get(group_id, 0) & mask:
+            return CONFLICT_GROUP
+        if self.rooms.get(room_id, 0) & mask:
+            return CONFLICT_ROOM
+        if self.unavailable.get(instructor_id, 0) & mask:
+            return CONFLICT_UNAVAILABLE
+        return None
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+Validation des réservations en lot.
+
+Toute la file PENDING est traitée en une transaction:
+
+1. les intervalles déjà occupés (cours et réservations approuvées) des jours
+   concernés sont chargés en deux requêtes, rangés par (type, entité, jour)
+   puis triés et fusionnés en blocs disjoints (une frise par clé);
+2. les demandes sont examinées par ordre d'arrivée (premier arrivé, premier servi);
+   chacune est d'abord comparée aux indisponibilités de l'enseignant (masque
+   instructors.unavailable_mask, comme pour une affectation), puis cherchée par
+   dichotomie dans les frises de sa salle, de son enseignant et de son groupe
+   pour ce jour, y compris les demandes acceptées juste avant;
+3. les demandes sans conflit sont approuvées, les autres rejetées avec un motif
+   structuré (type de conflit, créneau ou réservation en cause).
+"""
+
+from bisect import bisect_right
+
+from database import (
+    getConnection,
+    conflict_message,
+    unavailability_mask,
+    CONFLICT_ROOM,
+    CONFLICT_INSTRUCTOR,
+    CONFLICT_GROUP,
+    CONFLICT_UNAVAILABLE,
+)
+
+# Source d'un intervalle occupé
+SOURCE_TIMETABLE = "timetable"
+SOURCE_RESERVATION = "reservation"
+SOURCE_UNAVAILABILITY = "unavailability"
+
+
+def _keys(row):
+    """Clés (type, entité, jour) touchées par un créneau ou une réservation."""
+    keys = []
+    if row['room_id'] is not None:
+        keys.append((CONFLICT_ROOM, row['room_id'], row['day']))
+    keys.append((CONFLICT_INSTRUCTOR, row['instructor_id'], row['day']))
+    if row['group_id'] is not None:
+        keys.append((CONFLICT_GROUP, row['group_id'], row['day']))
+    return keys
+
+
+class _Timeline:
+    """
+    Intervalles occupés d'une clé (type, entité, jour), en blocs disjoints triés par début.
+
+    Les intervalles déjà en base peuvent se chevaucher (validations unitaires
+    antérieures): ils sont fusionnés en blocs qui gardent leurs membres. Une
+    recherche coûte une dichotomie; un intervalle accepté ne chevauche rien et
+    devient un nouveau bloc.
+    """
+
+    def __init__(self, intervals=()):
+        self.starts = []
+        self.blocks = []    # [début, fin, [(début, fin, source, id), ...]]
+        for interval in sorted(intervals):
+            if self.blocks and interval[0] < self.blocks[-1][1]:
+                block = self.blocks[-1]
+                block[1] = max(block[1], interval[1])
+                block[2].append(interval)
+            else:
+                self.starts.append(interval[0])
+                self.blocks.append([interval[0], interval[1], [interval]])
+
+    def find_overlap(self, start, end):
+        """Premier intervalle (début, fin, source, id) chevauchant [start, end), ou None."""
+        i = bisect_right(self.starts, start) - 1
+        if i < 0 or self.blocks[i][1] <= start:
+            i += 1
+        if i < len(self.blocks) and self.blocks[i][0] < end:
+            for interval in self.blocks[i][2]:
+                if interval[0] < end and start < interval[1]:
+                    return interval
+        return None
+
+    def add(self, interval):
+        """Insère un intervalle qui ne chevauche aucun bloc."""
+        i = bisect_right(self.starts, interval[0])
+        self.starts.insert(i, interval[0])
+        self.blocks.insert(i, [interval[0], interval[1], [interval]])
+
+
+def approve_pending(admin_id, reservation_ids=None, reject_conflicts=True):
+    """
+    Approuve en une transaction toutes les réservations PENDING sans conflit.
+
+    Args:
+        admin_id (int): Administrateur qui valide
+        reservation_ids (iterable, optional): Restreindre le lot à ces réservations
+        reject_conflicts (bool): Passer les demandes en conflit au statut REJECTED
+                                 (sinon elles restent PENDING)
+
+    Returns:
+        dict: {"success": bool, "approved": [id, ...],
+               "rejected": [{"id", "type", "source", "conflit_avec", "message"}, ...],
+               "message": str}
+    """
+    conn = getConnection()
+    cursor = conn.cursor()
+    try:
+        # Verrou d'écriture dès le début: aucune autre session ne peut approuver
+        # ou planifier entre la lecture des occupations et la mise à jour
+        cursor.execute("BEGIN IMMEDIATE")
+
+        cursor.execute("""
+            SELECT id, instructor_id, room_id, group_id, day, start_hour, duration
+            FROM reservations WHERE status = 'PENDING'
+            ORDER BY created_at, id
+        """)
+        pending = cursor.fetchall()
+        if reservation_ids is not None:
+            wanted = set(reservation_ids)
+            pending = [row for row in pending if row['id'] in wanted]
+
+        if not pending:
+            conn.rollback()
+            return {"success": True, "approved": [], "rejected": [],
+                    "message": "Aucune réservation en attente."}
+
+        days = sorted({row['day'] for row in pending})
+        placeholders = ",".join("?" * len(days))
+
+        # Intervalles déjà occupés, rangés par (type, entité, jour)
+        intervals = {}
+        cursor.execute(f"""
+            SELECT id, instructor_id, room_id, group_id, day, start_hour, duration
+            FROM timetable WHERE day IN ({placeholders})
+        """, days)
+        for row in cursor.fetchall():
+            for key in _keys(row):
+                intervals.setdefault(key, []).append(
+                    (row['start_hour'], row['start_hour'] + row['duration'], SOURCE_TIMETABLE, row['id']))
+
+        cursor.execute(f"""
+            SELECT id, instructor_id, room_id, group_id, day, start_hour, duration
+            FROM reservations WHERE status = 'APPROVED' AND day IN ({placeholders})
+        """, days)
+        for row in cursor.fetchall():
+            for key in _keys(row):
+                intervals.setdefault(key, []).append(
+                    (row['start_hour'], row['start_hour'] + row['duration'], SOURCE_RESERVATION, row['id']))
+        busy = {key: _Timeline(values) for key, values in intervals.items()}
+
+        instructor_ids = sorted({row['instructor_id'] for row in pending})
+        cursor.execute(f"""
+            SELECT id, unavailable_mask FROM instructors
+            WHERE unavailable_mask != 0 AND id IN ({",".join("?" * len(instructor_ids))})
+        """, instructor_ids)
+        unavailable = {row['id']: row['unavailable_mask'] for row in cursor.fetchall()}
+
+        approved, rejected = [], []
+        for row in pending:
+            start, end = row['start_hour'], row['start_hour'] + row['duration']
+            if unavailable.get(row['instructor_id'], 0) & unavailability_mask(row['day'], start, row['duration']):
+                rejected.append({
+                    "id": row['id'],
+                    "type": CONFLICT_UNAVAILABLE,
+                    "source": SOURCE_UNAVAILABILITY,
+                    "conflit_avec": row['instructor_id'],
+                    "message": conflict_message(CONFLICT_UNAVAILABLE, row['instructor_id'],
+                                                row['group_id'], row['room_id'])
+                })
+                continue
+
+            keys = _keys(row)
+            conflict = None
+            for key in keys:
+                timeline = busy.get(key)
+                overlap = timeline.find_overlap(start, end) if timeline else None
+                if overlap:
+                    conflict = (key[0], overlap)
+                    break
+
+            if conflict is None:
+                approved.append(row['id'])
+                for key in keys:
+                    busy.setdefault(key, _Timeline()).add((start, end, SOURCE_RESERVATION, row['id']))
+                continue
+
+            conflict_type, (o_start, o_end, source, source_id) = conflict
+            what = "un cours" if source == SOURCE_TIMETABLE else f"la réservation #{source_id}"
+            rejected.append({
+                "id": row['id'],
+                "type": conflict_type,
+                "source": source,
+                "conflit_avec": source_id,
+                "message": f"Conflit ({conflict_type}) avec {what} de {o_start}h à {o_end}h."
+            })
+
+        cursor.executemany("""
+            UPDATE reservations
+            SET status = 'APPROVED', approved_by = ?, approved_at = CURRENT_TIMESTAMP
+            WHERE id = ? AND status = 'PENDING'
+        """, [(admin_id, rid) for rid in approved])
+        if reject_conflicts and rejected:
+            cursor.executemany("""
+                UPDATE reservations
+                SET status = 'REJECTED', approved_by = ?, approved_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND status = 'PENDING'
+            """, [(admin_id, r['id']) for r in rejected])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    return {
+        "success": True,
+        "approved": approved,
+        "rejected": rejected,
+        "message": f"{len(approved)} réservation(s) validée(s), {len(rejected)} en conflit."
+    }
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Recherche de la salle la mieux adaptée (best-fit) pour un cours ponctuel.
+
+Les caractéristiques des salles actives sont précalculées dans des tableaux
+parallèles (identifiants, capacités, masques d'équipements). Une demande
+(matière, groupe, jour, heure, durée) est résolue en un appel:
+
+1. filtre capacité et équipement sur les tableaux (même règle que l'algorithme
+   génétique et le solveur exact: Schedule.required_equipment_mask);
+2. disponibilité de toutes les candidates par ET binaire sur le cache d'occupation;
+3. classement par équipements superflus puis par places perdues.
+
+Les tableaux sont reconstruits uniquement quand la base a changé
+(même `PRAGMA data_version` que le cache d'occupation).
+"""
+
+from database import (
+    getConnection,
+    get_equipment_mask,
+    parse_equipment_list,
+    ROOM_EQUIPMENT_MASK_SQL,
+    SUBJECT_EQUIPMENT_MASK_SQL,
+)
+from services.occupancy import OccupancyCache, slot_mask
+from Schedule import required_equipment_mask, LAB_EQUIPMENT
+
+
+class RoomMatcher:
+    """
+    Moteur de sélection de salles.
+
+    Attributes:
+        room_ids (list): Identifiants des salles actives
+        names (list): Noms des salles (même ordre)
+        capacities (list): Capacités (même ordre)
+        equipment_masks (list): Masques d'équipements (bit id - 1 de la table equipments)
+    """
+
+    _instance = None
+
+    @staticmethod
+    def get_instance():
+        if RoomMatcher._instance is None:
+            RoomMatcher._instance = RoomMatcher()
+        return RoomMatcher._instance
+
+    def __init__(self, occupancy=None):
+        self.occupancy = occupancy or OccupancyCache.get_instance()
+        self._version = None
+        self.room_ids = []
+        self.names = []
+        self.capacities = []
+        self.equipment_masks = []
+
+    def refresh(self):
+        """Recharge les tableaux des salles si la base a été modifiée."""
+        self.occupancy.refresh()
+        if self._version != self.occupancy.version:
+            self._load()
+            self._version = self.occupancy.version
+        return self
+
+    def _load(self):
+        conn = getConnection()
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT r.id, r.name, r.capacity, {ROOM_EQUIPMENT_MASK_SQL} AS equipment_mask
+            FROM rooms r WHERE r.active = 1 ORDER BY r.name
+        """)
+        rows = cursor.fetchall()
+        conn.close()
+
+        self.room_ids = [row['id'] for row in rows]
+        self.names = [row['name'] for row in rows]
+        self.capacities = [row['capacity'] for row in rows]
+        self.equipment_masks = [row['equipment_mask'] for row in rows]
+
+    def subject_mask(self, subject_id):
+        """
+        Masque des équipements requis par une matière (salle informatique pour un TP
+        sans équipement précisé). Retourne None si aucune salle ne peut convenir.
+        """
+        conn = getConnection()
+        cursor = conn.cursor()
+        row = cursor.execute(f"""
+            SELECT s.type, {SUBJECT_EQUIPMENT_MASK_SQL} AS equipment_mask FROM subjects s WHERE s.id = ?
+        """, (subject_id,)).fetchone()
+        lab_mask = get_equipment_mask(cursor, [LAB_EQUIPMENT]) or 0
+        conn.close()
+        return required_equipment_mask(dict(row), lab_mask) if row else 0
+
+    def equipment_mask(self, equipments):
+        """
+        Masque d'une liste d'équipements au format CSV. Retourne None si un équipement
+        n'existe dans aucune salle (aucune salle ne peut convenir).
+        """
+        conn = getConnection()
+        mask = get_equipment_mask(conn.cursor(), parse_equipment_list(equipments))
+        conn.close()
+        return mask
+
+    def rank_rooms(self, student_count, required_mask, day, start_hour, duration, limit=None):
+        """
+        Salles libres convenant au cours, de la mieux adaptée à la moins adaptée.
+
+        Args:
+            required_mask (int or None): Masque des équipements requis (voir subject_mask /
+                                         equipment_mask); None: aucune salle ne convient
+
+        Returns:
+            list: [{"room_id", "name", "capacity", "wasted_seats", "extra_equipment"}, ...]
+        """
+        self.refresh()
+        if required_mask is None:
+            return []
+
+        mask = slot_mask(day, start_hour, duration)
+        busy_rooms = self.occupancy.rooms
+        reserved = self.occupancy.reserved_rooms
+
+        ranked = []
+        for idx, room_id in enumerate(self.room_ids):
+            capacity = self.capacities[idx]
+            equipments = self.equipment_masks[idx]
+            if capacity < student_count or (equipments & required_mask) != required_mask:
+                continue
+            if (busy_rooms.get(room_id, 0) | reserved.get(room_id, 0)) & mask:
+                continue
+            ranked.append({
+                "room_id": room_id,
+                "name": self.names[idx],
+                "capacity": capacity,
+                "wasted_seats": capacity - student_count,
+                # Équipements non requis immobilisés (ex: salle PC pour un cours magistral)
+                "extra_equipment": (equipments & ~required_mask).bit_count(),
+            })
+
+        ranked.sort(key=lambda r: (r["extra_equipment"], r["wasted_seats"], r["name"]))
+        return ranked[:limit] if limit else ranked
+
+    def available_instructors(self, instructor_ids, day, start_hour, duration):
+        """Filtre les enseignants libres (ni cours ni indisponibilité) sur la plage."""
+        self.occupancy.refresh()
+        mask = slot_mask(day, start_hour, duration)
+        taught = self.occupancy.instructors
+        unavailable = self.occupancy.unavailable
+        return [iid for iid in instructor_ids
+                if not ((taught.get(iid, 0) | unavailable.get(iid, 0)) & mask)]
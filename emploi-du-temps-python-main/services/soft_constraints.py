@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+Contraintes souples (qualité de l'emploi du temps) pour l'algorithme génétique.
+
+Les contraintes dures de Schedule.CalculateFitness garantissent un planning
+valide; les contraintes souples mesurent son confort: trous dans la journée,
+journées trop chargées, cours tard le vendredi...
+
+L'algorithme ne place des cours que du lundi au vendredi (Schedule.DAYS_NUM).
+
+Chaque contrainte est pondérée. L'évaluation est incrémentale: on maintient,
+pour chaque groupe et chaque enseignant, un profil d'occupation par jour
+(nombre de cours par heure). Déplacer un cours ne recalcule que les profils
+des journées touchées (au plus 4: groupe et enseignant, ancien et nouveau jour).
+"""
+
+# Indice du vendredi dans l'algorithme (0 = Lundi)
+FRIDAY = 4
+
+# Heure réelle correspondant à l'indice horaire 0 de l'algorithme
+FIRST_HOUR = 8
+
+GROUP = "group"
+INSTRUCTOR = "instructor"
+
+
+class SoftConstraint:
+    """
+    Contrainte souple de base.
+
+    Attributes:
+        weight (float): Poids de la contrainte dans la pénalité totale
+        scopes (tuple): Profils concernés (GROUP et/ou INSTRUCTOR)
+    """
+
+    scopes = (GROUP, INSTRUCTOR)
+
+    def __init__(self, weight=1.0):
+        self.weight = weight
+
+    def day_penalty(self, day, hours):
+        """
+        Pénalité d'une journée pour un groupe ou un enseignant.
+
+        Args:
+            day (int): Indice du jour (0 = Lundi)
+            hours (list): Nombre de cours par indice horaire
+        """
+        return 0.0
+
+    def class_penalty(self, day, start, duration):
+        """Pénalité liée au seul placement d'un cours (indépendante des autres cours)."""
+        return 0.0
+
+
+class IdleGapsConstraint(SoftConstraint):
+    """Heures creuses entre le premier et le dernier cours de la journée."""
+
+    def day_penalty(self, day, hours):
+        occupied = [h for h, count in enumerate(hours) if count]
+        if len(occupied) < 2:
+            return 0.0
+        span = occupied[-1] - occupied[0] + 1
+        return float(span - len(occupied))
+
+
+class MaxDailyHoursConstraint(SoftConstraint):
+    """Heures au-delà de max_hours dans une même journée."""
+
+    def __init__(self, max_hours=6, weight=1.0):
+        super().__init__(weight)
+        self.max_hours = max_hours
+
+    def day_penalty(self, day, hours):
+        busy = sum(1 for count in hours if count)
+        return float(max(0, busy - self.max_hours))
+
+
+class LateFridayConstraint(SoftConstraint):
+    """Heures de cours le vendredi à partir de after_hour (heure réelle)."""
+
+    scopes = (GROUP,)
+
+    def __init__(self, after_hour=16, weight=1.0):
+        super().__init__(weight)
+        self.after_hour = after_hour
+
+    def class_penalty(self, day, start, duration):
+        if day != FRIDAY:
+            return 0.0
+        end = FIRST_HOUR + start + duration
+        return float(max(0, end - max(self.after_hour, FIRST_HOUR + start)))
+
+
+def default_soft_constraints():
+    """Jeu de contraintes souples recommandé (plaintes les plus fréquentes)."""
+    return [
+        IdleGapsConstraint(weight=1.0),
+        MaxDailyHoursConstraint(max_hours=6, weight=2.0),
+        LateFridayConstraint(after_hour=16, weight=1.0),
+    ]
+
+
+class SoftProfile:
+    """
+    État incrémental des contraintes souples pour un emploi du temps.
+
+    Args:
+        constraints (list): Contraintes souples actives
+        day_hours (int): Nombre d'heures par jour dans l'encodage
+        decode (callable): pos -> (jour, salle, heure)
+    """
+
+    def __init__(self, constraints, day_hours, decode):
+        self.constraints = constraints
+        self.day_hours = day_hours
+        self.decode = decode
+        self.day_constraints = {
+            scope: [c for c in constraints if scope in c.scopes and
+                    type(c).day_penalty is not SoftConstraint.day_penalty]
+            for scope in (GROUP, INSTRUCTOR)
+        }
+        self.class_constraints = [c for c in constraints
+                                  if type(c).class_penalty is not SoftConstraint.class_penalty]
+        self.profiles = {}      # (scope, entity_id, day) -> [nb cours par heure]
+        self.penalties = {}     # (scope, entity_id, day) -> pénalité pondérée
+        self.total = 0.0
+
+    def copy(self):
+        c = SoftProfile.__new__(SoftProfile)
+        c.constraints = self.constraints
+        c.day_hours = self.day_hours
+        c.decode = self.decode
+        c.day_constraints = self.day_constraints
+        c.class_constraints = self.class_constraints
+        c.profiles = {key: hours[:] for key, hours in self.profiles.items()}
+        c.penalties = dict(self.penalties)
+        c.total = self.total
+        return c
+
+    def _keys(self, cc, day):
+        return ((GROUP, cc.group['id'], day), (INSTRUCTOR, cc.instructor['id'], day))
+
+    def _class_penalty(self, day, start, duration):
+        return sum(c.weight * c.class_penalty(day, start, duration) for c in self.class_constraints)
+
+    def _refresh(self, key):
+        hours = self.profiles[key]
+        new = sum(c.weight * c.day_penalty(key[2], hours) for c in self.day_constraints[key[0]])
+        self.total += new - self.penalties.get(key, 0.0)
+        self.penalties[key] = new
+
+    def _apply(self, cc, pos, sign):
+        day, _, start = self.decode(pos)
+        duration = cc.GetDuration()
+        for key in self._keys(cc, day):
+            hours = self.profiles.get(key)
+            if hours is None:
+                hours = self.profiles[key] = [0] * self.day_hours
+            for h in range(start, min(start + duration, self.day_hours)):
+                hours[h] += sign
+            self._refresh(key)
+        self.total += sign * self._class_penalty(day, start, duration)
+
+    def rebuild(self, classes):
+        """Reconstruit l'état complet à partir d'un dictionnaire {CourseClass: position}."""
+        self.profiles = {}
+        self.penalties = {}
+        self.total = 0.0
+        touched = set()
+        for cc, pos in classes.items():
+            day, _, start = self.decode(pos)
+            duration = cc.GetDuration()
+            for key in self._keys(cc, day):
+                hours = self.profiles.get(key)
+                if hours is None:
+                    hours = self.profiles[key] = [0] * self.day_hours
+                for h in range(start, min(start + duration, self.day_hours)):
+                    hours[h] += 1
+                touched.add(key)
+            self.total += self._class_penalty(day, start, duration)
+        for key in touched:
+            self._refresh(key)
+
+    def add(self, cc, pos):
+        self._apply(cc, pos, 1)
+
+    def remove(self, cc, pos):
+        self._apply(cc, pos, -1)
+
+    def move(self, cc, old_pos, new_pos):
+        """Met à jour l'état quand un cours passe de old_pos à new_pos."""
+        if old_pos == new_pos:
+            return
+        self._apply(cc, old_pos, -1)
+        self._apply(cc, new_pos, 1)
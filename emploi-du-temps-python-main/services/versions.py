@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+Versions de l'emploi du temps (brouillons, publication atomique, retour arrière).
+
+La table `timetable` contient toujours la version publiée: tous les écrans et
+exports continuent de la lire sans changement. Une génération écrit dans un
+brouillon (`timetable_drafts`, une version = un `version_id`) en une seule
+transaction; les lecteurs ne voient rien tant que le brouillon n'est pas publié.
+
+La publication remplace le contenu de `timetable` par celui du brouillon dans
+une seule transaction: un lecteur voit soit l'ancienne version complète, soit
+la nouvelle. L'état publié précédent (y compris les modifications manuelles
+faites depuis) est d'abord archivé, ce qui permet un retour arrière immédiat.
+"""
+
+from database import getConnection, decode_conflict_error, conflict_message
+
+DRAFT = "DRAFT"
+PUBLISHED = "PUBLISHED"
+ARCHIVED = "ARCHIVED"
+RESTORING = "RESTORING"     # Transitoire, pendant la republication d'une archive
+
+# Colonnes communes à timetable et timetable_drafts
+SLOT_COLUMNS = "course_id, instructor_id, group_id, room_id, day, start_hour, duration, created_by"
+
+
+def create_version(label, created_by=None, copy_published=False):
+    """
+    Crée un brouillon.
+
+    Args:
+        label (str): Nom de la version (ex: "Génération S6 - essai 2")
+        created_by (int, optional): Administrateur auteur
+        copy_published (bool): Partir d'une copie de l'emploi du temps publié
+
+    Returns:
+        int: Identifiant de la version
+    """
+    conn = getConnection()
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO timetable_versions (label, status, created_by) VALUES (?, ?, ?)",
+                   (label, DRAFT, created_by))
+    version_id = cursor.lastrowid
+    if copy_published:
+        cursor.execute(f"""
+            INSERT INTO timetable_drafts (version_id, {SLOT_COLUMNS})
+            SELECT ?, {SLOT_COLUMNS} FROM timetable ORDER BY id
+        """, (version_id,))
+    conn.commit()
+    conn.close()
+    return version_id
+
+
+def add_draft_slots(version_id, slots):
+    """
+    Ajoute des créneaux à un brouillon en une transaction. Les créneaux en conflit
+    avec le brouillon (ou avec une indisponibilité) sont refusés individuellement.
+
+    Args:
+        slots (list): [(course_id, instructor_id, group_id, room_id, day, start_hour, duration, created_by), ...]
+
+    Returns:
+        tuple: (nombre de créneaux ajoutés, [(slot, message), ...] refusés)
+    """
+    conn = getConnection()
+    cursor = conn.cursor()
+    added, refused = 0, []
+    for slot in slots:
+        try:
+            cursor.execute(f"INSERT INTO timetable_drafts (version_id, {SLOT_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                           (version_id, *slot))
+            added += 1
+        except Exception as e:
+            conflict_type = decode_conflict_error(e)
+            if conflict_type is None:
+                conn.rollback()
+                conn.close()
+                raise
+            refused.append((slot, conflict_message(conflict_type, slot[1], slot[2], slot[3])))
+    conn.commit()
+    conn.close()
+    return added, refused
+
+
+def _archive_published(cursor, admin_id):
+    """Copie l'état publié courant dans une version archivée. Retourne son identifiant."""
+    cursor.execute("SELECT id FROM timetable_versions WHERE status = ?", (PUBLISHED,))
+    row = cursor.fetchone()
+    if row:
+        version_id = row['id']
+        cursor.execute("DELETE FROM timetable_drafts WHERE version_id = ?", (version_id,))
+        cursor.execute("UPDATE timetable_versions SET status = ? WHERE id = ?", (ARCHIVED, version_id))
+    else:
+        # Première publication: conserver l'emploi du temps existant comme version initiale
+        cursor.execute("""
+            INSERT INTO timetable_versions (label, status, created_by, published_at)
+            VALUES ('Version initiale', ?, ?, CURRENT_TIMESTAMP)
+        """, (ARCHIVED, admin_id))
+        version_id = cursor.lastrowid
+    cursor.execute(f"""
+        INSERT INTO timetable_drafts (version_id, {SLOT_COLUMNS})
+        SELECT ?, {SLOT_COLUMNS} FROM timetable ORDER BY id
+    """, (version_id,))
+    return version_id
+
+
+def publish_version(version_id, admin_id=None):
+    """
+    Publie une version (brouillon ou archive) en une transaction.
+    Si un créneau du brouillon est refusé, rien n'est modifié.
+
+    Returns:
+        dict: {"success": bool, "message": str, "archived": id de la version remplacée}
+    """
+    conn = getConnection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute("SELECT label, status FROM timetable_versions WHERE id = ?", (version_id,))
+        version = cursor.fetchone()
+        if not version:
+            conn.rollback()
+            return {"success": False, "message": f"Version {version_id} introuvable.", "archived": None}
+        if version['status'] == PUBLISHED:
+            conn.rollback()
+            return {"success": False, "message": f"La version '{version['label']}' est déjà publiée.",
+                    "archived": None}
+
+        archived = _archive_published(cursor, admin_id)
+
+        # Une archive est une copie fidèle d'un état déjà publié: elle est restaurée telle
+        # quelle. Un brouillon est vérifié par les triggers anti-conflits de timetable.
+        if version['status'] == ARCHIVED:
+            cursor.execute("UPDATE timetable_versions SET status = ? WHERE id = ?", (RESTORING, version_id))
+
+        # Remplacement du contenu publié
+        cursor.execute("DELETE FROM timetable")
+        cursor.execute(f"""
+            INSERT INTO timetable ({SLOT_COLUMNS})
+            SELECT {SLOT_COLUMNS} FROM timetable_drafts WHERE version_id = ? ORDER BY id
+        """, (version_id,))
+        count = cursor.rowcount
+
+        # La version publiée vit désormais dans timetable
+        cursor.execute("DELETE FROM timetable_drafts WHERE version_id = ?", (version_id,))
+        cursor.execute("""
+            UPDATE timetable_versions SET status = ?, published_at = CURRENT_TIMESTAMP, replaces = ?
+            WHERE id = ?
+        """, (PUBLISHED, archived, version_id))
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        conflict_type = decode_conflict_error(e)
+        reason = f"conflit ({conflict_type})" if conflict_type else str(e)
+        return {"success": False, "message": f"Publication annulée, rien n'a changé : {reason}.",
+                "archived": None}
+    finally:
+        conn.close()
+
+    return {"success": True, "archived": archived,
+            "message": f"Version '{version['label']}' publiée ({count} créneaux)."}
+
+
+def rollback(admin_id=None):
+    """
+    Republie la version remplacée par la publication courante (retour à l'état publié
+    précédent). Un second appel annule le retour arrière.
+    """
+    conn = getConnection()
+    row = conn.execute("""
+        SELECT replaces FROM timetable_versions WHERE status = ? AND replaces IS NOT NULL
+    """, (PUBLISHED,)).fetchone()
+    conn.close()
+    if not row:
+        return {"success": False, "message": "Aucune version précédente à restaurer.", "archived": None}
+    return publish_version(row['replaces'], admin_id)
+
+
+def list_versions():
+    """Liste les versions (id, label, statut, nombre de créneaux, dates)."""
+    conn = getConnection()
+    rows = conn.execute("""
+        SELECT v.id, v.label, v.status, v.created_at, v.published_at,
+               CASE WHEN v.status = 'PUBLISHED' THEN (SELECT COUNT(*) FROM timetable)
+                    ELSE (SELECT COUNT(*) FROM timetable_drafts d WHERE d.version_id = v.id) END AS slots
+        FROM timetable_versions v
+        ORDER BY v.id DESC
+    """).fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
+
+def delete_version(version_id):
+    """Supprime un brouillon ou une archive (la version publiée ne peut pas être supprimée)."""
+    conn = getConnection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT status FROM timetable_versions WHERE id = ?", (version_id,))
+    row = cursor.fetchone()
+    if not row or row['status'] == PUBLISHED:
+        conn.close()
+        return False
+    cursor.execute("DELETE FROM timetable_drafts WHERE version_id = ?", (version_id,))
+    cursor.execute("DELETE FROM timetable_versions WHERE id = ?", (version_id,))
+    conn.commit()
+    conn.close()
+    return True